@@ -25,6 +25,12 @@ int sensor7Value = 0;
 int sensorDelay = 3; // ms
 int tempo1, tempo2, tempo3, x, r;
 
+long plano_steps = 0;    // Plano de varredura: steps por ponto... (long: o int do AVR tem 16 bits)
+long plano_restante = 0; // ...e pontos que ainda faltam
+
+long perfil_vmax = 0; // Perfil trapezoidal: velocidade máxima (steps/s). 0 --> velocidade do potenciômetro
+long perfil_acel = 0; // Aceleração (steps/s²)
+
 
 void setup() {
 //  INPUT_PULLUP --> Botões em portas digitais
@@ -39,6 +45,7 @@ void setup() {
   digitalWrite(enable,0);
 //  digitalWrite(rele, 0); // "0" - habilita o TB6560 / "1" - desabilita o TB6560
 
+  Serial.println("PRONTO"); // Avisa o Python que o setup terminou (o Arduino reinicia quando a porta é aberta)
 }
 
 
@@ -53,19 +60,95 @@ void medir() {
     tempo3= 128 - tempo2;
 
     if(Serial.available() > 0) {
-      int ppr = Serial.parseInt();
-      for (int r=0; r<ppr; r++){
-        digitalWrite(passo,1);
-        delay(tempo3);
-        digitalWrite(passo,0);
-        delay(tempo3);
+      if (Serial.peek() == '>') { // Gatilho: anda um ponto do plano e responde um único byte
+        Serial.read();
+        if (plano_restante > 0) {
+          andar(plano_steps);
+          plano_restante--;
+          Serial.write('A');
+        } else {
+          Serial.write('E'); // Sem plano (ou plano terminado)
         }
-      Serial.println(ppr);
+        return;
+      }
+
+      if (Serial.peek() == 'P') { // Plano de varredura: "P<steps>,<pontos>\n"
+        Serial.read();
+        plano_steps = Serial.parseInt();
+        plano_restante = Serial.parseInt();
+        consomeTerminador();
+        Serial.print("PLANO ");
+        Serial.print(plano_steps);
+        Serial.print(',');
+        Serial.println(plano_restante);
+        return;
+      }
+
+      if (Serial.peek() == 'V') { // Perfil de movimento: "V<vmax>,<acel>\n" (steps/s, steps/s²)
+        Serial.read();
+        perfil_vmax = Serial.parseInt();
+        perfil_acel = Serial.parseInt();
+        consomeTerminador();
+        Serial.print("PERFIL ");
+        Serial.print(perfil_vmax);
+        Serial.print(',');
+        Serial.println(perfil_acel);
+        return;
+      }
+
+      long ppr = Serial.parseInt(); // Movimentos longos ("ir_para()") passam de 32767 steps
+      consomeTerminador();
+      andar(ppr);
+      Serial.println(ppr); // Devolve o número com sinal
       ppr = 0;
     }
   }
 }
 
+void consomeTerminador() {
+  while (Serial.peek() == '\n' || Serial.peek() == '\r') {
+    Serial.read(); // Consome o terminador, senão o próximo parseInt() espera 1 s e devolve 0
+  }
+}
+
+void andar(long steps) {
+  digitalWrite(dir, steps < 0 ? 1 : 0); // Steps negativos: volta a grade (varredura adaptativa / compensação de folga)
+  long total = abs(steps);
+  if (perfil_vmax > 0 && perfil_acel > 0) {
+    andarPerfil(total);
+  } else {
+    for (long r=0; r<total; r++){
+      digitalWrite(passo,1);
+      delay(tempo3);
+      digitalWrite(passo,0);
+      delay(tempo3);
+    }
+  }
+  digitalWrite(dir,0);
+}
+
+void andarPerfil(unsigned long total) {
+  // Trapézio: acelera, anda em "perfil_vmax" e freia. Velocidade do step n = min(vmax, sqrt(2·a·(n+1)), sqrt(2·a·(total-n)))
+  // O mesmo modelo está em "PerfilMovimento" (pyce.py), que prevê a duração dos movimentos
+  for (unsigned long n=0; n<total; n++){ // unsigned long: contagens acima de 32767 steps não estouram
+    float v = min((float) perfil_vmax, sqrt(2.0 * perfil_acel * (n + 1)));
+    v = min(v, (float) sqrt(2.0 * perfil_acel * (total - n)));
+    unsigned long meio_periodo = 500000.0 / v; // us
+    digitalWrite(passo,1);
+    esperaMicros(meio_periodo);
+    digitalWrite(passo,0);
+    esperaMicros(meio_periodo);
+  }
+}
+
+void esperaMicros(unsigned long us) {
+  if (us > 16000) { // delayMicroseconds() só é preciso até ~16 ms
+    delay(us / 1000);
+    us = us % 1000;
+  }
+  delayMicroseconds(us);
+}
+
 void determinarTempo() {
   if (sensor5Value > 1000) {
     sensor6Value = analogRead(sensor6); // Determina a velocidade do motor para ajuste manual
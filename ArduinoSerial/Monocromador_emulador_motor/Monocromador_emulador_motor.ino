@@ -1,6 +1,7 @@
 void setup() {
   Serial.begin(9600);          // Inicia comunicação serial a 9600 baud
   pinMode(LED_BUILTIN, OUTPUT); // Configura LED interno como saída
+  Serial.println("PRONTO");     // Avisa o Python que o setup terminou
 }
 
 void loop() {
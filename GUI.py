@@ -5,7 +5,6 @@ from tkinter import ttk, scrolledtext, messagebox # ttk traz os widgets com visu
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg # --> Tela de Figura para Tkinter
 import threading # Multitarefa
-import time
 import random
 try:
     import pyce # Minha biblioteca
@@ -13,21 +12,119 @@ except ImportError:
     print('AVISO: Arquivo "pyce.py" não encontrado na mesma pasta!')
 
 import queue
-import sys
+import logging
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+
+log = logging.getLogger('pyce.gui') # Filho do logger "pyce": aparece no mesmo log
+
+LINHAS_LOG = 1000 # Linhas mantidas no widget de log. As mais antigas ficam só no arquivo
+ARQUIVO_LOG = 'pyce_gui.log'
+INTERVALO_LOG = 100 # ms entre duas atualizações do widget
+QUADROS_POR_SEGUNDO = 20 # Limite de redesenhos do gráfico
 
 
 
 # ========== Classes falsas para teste (Mocks) ==========
 class MockSR510:
-    def conectar(self): print('[SIMULAÇÃO] Lock-in conectado.')
+    sensibilidade = None # Sem código: o mock não tem escalas
+    def conectar(self): log.info('[SIMULAÇÃO] Lock-in conectado.')
     def ler_sensibilidade(self): return ['500 mV', 0, 0, 1] # Retorna lista fictícia
     def ler_valor_saida(self): return random.uniform(0, 10) # Retorna voltagem aleatória
-    def fechar(self): print('[SIMULAÇÃO] Lock-in desconectado.')
+    def fechar(self): log.info('[SIMULAÇÃO] Lock-in desconectado.')
+
+class MockMovimento:
+    def aguardar(self): pass # Finge que esperou o Arduino
 
 class MockMonocromador:
-    def conectar(self): print('[SIMULAÇÃO] Arduino conectado.')
+    def conectar(self): log.info('[SIMULAÇÃO] Arduino conectado.')
     def mover_motor(self, step): pass # Finge que move
-    def desconectar(self): print('[SIMULAÇÃO] Arduino desconectado.')
+    def iniciar_movimento(self, step): return MockMovimento()
+    def carregar_plano(self, step, n_pontos): pass # Finge que carregou o plano
+    def avancar(self): return MockMovimento()
+    def desconectar(self): log.info('[SIMULAÇÃO] Arduino desconectado.')
+
+
+
+# ========== Gráfico ==========
+class RenderizadorGrafico:
+    """
+    Separa a aquisição do desenho: a thread do experimento só enfileira os pontos ("enviar()") e a thread do Tk desenha, no máximo QUADROS_POR_SEGUNDO vezes por segundo, tudo o que chegou desde o último quadro.
+
+    Só a thread do Tk toca nos artistas do Matplotlib, então o blit do "GraficoIncremental" pode ser usado.
+    """
+
+    def __init__(self, ax, linha, quadros_por_segundo: int=QUADROS_POR_SEGUNDO):
+        """
+        Args:
+            ax (Axes): Os eixos da janela
+            linha (Line2D): A linha do espectro
+            quadros_por_segundo (int, optional): O limite de redesenhos. Defaults to QUADROS_POR_SEGUNDO.
+        """
+
+        self.fila = queue.SimpleQueue() # (x, y) ou ('final', x, y, erro)
+        self.grafico = pyce.GraficoIncremental(ax, linha)
+        self.intervalo = max(int(1000 / quadros_por_segundo), 1) # ms
+        self.raiz = None
+        self.id_quadro = None
+
+    # ========== Thread do experimento ==========
+    def enviar(self, x: float, y: float):
+        self.fila.put((x, y))
+
+    def enviar_final(self, x, y, erro=None):
+        """Pede para trocar os pontos decimados por todos os pontos ao final (ver "GraficoIncremental.finalizar()"), com a faixa do erro padrão, se houver."""
+
+        self.fila.put(('final', x, y, erro))
+
+    # ========== Thread do Tk ==========
+    def renderizar(self):
+        """
+        Consome os pontos que chegaram desde o último quadro e desenha uma única vez. Sem pontos novos, não desenha.
+
+        Returns:
+            int: Quantos pontos foram desenhados
+        """
+
+        pontos, reescalou, final = 0, False, None
+        try:
+            while True:
+                item = self.fila.get_nowait()
+                if len(item) == 4:
+                    final = item
+                else:
+                    reescalou = self.grafico.adicionar(*item) or reescalou
+                    pontos += 1
+        except queue.Empty:
+            pass
+
+        if final:
+            _, x, y, erro = final
+            self.grafico.finalizar(x, y)
+            if erro is not None:
+                self.grafico.ax.fill_between(x, y - erro, y + erro, alpha=0.3, label='Erro padrão')
+        elif pontos:
+            self.grafico.desenhar(reescalou)
+        return pontos
+
+    def iniciar(self, raiz):
+        """Começa a desenhar periodicamente (pelo "after()" do Tk)."""
+
+        self.raiz = raiz
+        self.quadro()
+
+    def quadro(self):
+        self.renderizar()
+        self.id_quadro = self.raiz.after(self.intervalo, self.quadro)
+
+    def parar(self):
+        """Desenha o que ainda está na fila e para o timer. A linha volta ao desenho normal, para a figura poder ser salva."""
+
+        if self.id_quadro is not None:
+            self.raiz.after_cancel(self.id_quadro)
+            self.id_quadro = None
+        self.renderizar()
+        self.grafico.encerrar()
 
 
 
@@ -46,6 +143,11 @@ class ExperimentoGUI(pyce.Experimento):
         # self.linha_grafico, = self.ax_gui.plot([], [], 'b.-', ms=3, label='Sinal (V)')
         self.linha_grafico, = self.ax_gui.plot([], [], 'ro-', ms=2.5, label='Sinal (V)')
         self.ax_gui.legend(loc='upper right')
+        self.ax_gui.set_xlim(min(self.comp_i, self.comp_f), max(self.comp_i, self.comp_f))
+
+        # A thread do experimento só enfileira os pontos: quem desenha é a thread do Tk (criar o objeto na thread do Tk)
+        self.renderizador = RenderizadorGrafico(self.ax_gui, self.linha_grafico)
+        self.grafico = self.renderizador.grafico
 
         self.modo_simulacao = modo_simulacao
 
@@ -53,13 +155,16 @@ class ExperimentoGUI(pyce.Experimento):
     def conectar(self, conexao_lock_in: dict, conexao_arduino: dict):
         # ===== Configura o uso das classes mocks
         if self.modo_simulacao:
-            print('MODO SIMULAÇÃO ATIVADO')
+            log.info('MODO SIMULAÇÃO ATIVADO')
             self.sr510 = MockSR510()
             self.arduino = MockMonocromador()
             # Simulando a lógica de ler sensibilidade que existe no original
             raw_sensibilidade = self.sr510.ler_sensibilidade()
             self.sensibilidade_str = raw_sensibilidade[0]
             self.sensibilidade_ordem = raw_sensibilidade[3]
+            self.sensibilidade_fundo = 10 # As tensões do mock vão de 0 a 10
+            self.auto_escala = False
+            self.checkpoint = False # Nada a retomar numa simulação
         else:
             # Chama o método original do pyce.py
             super().conectar(conexao_lock_in, conexao_arduino)
@@ -69,37 +174,61 @@ class ExperimentoGUI(pyce.Experimento):
         pass
 
     def atualizar_grafico(self):
-        if self.linha_grafico:
-            # Atualiza os dados da linha com o buffer da classe mãe
-            self.linha_grafico.set_data(self.buffer_x, self.buffer_y)
-            
-            # Recalcula a escala (Zoom automático)
-            if len(self.buffer_y) > 1:
-                # Usamos sua lógica original aqui!
-                y_min, y_max = min(self.buffer_y), max(self.buffer_y)
-                margem = (y_max - y_min) * 0.1 if y_max != y_min else 1.0
-                
-                self.ax_gui.set_ylim(y_min - margem, y_max + margem)
-                self.ax_gui.set_xlim(min(self.comp_i, self.comp_f), max(self.comp_i, self.comp_f))
-            # if len(self.buffer_y) > 0:
-            #     self.ax_gui.relim()
-            #     self.ax_gui.autoscale_view()
-            
-            self.canvas_gui.draw_idle()
-            # self.canvas_gui.draw() --> Vai que...
-            # .draw_idle() é melhor que .draw() pois espera o processador "respirar". Desenhe quiando der. Kkkkkk
+        # Só o último ponto do buffer da classe mãe. Nada de Matplotlib nesta thread
+        self.renderizador.enviar(self.buffer_x[-1], self.buffer_y[-1])
+
+    def pausa_grafico(self):
+        # Quem desenha é a thread do Tk: a aquisição segue direto para o próximo ponto
+        pass
 
-class TextRedirector:
-    def __init__(self, widget, tag='stdout'):
-        self.widget = widget
-        self.tag = tag
-        self.queue = queue.Queue()
+    def mostrar_resultado(self, erro=None):
+        # A figura é a da janela: a thread do Tk troca a linha por todos os pontos (o .jpg é salvo pela "Interface")
+        self.renderizador.enviar_final(self.buffer_x.copy(), self.buffer_y.copy(), erro)
 
-    def write(self, str_val):
-        self.queue.put(str_val)
+class RegistroGUI:
+    """
+    Liga o logger "pyce" à GUI. Cada mensagem vai para uma fila, lida em lotes pela thread do Tk (ver "Interface.check_log_queue()"), e para um arquivo com o log completo.
 
-    def flush(self):
-        pass
+    Substitui o antigo redirecionamento do "sys.stdout": a thread do experimento só enfileira registros, sem tocar no widget.
+    """
+
+    def __init__(self, arquivo: str=ARQUIVO_LOG, nivel: int=logging.INFO):
+        """
+        Args:
+            arquivo (str, optional): O arquivo do log completo (rotativo, até 4 x 5 MB). Defaults to ARQUIVO_LOG.
+            nivel (int, optional): O nível mínimo das mensagens. Defaults to logging.INFO.
+        """
+
+        self.fila = queue.SimpleQueue()
+        self.manipulador_fila = QueueHandler(self.fila) # Já entrega a mensagem formatada
+        self.manipulador_fila.setFormatter(logging.Formatter('%(asctime)s %(message)s', datefmt='%H:%M:%S'))
+        self.manipulador_arquivo = RotatingFileHandler(arquivo, maxBytes=5_000_000, backupCount=3, encoding='utf-8', delay=True)
+        self.manipulador_arquivo.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+        self.registro = logging.getLogger('pyce')
+        self.registro.setLevel(nivel)
+        self.registro.addHandler(self.manipulador_fila)
+        self.registro.addHandler(self.manipulador_arquivo)
+
+    def pendentes(self):
+        """
+        Esvazia a fila, sem bloquear.
+
+        Returns:
+            list: As mensagens (str) que chegaram desde a última chamada
+        """
+
+        linhas = []
+        try:
+            while True:
+                linhas.append(self.fila.get_nowait().getMessage())
+        except queue.Empty:
+            return linhas
+
+    def fechar(self):
+        for manipulador in (self.manipulador_fila, self.manipulador_arquivo):
+            self.registro.removeHandler(manipulador)
+            manipulador.close()
 
 class Interface:
 
@@ -124,8 +253,8 @@ class Interface:
         # Método que desenha a tela
         self.completa_janela() # Quando o Objeto for criado (instanciado), a janela será aberta e preenchida
 
-        # Configurar redirecionamento de logs
-        self.redirector = TextRedirector(self.txt_log)
+        # Configurar o log (mensagens do "pyce" --> widget e arquivo)
+        self.registro = RegistroGUI()
         self.check_log_queue()
 
 
@@ -137,10 +266,6 @@ class Interface:
             messagebox.showwarning('Atenção', 'O campo "Nome do Arquivo" é obrigatório.')
             return
         
-        # Bloqueia input durante execução
-        self.sys_stdout_original = sys.stdout
-        sys.stdout = self.redirector # Redireciona prints
-
         self.botao_iniciar.config(state='disabled') # Trava o botão, evita o duplo clique
         self.botao_parar.config(state='nomal')
         self.log_status.config(text='Status: Inicializando...', foreground='orange')
@@ -151,7 +276,24 @@ class Interface:
         self.ax.set_xlabel('Comprimento de Onda (Å)')
         self.ax.set_ylabel('Sinal (V)')
         self.ax.grid(True, linestyle='--')
+
+        # Instanciando a filha da classe original com os dados da tela. Criada aqui, na thread do Tk, porque cria a linha e o renderizador
+        # ".get()" para pegar o valor das variáveis
+        self.experimento_atual = ExperimentoGUI(
+            fig=self.fig,
+            ax=self.ax,
+            canvas=self.canvas,
+            modo_simulacao=self.var_simulacao.get(),
+            nome_arquivo=self.var_nome.get(),
+            operador=self.var_operador.get(),
+            comp_i=self.var_inicio.get(),
+            comp_f=self.var_fim.get(),
+            tamanho_fenda=self.var_fenda.get(),
+            ppr=self.var_ppr.get(),
+            descricao=self.var_texto.get()
+        )
         self.canvas.draw()
+        self.experimento_atual.renderizador.iniciar(self.raiz)
         
         # ========== Criar a thread ==========
         # target --> a função que vai rodar na thread secundária
@@ -160,65 +302,50 @@ class Interface:
         t.start()
 
     def rodar_pyce(self):
-        print('Thread: Iniciando experimento...')
-        
-        pyce.plt.show = lambda: None  # Anula o "show()", pois trava a thread; "Monkey Patching"; Redefine o plt.show!!!!!
-        pyce.plt.pause = lambda x: time.sleep(x) # Troca pause por sleep (mais leve)
+        log.info('Thread: Iniciando experimento...')
 
         try:
-            # Instanciando a filha da classe original com os dados da tela
-            # ".get()" para pegar o valor das variáveis
-            self.experimento_atual = ExperimentoGUI(
-                fig=self.fig,
-                ax=self.ax,
-                canvas=self.canvas,
-                modo_simulacao=self.var_simulacao.get(),
-                nome_arquivo=self.var_nome.get(),
-                operador=self.var_operador.get(),
-                comp_i=self.var_inicio.get(),
-                comp_f=self.var_fim.get(),
-                tamanho_fenda=self.var_fenda.get(),
-                ppr=self.var_ppr.get(),
-                descricao=self.var_texto.get()
-            )
-
             # Prepara dicionários de conexão
             conexao_lockin = {'porta': self.var_porta_lockin.get(), 'baudrate': 9600}
             conexao_arduino = {'porta': self.var_porta_arduino.get(), 'baudrate': 9600}
 
-            print('Thread: Conectando equipamentos...')
+            log.info('Thread: Conectando equipamentos...')
             self.experimento_atual.conectar(conexao_lockin, conexao_arduino)
             self.raiz.after(0, lambda: self.log_status.config(text='Status: Rodando...', foreground='green'))
             
-            print('Thread: Executando run()...')
+            log.info('Thread: Executando run()...')
             self.experimento_atual.run() # Roda o loop principal do pyce.py
-            self.nome_excluivo = self.experimento_atual.nome_exclusivo
             self.raiz.after(0, lambda: self.log_status.config(text='Status: Concluído.', foreground='blue'))
 
         except Exception as e:
-            print(f'ERRO NA THREAD: {e}')
+            log.exception(f'ERRO NA THREAD: {e}')
             self.raiz.after(0, lambda: messagebox.showerror('Erro no Experimento', str(e)))
             self.raiz.after(0, lambda: self.log_status.config(text='Status: Erro', foreground='red'))
 
         finally:
-            sys.stdout = self.sys_stdout_original # Restaura print normal
+            self.raiz.after(0, self.encerrar_grafico, self.experimento_atual)
             self.experimento_atual = None
             self.raiz.after(0, self.resetar_botoes)
-            
-            
-            self.fig.tight_layout()
-            self.fig.set_size_inches(8, 5)
-            self.fig.savefig(f'{self.nome_excluivo}.jpg', dpi=300)
+
+    def encerrar_grafico(self, experimento):
+        """Na thread do Tk: desenha os últimos pontos, para o renderizador e salva a figura da janela."""
+
+        experimento.renderizador.parar()
+        if getattr(experimento, 'nome_exclusivo', None) is None:
+            return # Não chegou a criar os arquivos
+        self.fig.tight_layout()
+        self.fig.set_size_inches(8, 5)
+        self.fig.savefig(f'{experimento.nome_exclusivo}.jpg', dpi=300)
 
     def parar_experimento(self):
         """Ativada caso o botão de parada seja acionado."""
 
         if self.experimento_atual:
             self.log_status.config(text='Status: Parando...', foreground='red')
-            # Define a flag que existe na classe Experimento original
-            self.experimento_atual.evento_abortar_experimento = True
+            # Define a flag da classe Experimento (e cancela a tarefa, se for o "run_async()")
+            self.experimento_atual.abortar()
         else:
-            print('Nenhum experimento rodando para parar.')
+            log.info('Nenhum experimento rodando para parar.')
 
     def resetar_botoes(self):
         """Garnate o estado original dos botões."""
@@ -227,14 +354,19 @@ class Interface:
         self.botao_parar.config(state='disabled')
     
     def check_log_queue(self):
-        """Verifica se há mensagens na fila do print para exibir na GUI"""
-        while not self.redirector.queue.empty():
-            msg = self.redirector.queue.get()
+        """Mostra na GUI as mensagens que chegaram desde a última chamada: uma única inserção por atualização e no máximo LINHAS_LOG linhas no widget."""
+
+        linhas = self.registro.pendentes()
+        if linhas:
+            linhas = linhas[-LINHAS_LOG:] # As outras nem entram no widget: já estão no arquivo
             self.txt_log.configure(state='normal')
-            self.txt_log.insert(tk.END, msg)
+            self.txt_log.insert(tk.END, '\n'.join(linhas) + '\n')
+            excesso = int(self.txt_log.index('end-1c').split('.')[0]) - 1 - LINHAS_LOG
+            if excesso > 0:
+                self.txt_log.delete('1.0', f'{excesso + 1}.0') # Anel: descarta as linhas mais antigas
             self.txt_log.see(tk.END)
             self.txt_log.configure(state='disabled')
-        self.raiz.after(100, self.check_log_queue)
+        self.raiz.after(INTERVALO_LOG, self.check_log_queue)
     # endregion
     
     def completa_janela(self):
@@ -315,4 +447,5 @@ class Interface:
 if __name__ == '__main__':
     raiz = tk.Tk()
     app = Interface(raiz)
-    raiz.mainloop() # Um loop infinito que espera um ação --> Mantém a janela aberta
\ No newline at end of file
+    raiz.mainloop() # Um loop infinito que espera um ação --> Mantém a janela aberta
+    app.registro.fechar()
\ No newline at end of file
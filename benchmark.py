@@ -0,0 +1,235 @@
+#region Observações
+# - Mede o loop de aquisição ("Experimento.run()" e "GUI.ExperimentoGUI.run()") de ponta a ponta contra os equipamentos emulados do "emulador.py", passando pelo pySerial de verdade.
+# - Para cada cenário (classe x faixa de comprimento de onda x PPR) mostra pontos/s, o tempo por ponto em cada fase (Lock-in, gráfico, motor, arquivo), vindo das métricas do próprio "run()" ("pyce.MetricasCiclo"), e o crescimento da memória residente do processo entre o ponto "PONTOS_AQUECIMENTO" e o último.
+# - Os cenários têm centenas de pontos (de ~200 a ~1000) e rodam sem a troca automática de escala: uma troca (com a sua espera) a mais ou a menos não pesa no pontos/s nem dispara a comparação com a baseline.
+# - Sem o Tk, os quadros do "GUI.RenderizadorGrafico" são desenhados na fase "grafico" do próprio ponto, no ritmo do timer da janela (ver "ExperimentoGUIBenchmark").
+# - "--salvar-baseline" grava os resultados em "benchmark_baseline.json". Sem essa opção, os resultados são comparados com a baseline e o programa termina com código 1 se algum cenário ficar mais lento que a tolerância.
+# - Só funciona em Linux/macOS (o emulador usa pseudo-terminais).
+#endregion
+
+
+# ========== Imports ==========
+import matplotlib
+matplotlib.use('Agg') # Sem janela: precisa vir antes do "pyce"
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import warnings
+from time import perf_counter
+from pathlib import Path
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import pyce
+import GUI
+import emulador
+
+
+ARQUIVO_BASELINE = Path(__file__).with_name('benchmark_baseline.json')
+FASES = ('lock_in', 'grafico', 'motor', 'arquivo')
+
+FAIXAS = (300,) # Å varridos a partir de 1000 Å. Com a fenda de 100 micro metro: 200, 638 e 1063 pontos nos PPRS
+PPRS = (1, 3, 5)
+FENDA = 100 # micro metro
+PONTOS_AQUECIMENTO = 50 # A memória é medida a partir deste ponto: o que os primeiros pontos alocam (buffers, caches do Matplotlib) não é crescimento
+
+
+#region Cenários
+def memoria_residente():
+    """
+    Lê a memória residente (RSS) do processo em "/proc". Diferente do "tracemalloc", não deixa o loop mais lento.
+
+    Returns:
+        int: A memória residente em bytes
+    """
+
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class ExperimentoGUIBenchmark(GUI.ExperimentoGUI):
+    """
+    O "ExperimentoGUI" sem a thread do Tk. Na janela, o timer do Tk desenha um quadro com os pontos da fila a cada "renderizador.intervalo" ms. Aqui esse quadro é desenhado logo depois de enfileirar o ponto, quando o intervalo já passou: o custo do desenho entra na fase "grafico" em vez de medir só o "enviar()".
+    """
+
+    ultimo_quadro = 0.0
+
+    def atualizar_grafico(self):
+        super().atualizar_grafico()
+        agora = perf_counter()
+        if agora - self.ultimo_quadro >= self.renderizador.intervalo / 1000:
+            self.renderizador.renderizar()
+            self.ultimo_quadro = agora
+
+
+def cria_experimento(classe: str, faixa: float, ppr: int):
+    """
+    Cria o experimento do cenário, sem a troca automática de escala. O "ExperimentoGUI" recebe uma figura Agg no lugar do canvas do Tkinter e desenha os quadros sozinho (ver "ExperimentoGUIBenchmark").
+
+    Args:
+        classe (str): "Experimento" ou "ExperimentoGUI"
+        faixa (float): A largura da varredura em Å
+        ppr (int): Pontos por resolução
+
+    Returns:
+        pyce.Experimento: O experimento, ainda desconectado
+    """
+
+    parametros = dict(nome_arquivo='benchmark', operador='benchmark', comp_i=1000, comp_f=1000 + faixa, tamanho_fenda=FENDA, ppr=ppr, descricao='Benchmark')
+
+    if classe == 'ExperimentoGUI':
+        fig = Figure(dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw_idle = canvas.draw # O Agg não tem "draw_idle" adiado: desenha na hora, o pior caso
+        experimento = ExperimentoGUIBenchmark(fig, fig.add_subplot(111), canvas, False, **parametros)
+    else:
+        experimento = pyce.Experimento(**parametros)
+
+    experimento.auto_escala = False
+    return experimento
+
+
+def roda_cenario(classe: str, faixa: float, ppr: int, args):
+    """
+    Roda um cenário completo (conectar + run) contra uma bancada emulada nova.
+
+    Returns:
+        dict: As métricas do cenário
+    """
+
+    sr510_emulado, arduino_emulado = emulador.emular_bancada(
+        emulador.ModeloTempo(args.baudrate, 11, args.latencia, semente=0),
+        emulador.ModeloTempo(args.baudrate, 10, args.latencia, args.atraso_step, semente=0)
+    )
+    sr510_emulado.ruido = 1e-5 # Para o gráfico não ficar achatado
+
+    experimento = cria_experimento(classe, faixa, ppr)
+    memoria = {} # "aquecimento" e "final": a memória residente no ponto "PONTOS_AQUECIMENTO" e no último
+
+    def medir_memoria(evento, dados):
+        if evento == 'inicio':
+            memoria['total'] = dados['pontos']
+        elif evento == 'ponto':
+            if dados['pontos'] == PONTOS_AQUECIMENTO:
+                memoria['aquecimento'] = memoria_residente()
+            if dados['pontos'] == memoria['total']:
+                memoria['final'] = memoria_residente()
+
+    experimento.inscrever(medir_memoria)
+    try:
+        inicio = perf_counter()
+        experimento.conectar(
+            conexao_lock_in={'porta': sr510_emulado.porta, 'baudrate': args.baudrate},
+            conexao_arduino={'porta': arduino_emulado.porta, 'baudrate': args.baudrate, 'timeout': 5}
+        )
+        tempo_conexao = perf_counter() - inicio
+
+        inicio = perf_counter()
+        experimento.run()
+        tempo_run = perf_counter() - inicio
+
+    finally:
+        pyce.pyplot().close('all')
+        sr510_emulado.parar()
+        arduino_emulado.parar()
+
+    pontos = len(experimento.buffer_x)
+    return {
+        'pontos': pontos,
+        'tempo_conexao': round(tempo_conexao, 4),
+        'tempo_run': round(tempo_run, 4),
+        'pontos_por_segundo': round(pontos / tempo_run, 3),
+        'fases_por_ponto': {fase: round(sum(experimento.metricas.tempos[fase]) / pontos, 5) for fase in FASES},
+        'memoria_kb': round((memoria['final'] - memoria['aquecimento']) / 1024, 1),
+    }
+#endregion
+
+
+
+#region Relatório
+def imprime_resultado(chave: str, resultado: dict, referencia: dict=None):
+    """Imprime uma linha da tabela de resultados (e a variação em relação à baseline, se houver)."""
+
+    fases = ' '.join(f'{resultado["fases_por_ponto"][fase]*1000:8.2f}' for fase in FASES)
+    linha = f'{chave:<28} {resultado["pontos"]:>6} {resultado["pontos_por_segundo"]:>8.2f} {fases} {resultado["memoria_kb"]:>9.1f}'
+    if referencia:
+        variacao = resultado['pontos_por_segundo'] / referencia['pontos_por_segundo'] - 1
+        linha += f' {variacao:+8.1%}'
+    print(linha)
+
+
+def compara_baseline(resultados: dict, baseline: dict, tolerancia: float):
+    """
+    Compara pontos/s de cada cenário com a baseline.
+
+    Returns:
+        list: As chaves dos cenários que ficaram mais lentos que a tolerância permite
+    """
+
+    regressoes = []
+    for chave, resultado in resultados.items():
+        referencia = baseline.get(chave)
+        if referencia and resultado['pontos_por_segundo'] < referencia['pontos_por_segundo'] * (1 - tolerancia):
+            regressoes.append(chave)
+    return regressoes
+#endregion
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do loop de aquisição do pyce contra equipamentos emulados.')
+    parser.add_argument('--classes', nargs='+', default=['Experimento', 'ExperimentoGUI'], choices=['Experimento', 'ExperimentoGUI'])
+    parser.add_argument('--faixas', nargs='+', type=float, default=list(FAIXAS), help='Larguras de varredura (Å)')
+    parser.add_argument('--pprs', nargs='+', type=int, default=list(PPRS), help='Valores de PPR')
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--latencia', type=float, default=0.0, help='Latência das respostas emuladas (s)')
+    parser.add_argument('--atraso-step', type=float, default=0.001, help='Tempo por step do motor emulado (s)')
+    parser.add_argument('--tolerancia', type=float, default=0.15, help='Queda de pontos/s aceita antes de acusar regressão')
+    parser.add_argument('--salvar-baseline', action='store_true', help='Grava os resultados como a nova baseline')
+    parser.add_argument('--saida', type=Path, default=None, help='Grava os resultados (json) neste arquivo')
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(ARQUIVO_BASELINE.read_text(encoding='utf-8')) if ARQUIVO_BASELINE.exists() else {}
+    resultados = {}
+
+    cabecalho = f'{"cenário":<28} {"pontos":>6} {"pts/s":>8} ' + ' '.join(f'{fase[:8]:>8}' for fase in FASES) + f' {"Δmem KB":>9}'
+    print(cabecalho + (f' {"vs base":>8}' if baseline else ''))
+    print(' ' * 45 + '(ms por ponto em cada fase)')
+
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta, warnings.catch_warnings():
+        warnings.simplefilter('ignore') # plt.show() no Agg, limites iguais no eixo y...
+        pyce.log.setLevel(logging.ERROR) # Cala as mensagens do pyce
+        os.chdir(pasta) # Os arquivos .csv/.jpg do benchmark não sujam o repositório
+        try:
+            for classe in args.classes:
+                for faixa in args.faixas:
+                    for ppr in args.pprs:
+                        chave = f'{classe}/{faixa:g}A/ppr{ppr}'
+
+                        resultados[chave] = roda_cenario(classe, faixa, ppr, args)
+
+                        imprime_resultado(chave, resultados[chave], baseline.get(chave))
+        finally:
+            os.chdir(diretorio_original)
+
+    if args.saida:
+        args.saida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if args.salvar_baseline:
+        ARQUIVO_BASELINE.write_text(json.dumps(resultados, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        print(f'Baseline salva em {ARQUIVO_BASELINE.name}')
+        return 0
+
+    regressoes = compara_baseline(resultados, baseline, args.tolerancia)
+    for chave in regressoes:
+        print(f'REGRESSÃO: {chave} ficou mais de {args.tolerancia:.0%} mais lento que a baseline')
+    return 1 if regressoes else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
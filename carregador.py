@@ -0,0 +1,324 @@
+#region Observações
+# - Leitor dos arquivos produzidos pelo "pyce" (cria_arquivo_csv / coletar_dados / escreve_eventos): linhas "#" de metadados, uma divisória, as linhas de dados, outra divisória e os eventos.
+# - Também abre o formato binário ("formato_binario.py"), sem parse.
+# - "carregar_pasta()" carrega uma pasta inteira em paralelo, um processo por núcleo.
+# - Uso rápido: python carregador.py Gráficos
+#endregion
+
+
+# ========== Imports ==========
+import os
+import logging
+from pathlib import Path
+from datetime import date, time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from formato_binario import abrir_binario
+
+
+log = logging.getLogger(__name__)
+
+DIVISORIA = '#---' # Começo da linha divisória escrita pelo "pyce"
+SUFIXOS_AUXILIARES = ('_metricas', '_passagens') # Arquivos auxiliares gravados ao lado do espectro
+
+
+#region Registros
+class Metadados:
+    """Os metadados de um espectro, já convertidos para os tipos certos. Campos que não estavam no arquivo ficam None."""
+
+    # Começo da linha no arquivo --> (atributo, conversor)
+    campos = {
+        '# Experimento:': ('descricao', str),
+        '# Data:': ('data', None), # Tratado à parte: "[YYYY-MM-DD] [HH:MM:SS.ffffff]"
+        '# Operador:': ('operador', str),
+        '# Comprimento de onda inicial:': ('comp_i', float),
+        '# Comprimento de onda final:': ('comp_f', float),
+        '# Tamanho da fenda': ('tamanho_fenda', float),
+        '# Ponto Por Resolução (PPR):': ('ppr', int),
+        '# Sensibilidade:': ('sensibilidade', str),
+        '# Colunas:': ('colunas', lambda valor: tuple(nome.strip() for nome in valor.split(','))),
+    }
+
+    def __init__(self):
+        self.descricao = None
+        self.data = None # date
+        self.hora = None # time
+        self.operador = None
+        self.comp_i = None
+        self.comp_f = None
+        self.tamanho_fenda = None # mm
+        self.ppr = None
+        self.sensibilidade = None
+        self.colunas = None # Nomes das colunas de dados. None em arquivos antigos (ver "Espectro.colunas")
+        self.extras = {} # Linhas de metadados desconhecidas
+
+    def __repr__(self):
+        return f'Metadados(operador={self.operador!r}, data={self.data}, comp_i={self.comp_i}, comp_f={self.comp_f}, ppr={self.ppr}, sensibilidade={self.sensibilidade!r})'
+
+    def interpretar(self, linha: str):
+        """
+        Lê uma linha "#" de metadados e preenche o atributo correspondente.
+
+        Args:
+            linha (str): A linha, sem o "\\n"
+        """
+
+        for prefixo, (atributo, conversor) in Metadados.campos.items():
+            if not linha.startswith(prefixo):
+                continue
+
+            valor = linha[len(prefixo):].strip()
+            if atributo == 'data':
+                dia, _, hora = valor.partition('] [')
+                self.data = date.fromisoformat(dia.strip('[] '))
+                self.hora = time.fromisoformat(hora.strip('[] ')) if hora else None
+            elif valor == 'None':
+                setattr(self, atributo, None)
+            else:
+                setattr(self, atributo, conversor(valor))
+            return
+
+        chave, _, valor = linha.lstrip('# ').partition(':')
+        self.extras[chave.strip()] = valor.strip()
+
+    @classmethod
+    def de_dicionario(cls, dicionario: dict):
+        """Cria os metadados a partir do cabeçalho json do formato binário."""
+
+        metadados = cls()
+        for atributo in ('descricao', 'operador', 'comp_i', 'comp_f', 'tamanho_fenda', 'ppr', 'sensibilidade'):
+            setattr(metadados, atributo, dicionario.get(atributo))
+        if dicionario.get('colunas'):
+            metadados.colunas = tuple(dicionario['colunas'])
+        if dicionario.get('data'):
+            metadados.data = date.fromisoformat(dicionario['data'])
+        if dicionario.get('hora'):
+            metadados.hora = time.fromisoformat(dicionario['hora'])
+        return metadados
+
+
+class Espectro:
+    """Um espectro carregado: metadados, colunas de dados (arrays NumPy) e eventos."""
+
+    def __init__(self, caminho: str, metadados: Metadados, dados: np.ndarray, eventos: list):
+        """
+        Args:
+            caminho (str): O arquivo de origem
+            metadados (Metadados): Os metadados
+            dados (np.ndarray): Matriz (pontos x colunas). A coluna 0 é o comprimento de onda e a 1 a tensão. As outras estão em "colunas"
+            eventos (list): As linhas de eventos
+        """
+
+        self.caminho = caminho
+        self.metadados = metadados
+        self.dados = dados
+        self.eventos = eventos
+
+    def __len__(self):
+        return len(self.dados)
+
+    def __repr__(self):
+        return f'Espectro({Path(self.caminho).name!r}, {len(self)} pontos, {self.metadados!r})'
+
+    @property
+    def colunas(self):
+        """Os nomes das colunas. Arquivos sem a linha "# Colunas" (antigos) têm comprimento de onda, tensão e, se houver, o erro."""
+
+        if self.metadados.colunas:
+            return self.metadados.colunas
+        return ('comprimento_onda', 'tensao', 'erro')[:self.dados.shape[1]]
+
+    def coluna(self, nome: str):
+        """
+        Uma coluna de dados pelo nome.
+
+        Args:
+            nome (str): O nome da coluna (ex: "tensao", "sensibilidade")
+
+        Returns:
+            np.ndarray | None: A coluna, ou None se o arquivo não a tem
+        """
+
+        colunas = self.colunas
+        return self.dados[:, colunas.index(nome)] if nome in colunas else None
+
+    @property
+    def comprimento_onda(self):
+        return self.dados[:, 0]
+
+    @property
+    def tensao(self):
+        return self.dados[:, 1]
+
+    @property
+    def erro(self):
+        """Erro padrão da média de cada ponto (varreduras com várias passagens). None se o arquivo não tem essa coluna."""
+
+        return self.coluna('erro')
+
+    @property
+    def sensibilidade(self):
+        """O código da sensibilidade do Lock-in em cada ponto (troca automática de escala). None se o arquivo não tem essa coluna."""
+
+        return self.coluna('sensibilidade')
+
+    @property
+    def concluido(self):
+        """True se o registro de eventos tem a linha de conclusão do "pyce"."""
+
+        return any(evento.startswith('Conclusão') for evento in self.eventos)
+#endregion
+
+
+
+#region Leitura
+def carregar_espectro(caminho: str):
+    """
+    Carrega um espectro do "pyce" (.csv ou .bin) em uma única passada pelo arquivo.
+
+    Args:
+        caminho (str): O caminho do arquivo
+
+    Returns:
+        Espectro: O espectro carregado
+
+    Raises:
+        ValueError: Caso uma linha de dados no meio do arquivo não tenha o número certo de números. Só a última pode estar cortada (é descartada com um aviso)
+    """
+
+    if str(caminho).endswith('.bin'):
+        dicionario, colunas, eventos = abrir_binario(caminho)
+        dados = np.column_stack([np.asarray(coluna) for coluna in colunas.values()])
+        return Espectro(str(caminho), Metadados.de_dicionario(dicionario), dados, eventos)
+
+    metadados = Metadados()
+    linhas_dados = []
+    numeros = [] # O número (no arquivo) de cada linha de dados, para as mensagens de erro
+    ultima_completa = True # A última linha de dados terminou em "\n"
+    eventos = []
+    secao = 'metadados' # metadados --> dados --> eventos
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        for numero, linha in enumerate(arquivo, 1):
+            completa = linha.endswith('\n')
+            linha = linha.rstrip('\r\n')
+            if secao == 'metadados':
+                if linha.startswith(DIVISORIA):
+                    secao = 'dados'
+                elif linha.startswith('#'):
+                    metadados.interpretar(linha)
+            elif secao == 'dados':
+                if linha.startswith('#'):
+                    secao = 'eventos'
+                    if not linha.startswith(DIVISORIA):
+                        eventos.append(linha) # Arquivo sem a segunda divisória
+                elif linha:
+                    linhas_dados.append(linha)
+                    numeros.append(numero)
+                    ultima_completa = completa
+            elif linha:
+                eventos.append(linha)
+
+    if not linhas_dados:
+        return Espectro(str(caminho), metadados, np.empty((0, 2)), eventos)
+
+    n_colunas = len(metadados.colunas) if metadados.colunas else linhas_dados[0].count(',') + 1
+
+    # Linha cortada no fim (programa que caiu no meio da escrita): descartada, como em "Experimento.reabrir_arquivos()"
+    if not ultima_completa or not linha_valida(linhas_dados[-1], n_colunas):
+        log.warning(f'{caminho}, linha {numeros[-1]}: última linha de dados incompleta, descartada: {linhas_dados[-1]!r}')
+        linhas_dados.pop()
+        numeros.pop()
+
+    try:
+        dados = np.loadtxt(linhas_dados, delimiter=',', ndmin=2) if linhas_dados else np.empty((0, n_colunas)) # Um único parse em C para todas as linhas
+        if dados.shape[1] != n_colunas:
+            raise ValueError(f'{dados.shape[1]} colunas')
+    except ValueError as erro:
+        # Só no caminho do erro: procura a linha culpada para a mensagem
+        for numero, linha in zip(numeros, linhas_dados):
+            if not linha_valida(linha, n_colunas):
+                raise ValueError(f'{caminho}, linha {numero}: linha de dados inválida (esperados {n_colunas} números): {linha!r}') from erro
+        raise
+
+    return Espectro(str(caminho), metadados, dados, eventos)
+
+
+def linha_valida(linha: str, n_colunas: int):
+    """True se a linha de dados tem "n_colunas" números separados por vírgula."""
+
+    valores = linha.split(',')
+    if len(valores) != n_colunas:
+        return False
+    try:
+        for valor in valores:
+            float(valor)
+    except ValueError:
+        return False
+    return True
+
+
+def carregar_ou_erro(caminho: str):
+    """Versão de "carregar_espectro()" para os processos do "carregar_pasta()": devolve a exceção em vez de levantá-la."""
+
+    try:
+        return carregar_espectro(caminho)
+    except Exception as erro:
+        return erro
+
+
+def carregar_pasta(pasta: str='Gráficos', padroes: tuple=('*.csv', '*.bin'), processos: int=None):
+    """
+    Carrega todos os espectros de uma pasta em paralelo (um processo por núcleo). Arquivos auxiliares ("*_metricas.csv", "*_passagens.csv") e arquivos que não puderem ser lidos são pulados com um aviso.
+
+    Quando existem o .csv e o .bin do mesmo experimento, só o .bin (mais rápido) é carregado.
+
+    Args:
+        pasta (str, optional): A pasta com os espectros. Defaults to 'Gráficos'.
+        padroes (tuple, optional): Padrões de nome dos arquivos. Defaults to ('*.csv', '*.bin').
+        processos (int, optional): Número de processos. Defaults to None (um por núcleo).
+
+    Returns:
+        list: Os espectros (Espectro), na ordem dos nomes dos arquivos.
+    """
+
+    caminhos = {}
+    for padrao in padroes:
+        for caminho in Path(pasta).glob(padrao):
+            if caminho.stem.endswith(SUFIXOS_AUXILIARES):
+                continue
+            if caminho.stem not in caminhos or caminho.suffix == '.bin':
+                caminhos[caminho.stem] = caminho
+    caminhos = sorted(caminhos.values())
+
+    if not caminhos:
+        return []
+
+    processos = processos or os.cpu_count()
+    pedaco = max(1, len(caminhos) // (4 * processos)) # Poucos envios entre processos, mas com a carga bem dividida
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        resultados = list(executor.map(carregar_ou_erro, caminhos, chunksize=pedaco))
+
+    espectros = []
+    for caminho, resultado in zip(caminhos, resultados):
+        if isinstance(resultado, Exception):
+            log.warning(f'{caminho} não pôde ser carregado: {resultado}')
+        else:
+            espectros.append(resultado)
+    return espectros
+#endregion
+
+
+
+if __name__ == "__main__":
+    import sys
+    from time import perf_counter
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    pasta = sys.argv[1] if len(sys.argv) > 1 else 'Gráficos'
+    inicio = perf_counter()
+    espectros = carregar_pasta(pasta)
+    print(f'{len(espectros)} espectros carregados de "{pasta}" em {perf_counter() - inicio:.2f} s')
+    for espectro in espectros[:10]:
+        print(espectro)
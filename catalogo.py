@@ -0,0 +1,243 @@
+#region Observações
+# - Catálogo (SQLite) dos experimentos salvos na pasta "Gráficos". Substitui a busca linear por nomes livres ("nome.csv", "nome_1.csv"...) do antigo "nome_excludente".
+# - Cada experimento é registrado na criação do arquivo (operador, data, faixa de comprimento de onda, fenda, PPR, sensibilidade) e o resultado é atualizado ao final.
+# - Uso rápido: python catalogo.py --operador Fulano --cobrindo 1000 1100
+# - Para catalogar arquivos antigos: python catalogo.py --importar
+#endregion
+
+
+# ========== Imports ==========
+import sqlite3
+from pathlib import Path
+from contextlib import contextmanager
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS experimentos (
+    id INTEGER PRIMARY KEY,
+    nome TEXT UNIQUE NOT NULL,        -- Nome do arquivo, sem extensão
+    nome_base TEXT NOT NULL,          -- Nome escolhido pelo usuário
+    operador TEXT,
+    data TEXT,                        -- YYYY-MM-DD
+    hora TEXT,
+    descricao TEXT,
+    comp_i REAL,
+    comp_f REAL,
+    comp_min REAL,
+    comp_max REAL,
+    tamanho_fenda REAL,
+    ppr INTEGER,
+    sensibilidade TEXT,
+    resultado TEXT,                   -- em andamento / concluído / abortado / erro
+    pontos INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_operador ON experimentos (operador);
+CREATE INDEX IF NOT EXISTS idx_faixa ON experimentos (comp_min, comp_max);
+CREATE INDEX IF NOT EXISTS idx_data ON experimentos (data);
+
+CREATE TABLE IF NOT EXISTS contadores (
+    nome_base TEXT PRIMARY KEY,
+    proximo INTEGER NOT NULL          -- Próximo sufixo livre: 0 --> "nome", n --> "nome_n"
+);
+"""
+
+
+class Catalogo:
+    """
+    Índice persistente dos experimentos de uma pasta. Aloca nomes únicos em O(1) (um contador por nome base) e responde a consultas por operador, data, faixa de comprimento de onda e resultado.
+
+    Cada operação abre a sua própria conexão, então o catálogo pode ser usado de qualquer thread ou processo.
+    """
+
+    def __init__(self, pasta: str='Gráficos', arquivo: str='catalogo.sqlite3'):
+        """
+        Função construtora do catálogo. Cria a pasta e o banco, se preciso.
+
+        Args:
+            pasta (str, optional): A pasta dos espectros. Defaults to 'Gráficos'.
+            arquivo (str, optional): O nome do banco SQLite dentro da pasta. Defaults to 'catalogo.sqlite3'.
+        """
+
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(exist_ok=True)
+        self.caminho = self.pasta / arquivo
+
+        with self.conectar() as conexao:
+            conexao.executescript(ESQUEMA)
+
+    @contextmanager
+    def conectar(self):
+        """Abre uma conexão (em modo autocommit, transações explícitas) e a fecha ao sair do "with"."""
+
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    # ========== Registro ==========
+    def registrar(self, nome_base: str, metadados: dict):
+        """
+        Reserva um nome de arquivo único para "nome_base" e registra o experimento, na mesma transação.
+
+        O próximo sufixo livre de cada nome base fica guardado, então a reserva é só um incremento do contador. Arquivos que já existem na pasta (de antes do catálogo) são pulados.
+
+        Args:
+            nome_base (str): O nome escolhido pelo usuário
+            metadados (dict): Os campos do experimento (operador, data, hora, descricao, comp_i, comp_f, tamanho_fenda, ppr, sensibilidade)
+
+        Returns:
+            Path: O caminho do arquivo, sem extensão (pasta / nome)
+        """
+
+        nome_base = Path(nome_base).stem
+        comp_i, comp_f = metadados.get('comp_i'), metadados.get('comp_f')
+        faixa = (min(comp_i, comp_f), max(comp_i, comp_f)) if comp_i is not None and comp_f is not None else (None, None)
+
+        with self.conectar() as conexao:
+            conexao.execute('BEGIN IMMEDIATE') # Trava a escrita: dois experimentos nunca recebem o mesmo nome
+            try:
+                linha = conexao.execute('SELECT proximo FROM contadores WHERE nome_base = ?', (nome_base,)).fetchone()
+                contador = linha['proximo'] if linha else 0
+
+                while True:
+                    nome = nome_base if contador == 0 else f'{nome_base}_{contador}'
+                    contador += 1
+                    ocupado = conexao.execute('SELECT 1 FROM experimentos WHERE nome = ?', (nome,)).fetchone()
+                    if not ocupado and not (self.pasta / f'{nome}.csv').exists() and not (self.pasta / f'{nome}.bin').exists():
+                        break # Só itera de novo para arquivos de antes do catálogo ou copiados à mão
+
+                conexao.execute('INSERT OR REPLACE INTO contadores (nome_base, proximo) VALUES (?, ?)', (nome_base, contador))
+                conexao.execute(
+                    """INSERT INTO experimentos (nome, nome_base, operador, data, hora, descricao, comp_i, comp_f, comp_min, comp_max, tamanho_fenda, ppr, sensibilidade, resultado)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (nome, nome_base, metadados.get('operador'), metadados.get('data'), metadados.get('hora'), metadados.get('descricao'),
+                     comp_i, comp_f, *faixa, metadados.get('tamanho_fenda'), metadados.get('ppr'), metadados.get('sensibilidade'),
+                     metadados.get('resultado', 'em andamento'))
+                )
+                conexao.execute('COMMIT')
+            except BaseException:
+                conexao.execute('ROLLBACK')
+                raise
+
+        return self.pasta / nome
+
+    def atualizar_resultado(self, nome: str, resultado: str, pontos: int=None):
+        """
+        Registra como o experimento terminou.
+
+        Args:
+            nome (str): O nome (ou caminho) do arquivo, com ou sem extensão
+            resultado (str): "concluído", "abortado" ou "erro"
+            pontos (int, optional): Quantos pontos foram medidos. Defaults to None.
+        """
+
+        with self.conectar() as conexao:
+            conexao.execute('UPDATE experimentos SET resultado = ?, pontos = COALESCE(?, pontos) WHERE nome = ?', (resultado, pontos, Path(nome).stem))
+
+    # ========== Consulta ==========
+    def buscar(self, operador: str=None, cobrindo: tuple=None, data_inicio: str=None, data_fim: str=None, resultado: str=None, ppr: int=None):
+        """
+        Busca experimentos. Todos os filtros são opcionais e combinados com "E".
+
+        Args:
+            operador (str, optional): O operador. Defaults to None.
+            cobrindo (tuple, optional): (comp_a, comp_b) em Å. Só experimentos que varreram toda essa faixa. Defaults to None.
+            data_inicio (str, optional): Data mínima (YYYY-MM-DD). Defaults to None.
+            data_fim (str, optional): Data máxima (YYYY-MM-DD). Defaults to None.
+            resultado (str, optional): "concluído", "abortado", "erro" ou "em andamento". Defaults to None.
+            ppr (int, optional): Pontos por resolução. Defaults to None.
+
+        Returns:
+            list: As linhas (sqlite3.Row, acessíveis por nome de coluna), em ordem de data.
+        """
+
+        condicoes, parametros = [], []
+        if operador is not None:
+            condicoes.append('operador = ?')
+            parametros.append(operador)
+        if cobrindo is not None:
+            condicoes.append('comp_min <= ? AND comp_max >= ?')
+            parametros.extend((min(cobrindo), max(cobrindo)))
+        if data_inicio is not None:
+            condicoes.append('data >= ?')
+            parametros.append(str(data_inicio))
+        if data_fim is not None:
+            condicoes.append('data <= ?')
+            parametros.append(str(data_fim))
+        if resultado is not None:
+            condicoes.append('resultado = ?')
+            parametros.append(resultado)
+        if ppr is not None:
+            condicoes.append('ppr = ?')
+            parametros.append(ppr)
+
+        consulta = 'SELECT * FROM experimentos'
+        if condicoes:
+            consulta += ' WHERE ' + ' AND '.join(condicoes)
+        consulta += ' ORDER BY data, hora'
+
+        with self.conectar() as conexao:
+            return conexao.execute(consulta, parametros).fetchall()
+
+    def caminho_arquivo(self, linha, extensao: str='.csv'):
+        """Caminho do arquivo de um experimento retornado por "buscar()"."""
+
+        return self.pasta / f'{linha["nome"]}{extensao}'
+
+    # ========== Arquivos antigos ==========
+    def importar_pasta(self):
+        """
+        Cataloga os .csv da pasta que ainda não estão no catálogo (arquivos de antes do catálogo), lendo seus metadados com o "carregador".
+
+        Returns:
+            int: Quantos experimentos foram importados
+        """
+
+        from carregador import carregar_pasta
+
+        with self.conectar() as conexao:
+            conhecidos = {linha['nome'] for linha in conexao.execute('SELECT nome FROM experimentos')}
+
+        importados = 0
+        for espectro in carregar_pasta(self.pasta, padroes=('*.csv',)):
+            nome = Path(espectro.caminho).stem
+            if nome in conhecidos:
+                continue
+
+            m = espectro.metadados
+            faixa = (min(m.comp_i, m.comp_f), max(m.comp_i, m.comp_f)) if m.comp_i is not None and m.comp_f is not None else (None, None)
+            with self.conectar() as conexao:
+                conexao.execute(
+                    """INSERT OR IGNORE INTO experimentos (nome, nome_base, operador, data, hora, descricao, comp_i, comp_f, comp_min, comp_max, tamanho_fenda, ppr, sensibilidade, resultado, pontos)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (nome, nome.rsplit('_', 1)[0] if nome.rsplit('_', 1)[-1].isdigit() else nome, m.operador,
+                     str(m.data) if m.data else None, str(m.hora) if m.hora else None, m.descricao,
+                     m.comp_i, m.comp_f, *faixa, m.tamanho_fenda, m.ppr, m.sensibilidade,
+                     'concluído' if espectro.concluido else 'abortado', len(espectro))
+                )
+            importados += 1
+        return importados
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Consulta o catálogo de experimentos.')
+    parser.add_argument('--pasta', default='Gráficos')
+    parser.add_argument('--importar', action='store_true', help='Cataloga os arquivos antigos da pasta')
+    parser.add_argument('--operador')
+    parser.add_argument('--cobrindo', nargs=2, type=float, metavar=('COMP_A', 'COMP_B'), help='Faixa (Å) que precisa ter sido varrida')
+    parser.add_argument('--desde', help='Data mínima (YYYY-MM-DD)')
+    parser.add_argument('--ate', help='Data máxima (YYYY-MM-DD)')
+    parser.add_argument('--resultado')
+    args = parser.parse_args()
+
+    catalogo = Catalogo(args.pasta)
+    if args.importar:
+        print(f'{catalogo.importar_pasta()} experimentos importados.')
+
+    for linha in catalogo.buscar(args.operador, args.cobrindo, args.desde, args.ate, args.resultado):
+        print(f'{linha["nome"]:<30} {linha["operador"] or "":<15} {linha["data"]} {linha["comp_min"]}-{linha["comp_max"]} Å  PPR {linha["ppr"]}  {linha["sensibilidade"]}  {linha["resultado"]}')
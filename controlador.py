@@ -0,0 +1,364 @@
+#region Observações
+# - Roda vários monocromadores (cada um com o seu Lock-in e o seu Arduino) ao mesmo tempo, na mesma máquina: um processo por bancada.
+# - O processo principal só acompanha: recebe o andamento de cada bancada por uma fila e mostra uma tabela com todas. Cada bancada pode ser abortada sozinha.
+# - Os processos das bancadas rodam sem gráfico ao vivo (nem importam o pyplot): os .jpg finais continuam sendo salvos. As mensagens de cada bancada vão para "<nome>.log".
+# - Uso rápido: python controlador.py bancadas.json  (Ctrl+C aborta todas as bancadas)
+# - Exemplo de bancadas.json:
+#     [{"nome": "A", "experimento": {"nome_arquivo": "amostra_A", "operador": "Fulano", "comp_i": 1000, "comp_f": 1100, "tamanho_fenda": 100, "ppr": 3},
+#       "conexao_lock_in": {"porta": "COM10", "baudrate": 9600}, "conexao_arduino": {"porta": "COM13", "baudrate": 9600, "timeout": null}},
+#      {"nome": "B", ..., "modo": "adaptativo", "argumentos": {"fator_grosso": 4}, "atributos": {"folga": 12}}]
+#endregion
+
+
+# ========== Imports ==========
+import os
+import sys
+import json
+import queue
+import logging
+import signal
+import threading
+import multiprocessing
+from time import perf_counter
+
+from pyce import MODOS
+
+log = logging.getLogger('pyce.controlador')
+
+
+#region Bancada
+class Bancada:
+    """A configuração de uma bancada: os parâmetros do experimento, as portas e o tipo de varredura."""
+
+    def __init__(self, nome: str, experimento: dict, conexao_lock_in: dict, conexao_arduino: dict, modo: str='run', argumentos: dict=None, atributos: dict=None, log: str=None):
+        """
+        Função construtora da bancada.
+
+        Args:
+            nome (str): Um nome curto, único entre as bancadas
+            experimento (dict): Os argumentos do "Experimento" (nome_arquivo, operador, comp_i, comp_f, tamanho_fenda, ppr, descricao)
+            conexao_lock_in (dict): A conexão do Lock-in (porta, baudrate)
+            conexao_arduino (dict): A conexão do Arduino (porta, baudrate, timeout)
+            modo (str, optional): "run", "adaptativo", "passagens" ou "async" (ver "pyce.MODOS"). Defaults to 'run'.
+            argumentos (dict, optional): Argumentos do método da varredura. Ex: {"fator_grosso": 4}. Defaults to None.
+            atributos (dict, optional): Atributos do "Experimento" definidos antes de conectar. Ex: {"folga": 12}. Defaults to None.
+            log (str, optional): Arquivo das mensagens da bancada. Defaults to None ("<nome>.log").
+
+        Raises:
+            ValueError: Caso o modo não exista
+        """
+
+        if modo not in MODOS:
+            raise ValueError(f'Modo desconhecido: {modo!r}. Use um de {list(MODOS)}')
+
+        self.nome = nome
+        self.experimento = experimento
+        self.conexao_lock_in = conexao_lock_in
+        self.conexao_arduino = conexao_arduino
+        self.modo = modo
+        self.argumentos = argumentos or {}
+        self.atributos = atributos or {}
+        self.log = log or f'{nome}.log'
+
+    @classmethod
+    def de_dicionario(cls, dicionario: dict):
+        """Cria a bancada a partir de um item do arquivo json (ver "Observações")."""
+
+        return cls(**dicionario)
+
+
+class EstadoBancada:
+    """O último andamento conhecido de uma bancada, montado pelo controlador a partir das mensagens do processo."""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.estado = 'parada' # parada --> conectando --> medindo --> concluído / abortado / erro
+        self.arquivo = None
+        self.pontos = 0
+        self.total = None
+        self.comprimento_onda = None
+        self.tensao = None
+        self.ciclo_medio = None # s
+        self.erro = None
+
+    @property
+    def terminou(self):
+        return self.estado in ('concluído', 'abortado', 'erro')
+
+    @property
+    def tempo_restante(self):
+        """Estimativa (em s) pelo tempo médio de ciclo. None antes do primeiro ponto."""
+
+        if self.ciclo_medio is None or self.total is None:
+            return None
+        return max(self.total - self.pontos, 0) * self.ciclo_medio
+
+    def linha(self):
+        """Uma linha da tabela de andamento."""
+
+        progresso = f'{self.pontos}/{self.total}' if self.total else f'{self.pontos}'
+        ponto = f'{self.comprimento_onda}Å: {self.tensao}' if self.comprimento_onda is not None else ''
+        restante = self.tempo_restante
+        restante = f"{int(restante // 60)}' {int(restante % 60)}''" if restante is not None and not self.terminou else ''
+        texto = f'{self.nome:<10} {self.estado:<11} {progresso:>9}  {ponto:<24} {restante:>9}'
+        if self.erro:
+            texto += f'  {self.erro}'
+        return texto
+#endregion
+
+
+
+#region Processo da bancada
+def rodar_bancada(bancada: Bancada, fila_estado, evento_abortar):
+    """
+    Roda um experimento inteiro em um processo próprio: conecta, varre e desconecta, mandando o andamento para "fila_estado" como (nome, evento, dados).
+
+    Args:
+        bancada (Bancada): A configuração da bancada
+        fila_estado (multiprocessing.Queue): A fila do controlador
+        evento_abortar (multiprocessing.Event): Pedido de parada desta bancada
+    """
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # O Ctrl+C é tratado pelo controlador, que aborta cada bancada
+
+    os.environ['MPLBACKEND'] = 'Agg' # Se os atributos pedirem o gráfico ao vivo, ele é desenhado sem janela
+    import asyncio
+    import warnings
+    import pyce
+    warnings.filterwarnings('ignore', message='.*non-interactive.*') # "plt.show()" com o Agg
+
+    def avisar(evento, dados):
+        fila_estado.put((bancada.nome, evento, dados))
+
+    registro = logging.getLogger('pyce')
+    registro.setLevel(logging.INFO)
+    arquivo_log = logging.FileHandler(bancada.log, encoding='utf-8')
+    arquivo_log.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    registro.addHandler(arquivo_log)
+    try:
+        avisar('estado', {'estado': 'conectando'})
+        experimento = pyce.Experimento(**bancada.experimento)
+        experimento.grafico_ao_vivo = False
+        for atributo, valor in bancada.atributos.items():
+            setattr(experimento, atributo, valor)
+        experimento.inscrever(avisar)
+        experimento.conectar(bancada.conexao_lock_in, bancada.conexao_arduino)
+
+        # O pedido de parada chega por outro processo: uma thread o repassa ao experimento
+        threading.Thread(target=lambda: evento_abortar.wait() and experimento.abortar(), daemon=True).start()
+        if evento_abortar.is_set():
+            experimento.desconectar()
+            avisar('fim', {'resultado': 'abortado', 'pontos': 0})
+            return
+
+        avisar('estado', {'estado': 'medindo'})
+        varredura = getattr(experimento, MODOS[bancada.modo])
+        if bancada.modo == 'async':
+            try:
+                asyncio.run(varredura(**bancada.argumentos))
+            except asyncio.CancelledError:
+                pass # Abortada: o experimento já registrou e fechou tudo
+        else:
+            varredura(**bancada.argumentos)
+
+    except BaseException as erro:
+        avisar('erro', {'erro': repr(erro)})
+
+    finally:
+        registro.removeHandler(arquivo_log)
+        arquivo_log.close()
+#endregion
+
+
+
+#region Controlador
+class Controlador:
+    """
+    Roda várias bancadas em paralelo, um processo para cada, e reúne o andamento de todas.
+
+    Os processos são sempre criados com "spawn" (o padrão do Windows): o processo de cada bancada começa limpo, sem herdar janelas ou portas abertas.
+    """
+
+    def __init__(self, bancadas: list):
+        """
+        Função construtora do controlador.
+
+        Args:
+            bancadas (list): As bancadas (Bancada)
+
+        Raises:
+            ValueError: Caso duas bancadas tenham o mesmo nome ou usem a mesma porta
+        """
+
+        nomes = [bancada.nome for bancada in bancadas]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError('Os nomes das bancadas precisam ser únicos')
+        portas = [conexao['porta'] for bancada in bancadas for conexao in (bancada.conexao_lock_in, bancada.conexao_arduino)]
+        if len(set(portas)) != len(portas):
+            raise ValueError('Cada porta Serial só pode pertencer a uma bancada')
+
+        self.contexto = multiprocessing.get_context('spawn')
+        self.bancadas = {bancada.nome: bancada for bancada in bancadas}
+        self.estados = {nome: EstadoBancada(nome) for nome in self.bancadas}
+        self.fila_estado = self.contexto.Queue()
+        self.eventos_abortar = {nome: self.contexto.Event() for nome in self.bancadas}
+        self.processos = {}
+        self.observadores = [] # Funções avisadas de cada mensagem das bancadas (ver "inscrever()")
+
+    def inscrever(self, observador):
+        """
+        Registra uma função chamada a cada mensagem de uma bancada, como "observador(estado, evento, dados)".
+
+        Args:
+            observador (Callable): A função. Recebe o EstadoBancada já atualizado
+        """
+
+        self.observadores.append(observador)
+
+    # ========== Processos ==========
+    def iniciar(self):
+        """Cria e inicia o processo de cada bancada."""
+
+        for nome, bancada in self.bancadas.items():
+            processo = self.contexto.Process(target=rodar_bancada, args=(bancada, self.fila_estado, self.eventos_abortar[nome]), name=f'bancada-{nome}')
+            processo.start()
+            self.processos[nome] = processo
+            log.info(f'Controlador: Bancada {nome} iniciada (processo {processo.pid}, mensagens em "{bancada.log}")')
+
+    def abortar(self, nome: str=None):
+        """
+        Pede a parada de uma bancada (ou de todas). As outras continuam.
+
+        Args:
+            nome (str, optional): A bancada. Defaults to None (todas).
+        """
+
+        for bancada in ([nome] if nome is not None else self.bancadas):
+            if not self.estados[bancada].terminou:
+                log.info(f'Controlador: Abortando a bancada {bancada}...')
+            self.eventos_abortar[bancada].set()
+
+    def rodando(self):
+        """True enquanto algum processo de bancada estiver vivo."""
+
+        return any(processo.is_alive() for processo in self.processos.values())
+
+    # ========== Andamento ==========
+    def atualizar(self, timeout: float=0.0):
+        """
+        Lê todas as mensagens que já chegaram das bancadas e atualiza os estados.
+
+        Args:
+            timeout (float, optional): Tempo máximo (em s) esperando a primeira mensagem. Defaults to 0.0.
+
+        Returns:
+            int: Quantas mensagens foram lidas
+        """
+
+        lidas = 0
+        try:
+            mensagem = self.fila_estado.get(timeout=timeout) if timeout else self.fila_estado.get_nowait()
+            while True:
+                self.receber(*mensagem)
+                lidas += 1
+                mensagem = self.fila_estado.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Processo que morreu sem avisar (falha do interpretador, "kill"...)
+        for nome, processo in self.processos.items():
+            estado = self.estados[nome]
+            if not processo.is_alive() and not estado.terminou and processo.exitcode not in (None, 0):
+                self.receber(nome, 'erro', {'erro': f'processo terminou com código {processo.exitcode}'})
+        return lidas
+
+    def receber(self, nome: str, evento: str, dados: dict):
+        """Aplica uma mensagem de uma bancada ao seu estado e avisa os observadores."""
+
+        estado = self.estados[nome]
+        if evento == 'estado':
+            estado.estado = dados['estado']
+        elif evento == 'inicio':
+            estado.arquivo = dados['nome']
+            estado.total = dados['pontos']
+        elif evento == 'ponto':
+            estado.pontos = dados['pontos']
+            estado.comprimento_onda = dados['comprimento_onda']
+            estado.tensao = dados['tensao']
+            estado.ciclo_medio = dados['ciclo_medio']
+        elif evento == 'fim':
+            estado.estado = dados['resultado']
+            estado.pontos = dados['pontos']
+        elif evento == 'erro':
+            estado.estado = 'erro'
+            estado.erro = dados['erro']
+
+        for observador in self.observadores:
+            observador(estado, evento, dados)
+
+    def tabela(self):
+        """
+        O andamento de todas as bancadas, uma linha cada.
+
+        Returns:
+            str: A tabela
+        """
+
+        cabecalho = f'{"Bancada":<10} {"Estado":<11} {"Pontos":>9}  {"Último ponto":<24} {"Restante":>9}'
+        return '\n'.join([cabecalho, '-' * len(cabecalho)] + [estado.linha() for estado in self.estados.values()])
+
+    def aguardar(self, intervalo: float=2.0, mostrar: bool=True):
+        """
+        Acompanha as bancadas até todas terminarem. Um Ctrl+C aborta todas (e continua esperando elas fecharem os arquivos).
+
+        Args:
+            intervalo (float, optional): Tempo (em s) entre duas tabelas de andamento. Defaults to 2.0.
+            mostrar (bool, optional): Imprime a tabela de andamento. Defaults to True.
+
+        Returns:
+            dict: nome --> EstadoBancada, ao final
+        """
+
+        ultima = perf_counter()
+        while True:
+            try:
+                self.atualizar(timeout=0.2)
+                if mostrar and perf_counter() - ultima >= intervalo:
+                    print(self.tabela(), '\n')
+                    ultima = perf_counter()
+                if not self.rodando():
+                    break
+            except KeyboardInterrupt:
+                log.warning('AVISO: Ctrl+C. Abortando todas as bancadas...')
+                self.abortar()
+
+        for processo in self.processos.values():
+            processo.join()
+        self.atualizar()
+        if mostrar:
+            print(self.tabela())
+        return self.estados
+
+    def executar(self, intervalo: float=2.0, mostrar: bool=True):
+        """Inicia todas as bancadas e espera elas terminarem (ver "aguardar()")."""
+
+        self.iniciar()
+        return self.aguardar(intervalo, mostrar)
+#endregion
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Roda várias bancadas (monocromador + Lock-in) ao mesmo tempo.')
+    parser.add_argument('configuracao', help='Arquivo json com a lista de bancadas (ver "Observações" em controlador.py)')
+    parser.add_argument('--intervalo', type=float, default=2.0, help='Tempo (s) entre duas tabelas de andamento')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    with open(args.configuracao, encoding='utf-8') as arquivo:
+        bancadas = [Bancada.de_dicionario(item) for item in json.load(arquivo)]
+
+    estados = Controlador(bancadas).executar(args.intervalo)
+    sys.exit(0 if all(estado.estado == 'concluído' for estado in estados.values()) else 1)
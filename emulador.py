@@ -0,0 +1,535 @@
+#region Observações
+# - Emula, em nível de porta Serial, o Lock-in SR510 e o Arduino do monocromador. Diferente das classes "Mock" do "GUI.py", o "pyce" conversa com o emulador pelo pySerial, exatamente como faria com o equipamento real.
+# - Cada equipamento ganha um pseudo-terminal (pty). A porta que deve ser passada para o "pyce" fica em "emulador.porta" (ex: /dev/pts/3).
+# - Só funciona em Linux/macOS (módulo "pty").
+# - Uso rápido: python emulador.py --atraso-step 0.002
+#endregion
+
+
+# ========== Imports ==========
+import os
+import pty
+import tty
+import math
+import random
+import select
+import threading
+from time import sleep
+
+
+#region Modelo de tempo
+class ModeloTempo:
+    """
+    Reúne os parâmetros de tempo e de falhas usados pelos emuladores. Um mesmo modelo pode ser compartilhado pelos dois equipamentos.
+    """
+
+    def __init__(self, baudrate: int=9600, bits_por_caractere: int=10, latencia: float=0.0, atraso_step: float=0.0, prob_lixo: float=0.0, semente: int=None):
+        """
+        Função construtora do modelo de tempo.
+
+        Args:
+            baudrate (int, optional): A taxa de comunicação Serial, usada para limitar a velocidade de transferência. Defaults to 9600.
+            bits_por_caractere (int, optional): Bits por byte transmitido (start + dados + paridade + stop). 10 para 8N1, 11 para 8N2. Defaults to 10.
+            latencia (float, optional): Tempo (em s) entre o fim de um comando e o início da resposta. Defaults to 0.0.
+            atraso_step (float, optional): Tempo (em s) que o motor leva em cada step. No firmware real é 2*tempo3 ms. Defaults to 0.0.
+            prob_lixo (float, optional): Probabilidade (0 a 1) de uma resposta vir corrompida por bytes aleatórios. Defaults to 0.0.
+            semente (int, optional): Semente do gerador aleatório, para resultados reprodutíveis. Defaults to None.
+        """
+
+        self.baudrate = baudrate
+        self.bits_por_caractere = bits_por_caractere
+        self.latencia = latencia
+        self.atraso_step = atraso_step
+        self.prob_lixo = prob_lixo
+        self.aleatorio = random.Random(semente)
+
+    def tempo_transmissao(self, n_bytes: int):
+        """
+        Calcula o tempo que "n_bytes" levam para atravessar a linha Serial.
+
+        Args:
+            n_bytes (int): O número de bytes
+
+        Returns:
+            float: O tempo em s
+        """
+
+        if not self.baudrate:
+            return 0.0
+        return n_bytes * self.bits_por_caractere / self.baudrate
+
+    def corromper(self, dados: bytes):
+        """
+        Com probabilidade "prob_lixo", troca parte da resposta por bytes aleatórios (o terminador é preservado).
+
+        Args:
+            dados (bytes): A resposta original
+
+        Returns:
+            bytes: A resposta, possivelmente corrompida
+        """
+
+        if self.prob_lixo <= 0 or self.aleatorio.random() >= self.prob_lixo:
+            return dados
+
+        corpo = dados.rstrip(b'\r\n')
+        terminador = dados[len(corpo):]
+        lixo = bytes(self.aleatorio.randrange(33, 127) for _ in range(max(1, len(corpo))))
+        return lixo + terminador
+#endregion
+
+
+
+#region Base
+class EmuladorSerial:
+    """
+    Base dos emuladores. Cria o pseudo-terminal, roda uma thread que lê os bytes enviados pelo computador e entrega para "receber()", e oferece "enviar()" para responder respeitando o modelo de tempo.
+
+    As classes filhas implementam o protocolo de cada equipamento.
+    """
+
+    nome = 'Equipamento'
+
+    def __init__(self, modelo: ModeloTempo=None):
+        """
+        Função construtora. Cria o pseudo-terminal, mas não começa a emular.
+
+        Args:
+            modelo (ModeloTempo, optional): O modelo de tempo e falhas. Defaults to None (sem atrasos).
+        """
+
+        self.modelo = modelo or ModeloTempo()
+
+        self.mestre, escravo = pty.openpty()
+        tty.setraw(escravo)
+        self.porta = os.ttyname(escravo) # A porta que o pySerial deve abrir
+        os.close(escravo) # Sem nenhum lado escravo aberto o mestre fica em "hang up" até o programa abrir a porta
+
+        self.conectado = False
+        self.evento_parar = threading.Event()
+        self.thread = None
+
+    # ========== Ciclo de vida ==========
+    def iniciar(self):
+        """Começa a emular em uma thread separada (daemon)."""
+
+        self.thread = threading.Thread(target=self.loop, name=f'Emulador {self.nome}', daemon=True)
+        self.thread.start()
+        return self
+
+    def parar(self):
+        """Para a thread de emulação e fecha o pseudo-terminal."""
+
+        self.evento_parar.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        os.close(self.mestre)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.parar()
+
+    def loop(self):
+        """Loop da thread: detecta quando a porta é aberta/fechada e entrega os bytes recebidos ao protocolo."""
+
+        sondagem = select.poll()
+        sondagem.register(self.mestre, select.POLLIN)
+
+        while not self.evento_parar.is_set():
+            eventos = sondagem.poll(50) # ms
+            if not eventos:
+                # Sem "hang up": alguém abriu a porta, mesmo que ainda não tenha enviado nada
+                if not self.conectado:
+                    self.conectado = True
+                    self.ao_conectar()
+                continue
+
+            _, evento = eventos[0]
+            if evento & select.POLLHUP and not evento & select.POLLIN:
+                # Ninguém com a porta aberta
+                if self.conectado:
+                    self.conectado = False
+                    self.ao_desconectar()
+                sleep(0.01)
+                continue
+
+            if not self.conectado:
+                self.conectado = True
+                self.ao_conectar()
+
+            try:
+                dados = os.read(self.mestre, 1024)
+            except OSError:
+                continue
+
+            sleep(self.modelo.tempo_transmissao(len(dados))) # Os bytes chegam na velocidade da linha
+            self.receber(dados)
+
+    # ========== Comunicação ==========
+    def enviar(self, dados: bytes, espera_caractere: float=0.0):
+        """
+        Envia uma resposta para o computador respeitando a latência, a taxa de transmissão e a injeção de lixo do modelo.
+
+        Args:
+            dados (bytes): A resposta, já com o terminador
+            espera_caractere (float, optional): Espera extra (em s) entre cada caractere. Defaults to 0.0.
+        """
+
+        dados = self.modelo.corromper(dados)
+        sleep(self.modelo.latencia)
+
+        try:
+            if espera_caractere:
+                for i in range(len(dados)):
+                    sleep(self.modelo.tempo_transmissao(1) + espera_caractere)
+                    os.write(self.mestre, dados[i:i+1])
+            else:
+                sleep(self.modelo.tempo_transmissao(len(dados)))
+                os.write(self.mestre, dados)
+        except OSError:
+            pass # A porta foi fechada no meio da resposta
+
+    # ========== Protocolo (filhas) ==========
+    def ao_conectar(self):
+        """Chamada quando o programa abre a porta."""
+
+    def ao_desconectar(self):
+        """Chamada quando o programa fecha a porta."""
+
+    def receber(self, dados: bytes):
+        """
+        Trata os bytes recebidos do computador.
+
+        Args:
+            dados (bytes): Os bytes, na ordem em que chegaram
+        """
+
+        raise NotImplementedError
+#endregion
+
+
+
+#region Arduino
+def duracao_trapezio(steps: int, vmax: float, acel: float):
+    """
+    Duração de um movimento com o perfil trapezoidal do firmware ("andarPerfil()"): a velocidade do step n é min(vmax, sqrt(2·acel·(n+1)), sqrt(2·acel·(steps-n))).
+
+    Args:
+        steps (int): O número de steps (positivo)
+        vmax (float): A velocidade máxima (steps/s)
+        acel (float): A aceleração (steps/s²)
+
+    Returns:
+        float: A duração em s
+    """
+
+    duracao = 0.0
+    for n in range(steps):
+        duracao += 1 / min(vmax, math.sqrt(2 * acel * (n + 1)), math.sqrt(2 * acel * (steps - n)))
+    return duracao
+
+
+class EmuladorArduino(EmuladorSerial):
+    """
+    Emula o sketch "Monocromador_c_digo.ino" no modo de medida.
+
+    - Ao abrir a porta o Arduino "reinicia" e imprime "PRONTO" depois de "atraso_reset".
+    - Um inteiro em ASCII é lido como no "Serial.parseInt()": caracteres que não são dígitos antes do número são ignorados e o número termina no primeiro não dígito ou após 1 s sem novos caracteres.
+    - O motor anda um step por vez (modelo.atraso_step) e, ao final, o número é devolvido com "Serial.println()". Números negativos andam para trás.
+    - Com "folga", os primeiros steps depois de uma inversão de sentido não movem a grade (folga mecânica da engrenagem).
+    - Plano de varredura: "P<steps>,<pontos>\\n" guarda o plano e responde "PLANO <steps>,<pontos>". Cada ">" anda um ponto do plano e responde só o byte "A" ("E" se o plano acabou).
+    - Perfil trapezoidal: "V<vmax>,<acel>\\n" (steps/s, steps/s²) responde "PERFIL <vmax>,<acel>" e passa a valer para todos os movimentos ("V0,0" volta ao "modelo.atraso_step").
+    """
+
+    nome = 'Arduino'
+
+    def __init__(self, modelo: ModeloTempo=None, atraso_reset: float=0.05, timeout_parse: float=1.0, folga: int=0):
+        """
+        Função construtora do emulador do Arduino.
+
+        Args:
+            modelo (ModeloTempo, optional): O modelo de tempo e falhas. Defaults to None.
+            atraso_reset (float, optional): Tempo (em s) entre a abertura da porta e o "PRONTO". Um Arduino real leva ~1.6 s. Defaults to 0.05.
+            timeout_parse (float, optional): O timeout do "Serial.parseInt()". Defaults to 1.0.
+            folga (int, optional): Steps perdidos a cada inversão de sentido. Defaults to 0.
+        """
+
+        super().__init__(modelo)
+        self.atraso_reset = atraso_reset
+        self.timeout_parse = timeout_parse
+        self.folga = folga
+
+        self.posicao = 0 # Posição da grade em steps (acumulada desde a criação)
+        self.sentido = 1 # Sentido do último movimento: 1 (frente) / -1 (trás)
+        self.perfil = (0, 0) # (vmax, acel) do perfil trapezoidal. 0 --> sem perfil
+        self.folga_restante = 0 # Steps que ainda não movem a grade depois da última inversão
+        self.numero = '' # Dígitos do parseInt() em andamento
+        self.comando = None # Comando de texto ("P" ou "V") em andamento...
+        self.texto = '' # ...e o que já chegou dele
+        self.plano_steps = 0
+        self.plano_restante = 0
+        self.timer_parse = None
+        self.trava = threading.Lock() # O firmware faz uma coisa de cada vez
+
+    def ao_conectar(self):
+        self.numero = ''
+        self.comando = None
+        self.plano_restante = 0 # O reset apaga o plano e o perfil
+        self.perfil = (0, 0)
+        sleep(self.atraso_reset)
+        self.enviar(b'PRONTO\r\n')
+
+    def receber(self, dados: bytes):
+        with self.trava:
+            if self.timer_parse:
+                self.timer_parse.cancel()
+                self.timer_parse = None
+
+            for caractere in dados.decode('ascii', errors='ignore'):
+                if self.comando:
+                    if caractere in '\r\n':
+                        self.executar_comando()
+                    else:
+                        self.texto += caractere
+                elif caractere.isdigit() or (caractere == '-' and not self.numero):
+                    self.numero += caractere
+                else:
+                    if self.numero:
+                        self.executar()
+                    if caractere in 'PV':
+                        self.comando, self.texto = caractere, ''
+                    elif caractere == '>':
+                        self.avancar()
+
+            if self.numero:
+                # parseInt() ainda esperando: termina sozinho depois do timeout
+                self.timer_parse = threading.Timer(self.timeout_parse, self.fim_timeout_parse)
+                self.timer_parse.daemon = True
+                self.timer_parse.start()
+
+    def fim_timeout_parse(self):
+        with self.trava:
+            if self.numero:
+                self.executar()
+
+    def executar(self):
+        """Move o motor com o número recebido e confirma, como em "medir()"."""
+
+        numero, self.numero = self.numero, ''
+        try:
+            steps = int(numero)
+        except ValueError:
+            steps = 0
+
+        self.andar(steps)
+        self.enviar(f'{steps}\r\n'.encode('ascii'))
+
+    def executar_comando(self):
+        """Executa um comando de texto ("P<steps>,<pontos>" ou "V<vmax>,<acel>") e confirma."""
+
+        comando, self.comando = self.comando, None
+        a, _, b = self.texto.partition(',')
+        try:
+            valores = (int(a), int(b))
+        except ValueError:
+            valores = (0, 0)
+
+        if comando == 'P':
+            self.plano_steps, self.plano_restante = valores
+            self.enviar(f'PLANO {valores[0]},{valores[1]}\r\n'.encode('ascii'))
+        else:
+            self.perfil = valores
+            self.enviar(f'PERFIL {valores[0]},{valores[1]}\r\n'.encode('ascii'))
+
+    def avancar(self):
+        """Anda um ponto do plano e responde com um único byte."""
+
+        if self.plano_restante <= 0:
+            self.enviar(b'E')
+            return
+        self.andar(self.plano_steps)
+        self.plano_restante -= 1
+        self.enviar(b'A')
+
+    def andar(self, steps: int):
+        """Move o motor (um step por vez), com a folga mecânica."""
+
+        if steps:
+            vmax, acel = self.perfil
+            sleep(duracao_trapezio(abs(steps), vmax, acel) if vmax > 0 and acel > 0 else abs(steps) * self.modelo.atraso_step)
+            sentido = 1 if steps > 0 else -1
+            if sentido != self.sentido:
+                self.folga_restante = self.folga
+                self.sentido = sentido
+            perdidos = min(self.folga_restante, abs(steps))
+            self.folga_restante -= perdidos
+            self.posicao += steps - sentido * perdidos
+#endregion
+
+
+
+#region SR510
+def espectro_padrao(posicao: int):
+    """
+    Um espectro sintético (linhas gaussianas sobre uma linha de base) em função da posição do motor, em V.
+
+    Args:
+        posicao (int): A posição do motor em steps
+
+    Returns:
+        float: A tensão de saída
+    """
+
+    linhas = ((300, 25, 2e-3), (700, 10, 5e-3), (1100, 40, 1e-3)) # (centro, largura, altura)
+    sinal = 1e-4
+    for centro, largura, altura in linhas:
+        sinal += altura * math.exp(-0.5 * ((posicao - centro) / largura) ** 2)
+    return sinal
+
+
+class EmuladorSR510(EmuladorSerial):
+    """
+    Emula a interface RS232 do Lock-in SR510 para os comandos usados pelo "pyce".
+
+    - Comandos terminados em "\\r" (ou "\\n"). Respostas terminadas em "\\r".
+    - Q: valor de saída (V). G / G n: lê / define a sensibilidade (1 a 24). W / W n: lê / define a espera entre caracteres (n * 4 ms). Y: byte de estado (bit 4: sobrecarga).
+    - Vários comandos podem chegar em uma única escrita: as respostas saem na mesma ordem.
+    - A saída satura em 1.2x o fundo de escala da sensibilidade atual.
+    """
+
+    nome = 'SR510'
+
+    fundos_escala = [m * 10.0**e for e in range(-8, 0) for m in (1, 2, 5)] # 10 nV ... 500 mV, códigos 1 a 24
+
+    def __init__(self, modelo: ModeloTempo=None, sinal=None, arduino: EmuladorArduino=None, ruido: float=0.0):
+        """
+        Função construtora do emulador do SR510.
+
+        Args:
+            modelo (ModeloTempo, optional): O modelo de tempo e falhas. Use bits_por_caractere=11 para os 2 stop bits do SR510. Defaults to None.
+            sinal (Callable, optional): Função posição do motor (steps) --> tensão (V). Defaults to None ("espectro_padrao").
+            arduino (EmuladorArduino, optional): O Arduino emulado de onde vem a posição do motor. Defaults to None (posição 0).
+            ruido (float, optional): Desvio padrão (em V) de um ruído gaussiano somado ao sinal. Defaults to 0.0.
+        """
+
+        super().__init__(modelo)
+        self.sinal = sinal or espectro_padrao
+        self.arduino = arduino
+        self.ruido = ruido
+
+        self.sensibilidade = 18 # 5 mV
+        self.tempo_espera = 6 # O SR510 sempre liga em 6
+        self.sobrecarga = False
+        self.comando = b''
+
+    def receber(self, dados: bytes):
+        self.comando += dados
+        while True:
+            posicoes = [p for p in (self.comando.find(b'\r'), self.comando.find(b'\n')) if p >= 0]
+            if not posicoes:
+                break
+            fim = min(posicoes)
+            comando, self.comando = self.comando[:fim], self.comando[fim+1:]
+            if comando.strip():
+                self.executar(comando.decode('ascii', errors='ignore').strip())
+
+    def valor_saida(self):
+        """Calcula a tensão de saída na posição atual do motor, com ruído e saturação."""
+
+        posicao = self.arduino.posicao if self.arduino else 0
+        valor = self.sinal(posicao)
+        if self.ruido:
+            valor += self.modelo.aleatorio.gauss(0, self.ruido)
+
+        limite = 1.2 * self.fundos_escala[self.sensibilidade - 1]
+        self.sobrecarga = abs(valor) > self.fundos_escala[self.sensibilidade - 1]
+        return max(-limite, min(limite, valor))
+
+    def executar(self, comando: str):
+        """
+        Interpreta um comando (sem o terminador) e responde quando for uma leitura.
+
+        Args:
+            comando (str): O comando, ex: "Q", "G", "G12", "W 1"
+        """
+
+        letra, parametro = comando[0].upper(), comando[1:].strip()
+
+        if parametro:
+            try:
+                valor = int(parametro)
+            except ValueError:
+                return # Parâmetro inválido é ignorado
+            if letra == 'G' and 1 <= valor <= 24:
+                self.sensibilidade = valor
+            elif letra == 'W' and 0 <= valor <= 255:
+                self.tempo_espera = valor
+            return
+
+        if letra == 'Q':
+            resposta = f'{self.valor_saida():.4E}'
+        elif letra == 'G':
+            resposta = str(self.sensibilidade)
+        elif letra == 'W':
+            resposta = str(self.tempo_espera)
+        elif letra == 'Y':
+            self.valor_saida() # Atualiza a sobrecarga na posição atual
+            resposta = str(16 if self.sobrecarga else 0)
+        else:
+            return # Comando desconhecido
+
+        self.enviar(f'{resposta}\r'.encode('ascii'), espera_caractere=self.tempo_espera * 4e-3)
+#endregion
+
+
+
+def emular_bancada(modelo_sr510: ModeloTempo=None, modelo_arduino: ModeloTempo=None, **kwargs_arduino):
+    """
+    Cria e inicia um SR510 e um Arduino emulados, com o sinal do Lock-in acoplado à posição do motor.
+
+    Args:
+        modelo_sr510 (ModeloTempo, optional): O modelo de tempo do Lock-in. Defaults to None (9600 baud, 8N2).
+        modelo_arduino (ModeloTempo, optional): O modelo de tempo do Arduino. Defaults to None (9600 baud, 8N1).
+
+    Returns:
+        tuple: (EmuladorSR510, EmuladorArduino), já rodando.
+    """
+
+    arduino = EmuladorArduino(modelo_arduino or ModeloTempo(), **kwargs_arduino).iniciar()
+    sr510 = EmuladorSR510(modelo_sr510 or ModeloTempo(bits_por_caractere=11), arduino=arduino).iniciar()
+
+    return sr510, arduino
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Emula o SR510 e o Arduino do monocromador em pseudo-terminais.')
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--latencia', type=float, default=0.0, help='Latência das respostas (s)')
+    parser.add_argument('--atraso-step', type=float, default=0.0, help='Tempo por step do motor (s)')
+    parser.add_argument('--prob-lixo', type=float, default=0.0, help='Probabilidade de uma resposta corrompida')
+    parser.add_argument('--atraso-reset', type=float, default=0.05, help='Tempo até o "PRONTO" do Arduino (s)')
+    parser.add_argument('--folga', type=int, default=0, help='Steps perdidos a cada inversão de sentido do motor')
+    parser.add_argument('--semente', type=int, default=None)
+    args = parser.parse_args()
+
+    sr510, arduino = emular_bancada(
+        ModeloTempo(args.baudrate, 11, args.latencia, 0.0, args.prob_lixo, args.semente),
+        ModeloTempo(args.baudrate, 10, args.latencia, args.atraso_step, args.prob_lixo, args.semente),
+        atraso_reset=args.atraso_reset,
+        folga=args.folga
+    )
+    print(f'Lock-in SR510 emulado na porta: {sr510.porta}')
+    print(f'Arduino emulado na porta: {arduino.porta}')
+    print('Ctrl+C para encerrar.')
+
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        sr510.parar()
+        arduino.parar()
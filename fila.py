@@ -0,0 +1,158 @@
+#region Observações
+# - Fila de varreduras para um único monocromador: conecta uma vez, roda as varreduras em sequência e só desconecta no final.
+# - Entre duas varreduras a grade vai direto para o "comp_i" da próxima (chegando pela frente, ver "Experimento.ir_para()"), sem voltar ao início nem reconectar.
+# - Cada varredura grava os seus próprios arquivos (nome único pelo catálogo). Uma varredura abortada ou com erro encerra a fila.
+# - Uso rápido: python fila.py fila.json
+# - Exemplo de fila.json:
+#     {"conexao_lock_in": {"porta": "COM10", "baudrate": 9600}, "conexao_arduino": {"porta": "COM13", "baudrate": 9600, "timeout": null},
+#      "padrao": {"operador": "Fulano", "tamanho_fenda": 100, "ppr": 3}, "atributos": {"folga": 12},
+#      "varreduras": [{"nome_arquivo": "faixa_1", "comp_i": 1000, "comp_f": 1100},
+#                     {"nome_arquivo": "faixa_2", "comp_i": 1100, "comp_f": 1300, "modo": "adaptativo", "argumentos": {"fator_grosso": 4}}]}
+#endregion
+
+
+# ========== Imports ==========
+import asyncio
+import logging
+from time import perf_counter
+
+from pyce import Experimento, MODOS
+
+
+log = logging.getLogger('pyce.fila')
+
+
+class FilaExperimentos:
+    """
+    Uma fila de varreduras que compartilham as mesmas conexões com o Lock-in e o Arduino.
+
+    Cada varredura é um "Experimento" novo (arquivos, buffer e métricas próprios), mas só o primeiro conecta: os outros herdam as conexões do anterior (ver "Experimento.herdar_conexao()").
+    """
+
+    def __init__(self, conexao_lock_in: dict, conexao_arduino: dict, padrao: dict=None, atributos: dict=None, voltar_ao_final: bool=False):
+        """
+        Função construtora da fila.
+
+        Args:
+            conexao_lock_in (dict): A conexão do Lock-in (porta, baudrate)
+            conexao_arduino (dict): A conexão do Arduino (porta, baudrate, timeout)
+            padrao (dict, optional): Argumentos do "Experimento" comuns a todas as varreduras (operador, tamanho_fenda, ppr, descricao). Defaults to None.
+            atributos (dict, optional): Atributos do "Experimento" comuns a todas as varreduras. Ex: {"folga": 12}. Defaults to None.
+            voltar_ao_final (bool, optional): Leva a grade de volta ao "comp_i" da primeira varredura ao final da fila. Defaults to False.
+        """
+
+        self.conexao_lock_in = conexao_lock_in
+        self.conexao_arduino = conexao_arduino
+        self.padrao = padrao or {}
+        self.atributos = atributos or {}
+        self.voltar_ao_final = voltar_ao_final
+        self.varreduras = []
+        self.resultados = [] # (nome do arquivo, resultado) de cada varredura já rodada
+
+    def adicionar(self, nome_arquivo: str, comp_i: float, comp_f: float, modo: str='run', argumentos: dict=None, atributos: dict=None, **parametros):
+        """
+        Acrescenta uma varredura ao final da fila.
+
+        Args:
+            nome_arquivo (str): O nome dos arquivos desta varredura
+            comp_i (float): Comprimento de onda inicial (em Å)
+            comp_f (float): Comprimento de onda final (em Å)
+            modo (str, optional): "run", "adaptativo", "passagens" ou "async" (ver "pyce.MODOS"). Defaults to 'run'.
+            argumentos (dict, optional): Argumentos do método da varredura. Ex: {"fator_grosso": 4}. Defaults to None.
+            atributos (dict, optional): Atributos do "Experimento" só desta varredura. Defaults to None.
+            **parametros: Outros argumentos do "Experimento" (substituem os do "padrao")
+
+        Raises:
+            ValueError: Caso o modo não exista
+        """
+
+        if modo not in MODOS:
+            raise ValueError(f'Modo desconhecido: {modo!r}. Use um de {list(MODOS)}')
+
+        self.varreduras.append({
+            'parametros': dict(self.padrao, nome_arquivo=nome_arquivo, comp_i=comp_i, comp_f=comp_f, **parametros),
+            'modo': modo,
+            'argumentos': argumentos or {},
+            'atributos': dict(self.atributos, **(atributos or {})),
+        })
+
+    def criar_experimento(self, varredura: dict):
+        """Cria o "Experimento" de uma varredura, já com os atributos. As conexões ficam abertas e o gráfico final não bloqueia a fila."""
+
+        experimento = Experimento(**varredura['parametros'])
+        for atributo, valor in varredura['atributos'].items():
+            setattr(experimento, atributo, valor)
+        experimento.manter_conexao = True
+        experimento.mostrar_janela = False
+        experimento.voltar_ao_final = False # A grade vai direto para a próxima varredura
+        return experimento
+
+    def executar(self):
+        """
+        Roda todas as varreduras da fila, em ordem. As conexões são fechadas ao final, mesmo se uma varredura falhar.
+
+        Returns:
+            list: (nome do arquivo, resultado) de cada varredura rodada
+        """
+
+        anterior = None
+        primeiro = None
+        inicio = perf_counter()
+        try:
+            for i, varredura in enumerate(self.varreduras):
+                experimento = self.criar_experimento(varredura)
+                if anterior is None:
+                    try:
+                        experimento.conectar(self.conexao_lock_in, self.conexao_arduino)
+                    except BaseException:
+                        experimento.desconectar() # Ainda não há "anterior" para o "finally": fecha o que chegou a abrir
+                        raise
+                    primeiro = experimento.comp_i
+                else:
+                    anterior.ir_para(experimento.comp_i) # Reposiciona a grade, sem voltar ao início
+                    experimento.herdar_conexao(anterior)
+                anterior = experimento
+
+                log.info(f'Fila: Varredura {i+1}/{len(self.varreduras)} ({experimento.comp_i}Å --> {experimento.comp_f}Å)...')
+                metodo = getattr(experimento, MODOS[varredura['modo']])
+                if varredura['modo'] == 'async':
+                    asyncio.run(metodo(**varredura['argumentos']))
+                else:
+                    metodo(**varredura['argumentos'])
+
+                self.resultados.append((str(experimento.nome_exclusivo), experimento.resultado))
+                if experimento.resultado != 'concluído':
+                    log.info(f'Fila: Varredura {i+1} terminou como "{experimento.resultado}". Encerrando a fila.')
+                    break
+
+        finally:
+            if anterior is not None:
+                if self.voltar_ao_final and anterior.resultado != 'erro':
+                    anterior.ir_para(primeiro)
+                anterior.desconectar()
+            log.info(f'Fila: {len(self.resultados)}/{len(self.varreduras)} varreduras em {round(perf_counter() - inicio, 1)} s')
+
+        return self.resultados
+
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    with open(sys.argv[1], encoding='utf-8') as arquivo:
+        configuracao = json.load(arquivo)
+
+    fila = FilaExperimentos(
+        configuracao['conexao_lock_in'],
+        configuracao['conexao_arduino'],
+        configuracao.get('padrao'),
+        configuracao.get('atributos'),
+        configuracao.get('voltar_ao_final', False)
+    )
+    for varredura in configuracao['varreduras']:
+        fila.adicionar(**varredura)
+
+    for nome, resultado in fila.executar():
+        print(f'{nome}: {resultado}')
@@ -0,0 +1,205 @@
+#region Observações
+# - Formato binário colunar dos espectros, escrito ao lado do .csv. Pode ser aberto com "numpy.memmap", sem nenhum parse de texto.
+# - Layout do arquivo (little-endian):
+#     [cabeçalho: TAMANHO_CABECALHO bytes]
+#         assinatura (8 bytes) | tamanho do cabeçalho (u32) | versão (u32) | pontos preenchidos (u64) | capacidade (u64)
+#         início dos eventos (u64, 0 se não houver) | tamanho do json (u32) | json com os metadados | zeros
+#     [coluna 0: capacidade x float64] [coluna 1: capacidade x float64] ...
+#     [eventos: json, escrito ao final]
+# - Os pontos são escritos no lugar (mmap) durante a varredura e o número de pontos preenchidos é atualizado a cada ponto.
+#endregion
+
+
+# ========== Imports ==========
+import os
+import json
+import mmap
+import struct
+import numpy as np
+
+
+ASSINATURA = b'PYCEBIN1'
+VERSAO = 1
+TAMANHO_CABECALHO = 4096 # Múltiplo do tamanho de página: as colunas ficam alinhadas para o memmap
+FORMATO_FIXO = '<8sIIQQQI' # assinatura, tamanho do cabeçalho, versão, pontos, capacidade, início dos eventos, tamanho do json
+OFFSET_PONTOS = struct.calcsize('<8sII')
+OFFSET_EVENTOS = struct.calcsize('<8sIIQQ')
+
+
+#region Escrita
+class EscritorBinario:
+    """
+    Escritor do formato binário colunar. Tem a mesma interface do "pyce.EscritorCSV" (cabeçalho, linhas, eventos, descarregar e fechar), então o "Experimento" usa os dois da mesma forma.
+
+    O arquivo é criado com espaço para "capacidade" pontos e cada ponto é gravado direto na sua posição, por mmap.
+    """
+
+    def __init__(self, caminho: str, capacidade: int, colunas: tuple=('comprimento_onda', 'tensao'), pontos_por_flush: int=10, intervalo_flush: float=5.0, fsync_ao_abortar: bool=True):
+        """
+        Função construtora do escritor. O arquivo só é criado em "escrever_cabecalho()".
+
+        Args:
+            caminho (str): O caminho do arquivo
+            capacidade (int): O número de pontos previstos (cresce se for preciso)
+            colunas (tuple, optional): O nome de cada coluna. Defaults to ('comprimento_onda', 'tensao').
+            pontos_por_flush (int, optional): Mantido pela compatibilidade com o "EscritorCSV". O mmap já deixa cada ponto visível para outros processos. Defaults to 10.
+            intervalo_flush (float, optional): Mantido pela compatibilidade com o "EscritorCSV". Defaults to 5.0.
+            fsync_ao_abortar (bool, optional): Força a escrita física caso o experimento seja abortado. Defaults to True.
+        """
+
+        self.caminho = caminho
+        self.capacidade = max(int(capacidade), 1)
+        self.colunas = tuple(colunas)
+        self.fsync_ao_abortar = fsync_ao_abortar
+
+        self.arquivo = None
+        self.mapa = None
+        self.dados = None # Vista (colunas x capacidade) sobre o mmap
+        self.n = 0
+        self.metadados = None
+
+    # ========== Arquivo ==========
+    def escrever_cabecalho(self, metadados: dict):
+        """
+        Cria o arquivo com o cabeçalho e o espaço das colunas já reservado.
+
+        Args:
+            metadados (dict): Os metadados do experimento (precisam ser serializáveis em json)
+        """
+
+        self.metadados = dict(metadados, colunas=list(self.colunas))
+        self.arquivo = open(self.caminho, 'w+b')
+        self.mapear()
+        self.descarregar(fsync=True)
+
+    def mapear(self):
+        """(Re)escreve o cabeçalho, ajusta o tamanho do arquivo à capacidade e abre o mmap."""
+
+        texto = json.dumps(self.metadados, ensure_ascii=False).encode('utf-8')
+        tamanho_cabecalho = TAMANHO_CABECALHO * -(-(struct.calcsize(FORMATO_FIXO) + len(texto)) // TAMANHO_CABECALHO)
+        fixo = struct.pack(FORMATO_FIXO, ASSINATURA, tamanho_cabecalho, VERSAO, self.n, self.capacidade, 0, len(texto))
+
+        self.tamanho_cabecalho = tamanho_cabecalho
+        self.arquivo.seek(0)
+        self.arquivo.write(fixo + texto)
+        self.arquivo.truncate(tamanho_cabecalho + 8 * len(self.colunas) * self.capacidade)
+        self.arquivo.flush()
+
+        self.mapa = mmap.mmap(self.arquivo.fileno(), 0)
+        self.dados = np.frombuffer(self.mapa, dtype='<f8', offset=tamanho_cabecalho, count=len(self.colunas) * self.capacidade).reshape(len(self.colunas), self.capacidade)
+
+    def desmapear(self):
+        self.dados = None # A vista precisa morrer antes do mmap ser fechado
+        self.mapa.flush()
+        self.mapa.close()
+        self.mapa = None
+
+    def reservar(self, capacidade: int):
+        """
+        Aumenta a capacidade do arquivo, movendo as colunas para as novas posições.
+
+        Args:
+            capacidade (int): A nova capacidade
+        """
+
+        if capacidade <= self.capacidade:
+            return
+
+        preenchidos = self.dados[:, :self.n].copy()
+        self.desmapear()
+        self.capacidade = capacidade
+        self.mapear()
+        self.dados[:, :self.n] = preenchidos
+
+    # ========== Escrita ==========
+    def escrever_linha(self, dados):
+        """
+        Grava um ponto (um valor por coluna) no próximo índice livre.
+
+        Args:
+            dados (Sequence): Os valores, na ordem das colunas
+        """
+
+        if self.n == self.capacidade:
+            self.reservar(2 * self.capacidade)
+
+        self.dados[:, self.n] = dados
+        self.n += 1
+        struct.pack_into('<Q', self.mapa, OFFSET_PONTOS, self.n) # Só conta o ponto depois de gravado
+
+    def escrever_eventos(self, eventos: list):
+        """
+        Grava os eventos (json) depois das colunas e registra sua posição no cabeçalho.
+
+        Args:
+            eventos (list): As linhas de eventos
+        """
+
+        inicio = self.tamanho_cabecalho + 8 * len(self.colunas) * self.capacidade
+        self.arquivo.seek(inicio)
+        self.arquivo.write(json.dumps(eventos, ensure_ascii=False).encode('utf-8'))
+        self.arquivo.truncate()
+        self.arquivo.flush()
+        struct.pack_into('<Q', self.mapa, OFFSET_EVENTOS, inicio)
+
+    def descarregar(self, fsync: bool=False):
+        """
+        Os pontos já estão no cache do sistema operacional (mmap). Com "fsync", força a escrita física.
+
+        Args:
+            fsync (bool, optional): Sincroniza o mmap e o arquivo com o disco. Defaults to False.
+        """
+
+        if fsync:
+            self.mapa.flush()
+            os.fsync(self.arquivo.fileno())
+
+    def fechar(self, abortado: bool=False):
+        """
+        Sincroniza e fecha o arquivo. Pode ser chamada mais de uma vez.
+
+        Args:
+            abortado (bool, optional): Indica que o experimento foi interrompido. Defaults to False.
+        """
+
+        if self.arquivo is None or self.arquivo.closed:
+            return
+
+        if abortado and self.fsync_ao_abortar:
+            self.descarregar(fsync=True)
+        self.desmapear()
+        self.arquivo.close()
+#endregion
+
+
+
+#region Leitura
+def abrir_binario(caminho: str):
+    """
+    Abre um arquivo no formato binário sem copiar os dados: as colunas são "numpy.memmap" somente leitura.
+
+    Args:
+        caminho (str): O caminho do arquivo
+
+    Returns:
+        tuple: (metadados (dict), colunas (dict nome --> array), eventos (list))
+    """
+
+    with open(caminho, 'rb') as arquivo:
+        fixo = arquivo.read(struct.calcsize(FORMATO_FIXO))
+        assinatura, tamanho_cabecalho, versao, n, capacidade, inicio_eventos, tamanho_json = struct.unpack(FORMATO_FIXO, fixo)
+        if assinatura != ASSINATURA:
+            raise ValueError(f'{caminho} não é um arquivo binário do pyce')
+        metadados = json.loads(arquivo.read(tamanho_json).decode('utf-8'))
+
+        eventos = []
+        if inicio_eventos:
+            arquivo.seek(inicio_eventos)
+            eventos = json.loads(arquivo.read().decode('utf-8'))
+
+    nomes = metadados['colunas']
+    dados = np.memmap(caminho, dtype='<f8', mode='r', offset=tamanho_cabecalho, shape=(len(nomes), capacidade))
+    colunas = {nome: dados[i, :n] for i, nome in enumerate(nomes)}
+
+    return metadados, colunas, eventos
+#endregion
@@ -1,17 +1,38 @@
 #region Observações
 # - A função de coleta de dados tem que ser chamda junto com a de criar um .csv.
 # - É necessário dar um nome ao arquivo. Caso contrário a função de nomes diferentes não funcionará corretamente.
+# - As mensagens passam pelo logging (logger "pyce"): os detalhes de cada ponto (comandos, respostas e movimentos do motor) ficam no nível DEBUG.
+# - O Matplotlib só é importado quando algum gráfico é pedido (ver "pyplot()"). Pela linha de comando a varredura roda sem gráfico: python pyce.py --help
+# - O "run()" grava "<nome>_checkpoint.json" a cada flush do .csv e ao parar. Uma varredura interrompida continua de onde parou, no mesmo arquivo: python pyce.py --retomar Gráficos/NOME_checkpoint.json --porta-lock-in ... --porta-arduino ...
 #endregion
 
 
 # ========== Imports ==========
+import os
+import csv
+import json
 import serial
-import matplotlib.pyplot as plt
+import asyncio
+import logging
+import numpy as np
 from time import sleep, perf_counter
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from formato_binario import EscritorBinario
+from catalogo import Catalogo
 # Alt + 0197 --> Å
 
 
+log = logging.getLogger('pyce') # Mensagens de todo o programa. Quem usa o "pyce" escolhe onde mostrá-las (terminal, GUI, arquivo...)
+
+
+def pyplot():
+    """O "matplotlib.pyplot", importado só na primeira vez em que um gráfico é usado. Uma varredura sem gráfico não paga o import nem precisa de tela."""
+
+    import matplotlib.pyplot
+    return matplotlib.pyplot
+
+
 #region Monocromador
 class Monocromador:
     """
@@ -32,20 +53,51 @@ class Monocromador:
         self.porta = porta
         self.baudrate = baudrate
         self.timeout = timeout
+        self.conexao = None
+        self.plano_steps = 0
+        self.plano_restante = 0 # Pontos do plano de varredura ainda não percorridos (ver "carregar_plano()")
+        self.perfil = None # PerfilMovimento carregado no Arduino (ver "definir_perfil()")
 
     # ========== Conexão ==========
-    def conectar(self):
-        """Cria e abre a conexão entre o Arduino e o computador (Python)."""
+    def conectar(self, tempo_limite: float=10.0, espera_sonda: float=2.0):
+        """
+        Cria e abre a conexão entre o Arduino e o computador (Python). Só retorna quando o Arduino está pronto para receber comandos.
+
+        Ao abrir a porta o Arduino reinicia e, ao final do "setup()", imprime "PRONTO". Caso essa linha não chegue em "espera_sonda" segundos (placa sem auto-reset, firmware antigo...) o programa envia uma sonda de 0 steps e espera o eco "0".
+
+        Args:
+            tempo_limite (float, optional): Tempo máximo (em s) esperando o Arduino ficar pronto. Defaults to 10.0.
+            espera_sonda (float, optional): Tempo (em s) esperando o "PRONTO" antes de começar a enviar sondas. Defaults to 2.0.
+
+        Raises:
+            TimeoutError: Caso o Arduino não responda dentro do tempo limite.
+        """
 
         self.conexao = serial.Serial(
             port=self.porta,
             baudrate=self.baudrate,
-            timeout=self.timeout
+            timeout=0.1 # Só durante o aperto de mão. Depois volta para "self.timeout"
          )
-        sleep(0.5)
-        print(f'Arduino: Conectando na porta {self.porta}...')
-        sleep(2.5) # Tempo para garanti que a conxão foi aberta
-        print(f'-- Arduino conectado na porta {self.porta}. Canal Serial aberto --')
+        log.info(f'Arduino: Conectando na porta {self.porta}...')
+
+        inicio = perf_counter()
+        ultima_sonda = None
+        while perf_counter() - inicio < tempo_limite:
+            agora = perf_counter()
+            if agora - inicio >= espera_sonda and (ultima_sonda is None or agora - ultima_sonda >= 1.0):
+                self.escrever(0, terminador='\n') # Sonda: 0 steps, o Arduino só devolve "0"
+                ultima_sonda = agora
+
+            saida = self.ler_Serial()
+            if saida == 'PRONTO' or (ultima_sonda is not None and saida == '0'):
+                break
+        else:
+            self.conexao.close()
+            raise TimeoutError(f'O Arduino não respondeu na porta {self.porta} em {tempo_limite} s')
+
+        self.conexao.reset_input_buffer() # Descarta ecos de sondas atrasadas
+        self.conexao.timeout = self.timeout
+        log.info(f'-- Arduino conectado na porta {self.porta} em {round(perf_counter() - inicio, 2)} s. Canal Serial aberto --')
 
     def desconectar(self):
         """Fecha a comunicação entre o Arduino e o computador (Python)."""
@@ -70,21 +122,39 @@ class Monocromador:
     
 
     # ========== Escrita ==========
-    def escrever(self, mensagem):
+    def escrever(self, mensagem, terminador: str=''):
         """
         Envia uma mensagem via comunicação Serial para o Arduino. Escreve na porta Serial
 
         Args:
             mensagem (None): A mensagem que será enviada para o Arduino
+            terminador (str, optional): Caractere enviado após a mensagem. Um "\\n" encerra o "Serial.parseInt()" do Arduino na hora, sem esperar o timeout de 1 s. Defaults to ''.
         """
 
-        print(f'PC: Enviando [{mensagem}]...')
-        mensagem = str(mensagem)
+        log.debug(f'PC: Enviando [{mensagem}]...')
+        mensagem = str(mensagem) + terminador
         mensagem_b = mensagem.encode('ascii')
         self.conexao.write(mensagem_b)
 
 
     # ========== Métodos (explícitos) ==========
+    def iniciar_movimento(self, steps: int):
+        """
+        Escreve na porta Serial do Arduino o número de steps que será dado pelo motor e retorna sem esperar o fim da movimentação.
+
+        A confirmação do Arduino fica guardada no buffer da porta Serial até ser lida pelo "aguardar()" do objeto retornado.
+
+        Args:
+            steps (int): O número de steps que o motor vai andar.
+
+        Returns:
+            MovimentoMotor: O movimento em andamento, usado para aguardar a confirmação do Arduino.
+        """
+
+        self.escrever(steps, terminador='\n')
+
+        return MovimentoMotor(self, steps)
+
     def mover_motor(self, steps: int):
         """
         Escreve na porta Serial do Arduino o número de steps que será dado pelo motor. Após isso, aguarda o retorno do arduino para confirmar o final da movimentação. Impime esse retorno no terminal.
@@ -93,13 +163,242 @@ class Monocromador:
             passos (int): O número de steps que o motor vai andar.
         """
 
-        self.escrever(steps)
-        saida = self.ler_Serial()
-        print(f'Arduino: Resposta [{saida}];')
+        self.iniciar_movimento(steps).aguardar()
+
+    def definir_perfil(self, perfil):
+        """
+        Envia ao Arduino o perfil trapezoidal de velocidade ("V<vmax>,<acel>"), usado em todos os movimentos seguintes. Um perfil com vmax 0 volta à velocidade do potenciômetro.
+
+        Args:
+            perfil (PerfilMovimento): O perfil
+
+        Raises:
+            RuntimeError: Caso o Arduino não confirme o perfil (firmware sem suporte a perfis)
+        """
+
+        vmax, acel = int(perfil.vmax), int(perfil.acel)
+        self.escrever(f'V{vmax},{acel}', terminador='\n')
+        resposta = self.ler_Serial()
+        if resposta != f'PERFIL {vmax},{acel}':
+            raise RuntimeError(f'O Arduino não confirmou o perfil de movimento (resposta: {resposta!r})')
+
+        log.info(f'Arduino: Perfil carregado [{vmax} steps/s, {acel} steps/s²];')
+        self.perfil = perfil if vmax > 0 and acel > 0 else None
+
+    def carregar_plano(self, steps: int, n_pontos: int):
+        """
+        Envia ao Arduino o plano da varredura inteira ("P<steps>,<pontos>"). Depois disso cada ponto é só um byte de ida (">", ver "avancar()") e um de volta ("A"), sem "parseInt()" nem eco do número.
+
+        Args:
+            steps (int): Os steps de cada ponto
+            n_pontos (int): Quantos pontos o plano tem
+
+        Raises:
+            RuntimeError: Caso o Arduino não confirme o plano (firmware sem suporte a planos)
+        """
+
+        self.escrever(f'P{steps},{n_pontos}', terminador='\n')
+        resposta = self.ler_Serial()
+        if resposta != f'PLANO {steps},{n_pontos}':
+            raise RuntimeError(f'O Arduino não confirmou o plano de varredura (resposta: {resposta!r})')
+
+        log.info(f'Arduino: Plano carregado [{n_pontos} pontos de {steps} steps];')
+        self.plano_steps = steps
+        self.plano_restante = n_pontos
+
+    def avancar(self):
+        """
+        Anda um ponto do plano carregado, sem esperar o fim da movimentação.
+
+        Returns:
+            AvancoPlano: O movimento em andamento, usado para aguardar o byte de chegada.
+
+        Raises:
+            RuntimeError: Caso o plano já tenha terminado
+        """
+
+        if self.plano_restante <= 0:
+            raise RuntimeError('Nenhum ponto restante no plano de varredura')
+
+        self.conexao.write(b'>')
+        self.plano_restante -= 1
+
+        return AvancoPlano(self)
+
+    def prazo_resposta(self, steps: int):
+        """
+        O tempo de espera pela confirmação de um movimento: o timeout da porta, aumentado quando o perfil prevê um movimento mais longo que ele.
+
+        Args:
+            steps (int): Os steps do movimento
+
+        Returns:
+            float | None: O timeout a usar (None --> espera indefinida)
+        """
+
+        if self.timeout is None or self.perfil is None:
+            return self.timeout
+        return max(self.timeout, 1.5 * self.perfil.duracao(steps) + 0.5)
+
+
+class PerfilMovimento:
+    """
+    Perfil trapezoidal de velocidade do motor: acelera até "vmax", anda em velocidade constante e freia. É o mesmo modelo do "andarPerfil()" do firmware, então também prevê a duração dos movimentos (ETA, timeouts).
+
+    A velocidade do step n (de N) é min(vmax, sqrt(2·acel·(n+1)), sqrt(2·acel·(N-n))).
+    """
+
+    def __init__(self, vmax: float, acel: float):
+        """
+        Função construtora do perfil.
+
+        Args:
+            vmax (float): Velocidade máxima (steps/s)
+            acel (float): Aceleração (steps/s²)
+        """
+
+        self.vmax = vmax
+        self.acel = acel
+        self.duracoes = {} # steps --> s. Os movimentos de uma varredura se repetem
+
+    def __repr__(self):
+        return f'PerfilMovimento(vmax={self.vmax}, acel={self.acel})'
+
+    def velocidades(self, steps: int):
+        """
+        A velocidade de cada step de um movimento.
+
+        Args:
+            steps (int): O número de steps (o sinal é ignorado)
+
+        Returns:
+            np.ndarray: As velocidades (steps/s)
+        """
+
+        steps = abs(int(steps))
+        n = np.arange(steps)
+        return np.minimum(self.vmax, np.sqrt(2 * self.acel * np.minimum(n + 1, steps - n)))
+
+    def duracao(self, steps: int):
+        """
+        A duração prevista de um movimento.
+
+        Args:
+            steps (int): O número de steps (o sinal é ignorado)
+
+        Returns:
+            float: A duração em s
+        """
+
+        steps = abs(int(steps))
+        if steps not in self.duracoes:
+            self.duracoes[steps] = float(np.sum(1 / self.velocidades(steps))) if steps else 0.0
+        return self.duracoes[steps]
+
+
+class MovimentoMotor:
+    """
+    Um movimento enviado ao Arduino cuja confirmação ainda não foi lida. Criado por "Monocromador.iniciar_movimento()".
+
+    Permite que o programa faça outras coisas (salvar, plotar...) enquanto a grade se move e só bloqueie quando a confirmação for realmente necessária.
+    """
+
+    def __init__(self, monocromador: Monocromador, steps: int):
+        """
+        Função construtora do movimento.
+
+        Args:
+            monocromador (Monocromador): O monocromador que recebeu o comando
+            steps (int): O número de steps enviado
+        """
+
+        self.monocromador = monocromador
+        self.steps = steps
+        self.resposta = None
+
+    def aguardar(self):
+        """
+        Bloqueia até o Arduino confirmar o final da movimentação. Imprime a resposta no terminal. Pode ser chamada mais de uma vez.
+
+        Returns:
+            str: A resposta do Arduino.
+        """
+
+        if self.resposta is None:
+            self.monocromador.conexao.timeout = self.monocromador.prazo_resposta(self.steps) # Movimentos longos não estouram o timeout
+            try:
+                self.resposta = self.monocromador.ler_Serial()
+            finally:
+                self.monocromador.conexao.timeout = self.monocromador.timeout
+            log.debug(f'Arduino: Resposta [{self.resposta}];')
+
+        return self.resposta
+
+
+class AvancoPlano(MovimentoMotor):
+    """Um ponto do plano de varredura em andamento. Criado por "Monocromador.avancar()". A confirmação é um único byte."""
+
+    def __init__(self, monocromador: Monocromador):
+        super().__init__(monocromador, monocromador.plano_steps)
+
+    def aguardar(self):
+        """
+        Bloqueia até o byte de chegada do Arduino. Pode ser chamada mais de uma vez.
+
+        Returns:
+            str: "A"
+
+        Raises:
+            TimeoutError: Caso o byte não chegue dentro do timeout da porta
+            RuntimeError: Caso o Arduino responda outra coisa (plano terminado, firmware antigo...)
+        """
+
+        if self.resposta is None:
+            self.monocromador.conexao.timeout = self.monocromador.prazo_resposta(self.steps)
+            try:
+                byte = self.monocromador.conexao.read(1)
+            finally:
+                self.monocromador.conexao.timeout = self.monocromador.timeout
+            if not byte:
+                raise TimeoutError('O Arduino não confirmou a chegada ao ponto do plano')
+            self.resposta = byte.decode('ascii', errors='replace')
+            if self.resposta != 'A':
+                raise RuntimeError(f'Resposta inesperada ao avançar no plano: {self.resposta!r}')
+
+        return self.resposta
 
 
 
 #region SR510
+TABELA_SENSIBILIDADE = { # Código do Lock-in --> (Sensibilidade str, código, valor float (V), ordem de grandeza)
+    1: ('10 nV', 1, 10e-9, pow(10, -9)),
+    2: ('20 nV', 2, 20e-9, pow(10, -9)),
+    3: ('50 nV', 3, 50e-9, pow(10, -9)),
+    4: ('100 nV', 4, 100e-9, pow(10, -9)),
+    5: ('200 nV', 5, 200e-9, pow(10, -9)),
+    6: ('500 nV', 6, 500e-9, pow(10, -9)),
+    7: ('1 µV', 7, 1e-6, pow(10, -6)),
+    8: ('2 µV', 8, 2e-6, pow(10, -6)),
+    9: ('5 µV', 9, 5e-6, pow(10, -6)),
+    10: ('10 µV', 10, 10e-6, pow(10, -6)),
+    11: ('20 µV', 11, 20e-6, pow(10, -6)),
+    12: ('50 µV', 12, 50e-6, pow(10, -6)),
+    13: ('100 µV', 13, 100e-6, pow(10, -6)),
+    14: ('200 µV', 14, 200e-6, pow(10, -6)),
+    15: ('500 µV', 15, 500e-6, pow(10, -6)),
+    16: ('1 mV', 16, 1e-3, pow(10, -3)),
+    17: ('2 mV', 17, 2e-3, pow(10, -3)),
+    18: ('5 mV', 18, 5e-3, pow(10, -3)),
+    19: ('10 mV', 19, 10e-3, pow(10, -3)),
+    20: ('20 mV', 20, 20e-3, pow(10, -3)),
+    21: ('50 mV', 21, 50e-3, pow(10, -3)),
+    22: ('100 mV', 22, 100e-3, pow(10, -3)),
+    23: ('200 mV', 23, 200e-3, pow(10, -3)),
+    24: ('500 mV', 24, 500e-3, pow(10, -3)),
+}
+BIT_SOBRECARGA = 1 << 4 # Bit do byte de estado ("Y") que indica sobrecarga
+
+
 class SR510:
     """
     Classe para traduzir o idioma Serial falado pelo Lock-in SR510 em um idioma de funções Python.
@@ -121,11 +420,21 @@ class SR510:
         self.porta = porta
         self.baudrate = baudrate
         self.conexao = None
+        self.sensibilidade = None # Último código de sensibilidade lido ou definido (ver "TABELA_SENSIBILIDADE")
+        self.tempo_espera = 6 # O SR510 sempre liga em 6
 
 
     # ========== Conexão ==========
-    def conectar(self):
-        """Cria (e abre) a conexão Serial entre computador e Lock-in"""
+    def conectar(self, tempo_limite: float=5.0):
+        """
+        Cria (e abre) a conexão Serial entre computador e Lock-in. Só retorna quando o Lock-in responde a uma consulta de sensibilidade ("G") com um código válido.
+
+        Args:
+            tempo_limite (float, optional): Tempo máximo (em s) esperando o Lock-in responder. Defaults to 5.0.
+
+        Raises:
+            TimeoutError: Caso o Lock-in não responda dentro do tempo limite.
+        """
          
         self.conexao = serial.Serial(
             port=self.porta,
@@ -135,10 +444,21 @@ class SR510:
             stopbits=serial.STOPBITS_TWO, # O SR510 exige 2 em 9600 baud
             timeout=0.05
          )
-        sleep(0.5)
-        print(f'Lock-in: Conectando na porta {self.porta}...')
-        sleep(2.5) # Tempo para garanti que a conxão foi aberta
-        print(f'-- SR510 conectado na porta {self.porta}. Canal Serial aberto --')
+        log.info(f'Lock-in: Conectando na porta {self.porta}...')
+
+        inicio = perf_counter()
+        while perf_counter() - inicio < tempo_limite:
+            self.conexao.reset_input_buffer() # Descarta lixo da inicialização
+            self.conexao.write(b'G\r')
+            raw = self.conexao.readline().decode('utf-8', errors='replace').strip()
+            if raw.isdigit() and 1 <= int(raw) <= 24:
+                break
+            sleep(0.1)
+        else:
+            self.conexao.close()
+            raise TimeoutError(f'O Lock-in não respondeu na porta {self.porta} em {tempo_limite} s')
+
+        log.info(f'-- SR510 conectado na porta {self.porta} em {round(perf_counter() - inicio, 2)} s. Canal Serial aberto --')
 
     def fechar(self):
         """Fecha a conexão antre computador e Lock-in"""
@@ -147,25 +467,70 @@ class SR510:
             self.conexao.close()
 
     
-    # ========== Leitura ==========
-    def ler_valor_saida(self):
-        """Lê o valor mostrado no LCD de saida"""
+    # ========== Transação ==========
+    def transacao(self, comandos: list):
+        """
+        Envia vários comandos em uma única escrita e lê as respostas, em ordem. Só as consultas (comandos sem parâmetro, ex: "Q", "G", "Y") respondem; as definições (ex: "G18", "W0") não.
+
+        As respostas do SR510 terminam em "\\r": cada uma é lida até o seu terminador, sem esperar o timeout de um "\\n" que nunca vem.
+
+        Args:
+            comandos (list): Os comandos, sem o terminador. Ex: ['Q', 'Y']
+
+        Returns:
+            list: As respostas (str) das consultas. Resposta vazia se o Lock-in não respondeu a tempo.
+        """
+
+        if self.conexao.in_waiting:
+            self.conexao.reset_input_buffer() # Resposta atrasada de uma transação anterior: não desalinha esta
+
+        self.conexao.write(''.join(f'{comando}\r' for comando in comandos).encode('ascii'))
+
+        respostas = []
+        for comando in comandos:
+            if comando[1:].strip():
+                continue # Definição: sem resposta
+            raw = self.conexao.read_until(b'\r')
+            while raw and not raw.endswith(b'\r'):
+                # O timeout do "read_until()" vale para a resposta inteira: continua enquanto os caracteres (espaçados pelo "W") chegam
+                resto = self.conexao.read_until(b'\r')
+                if not resto:
+                    break
+                raw += resto
+            respostas.append(raw.decode('ascii', errors='replace').strip())
+        return respostas
+
+    @staticmethod
+    def converter(raw: str, tipo=float):
+        """Converte uma resposta. Devolve None (com um aviso) se vier um valor estranho."""
 
-        self.conexao.write(b'Q\r') # Envia o comando
-        raw = self.conexao.readline().decode('utf-8').strip()
-        # try caso venha um valor estranho
         try:
-            return float(raw) # Transforma o texto em número
+            return tipo(raw) # Transforma o texto em número
         except ValueError as e:
-            print(f'Erro ao converter a resposta "raw" --> float: {e}')
+            log.warning(f'Erro ao converter a resposta {raw!r} --> {tipo.__name__}: {e}')
             return None
 
+
+    # ========== Leitura ==========
+    def ler_valor_saida(self):
+        """Lê o valor mostrado no LCD de saida"""
+
+        return self.converter(self.transacao(['Q'])[0])
+
+    def ler_saida_e_estado(self):
+        """
+        Lê a saída e o byte de estado em uma única ida e volta.
+
+        Returns:
+            tuple: (saída em V ou None, byte de estado ou None). Ver "BIT_SOBRECARGA".
+        """
+
+        saida, estado = self.transacao(['Q', 'Y'])
+        return self.converter(saida), self.converter(estado, int)
+
     def ler_tempo_espera(self):
 
-        self.conexao.write(b'W\r') # Envia o comando
-        raw = self.conexao.readline().decode('utf-8')#.strip()
-        
-        return raw
+        return self.converter(self.transacao(['W'])[0], int)
     
     def ler_sensibilidade(self):
         """
@@ -175,41 +540,10 @@ class SR510:
             tuple: Uma tupla (Sensibilidade str, O código enviado pelo Lock-in, O valor float, A ordem de grandeza).
         """
 
-        dicionario_traducao = {
-            1: ('10 nV', 1, 10e-9, pow(10, -9)),
-            2: ('20 nV', 2, 20e-9, pow(10, -9)),
-            3: ('50 nV', 3, 50e-9, pow(10, -9)),
-            4: ('100 nV', 4, 100e-9, pow(10, -9)),
-            5: ('200 nV', 5, 200e-9, pow(10, -9)),
-            6: ('500 nV', 6, 500e-9, pow(10, -9)),
-            7: ('1 µV', 7, 1e-6, pow(10, -6)),
-            8: ('2 µV', 8, 2e-6, pow(10, -6)),
-            9: ('5 µV', 9, 5e-6, pow(10, -6)),
-            10: ('10 µV', 10, 10e-6, pow(10, -6)),
-            11: ('20 µV', 11, 20e-6, pow(10, -6)),
-            12: ('50 µV', 12, 50e-6, pow(10, -6)),
-            13: ('100 µV', 13, 100e-6, pow(10, -6)),
-            14: ('200 µV', 14, 200e-6, pow(10, -6)),
-            15: ('500 µV', 15, 500e-6, pow(10, -6)),
-            16: ('1 mV', 16, 1e-3, pow(10, -3)),
-            17: ('2 mV', 17, 2e-3, pow(10, -3)),
-            18: ('5 mV', 18, 5e-3, pow(10, -3)),
-            19: ('10 mV', 19, 10e-3, pow(10, -3)),
-            20: ('20 mV', 20, 20e-3, pow(10, -3)),
-            21: ('50 mV', 21, 50e-3, pow(10, -3)),
-            22: ('100 mV', 22, 100e-3, pow(10, -3)),
-            23: ('200 mV', 23, 200e-3, pow(10, -3)),
-            24: ('500 mV', 24, 500e-3, pow(10, -3)),
-        }
-        self.conexao.write(b'G\r')
-        raw = self.conexao.readline().decode('utf-8').strip()
-        try:
-            sensibilidade_c = int(raw) # Transforma o texto em número
-        except ValueError as e:
-            print(f'Erro ao converter a resposta "raw" --> float: {e}')
-            sensibilidade_c = None
+        sensibilidade_c = self.converter(self.transacao(['G'])[0], int)
 
-        return dicionario_traducao[sensibilidade_c]
+        self.sensibilidade = sensibilidade_c
+        return TABELA_SENSIBILIDADE[sensibilidade_c] # Tabela pronta: nada é montado a cada leitura
 
     
     # ========== Escrita ==========
@@ -218,11 +552,41 @@ class SR510:
         Define no Lock-in o tempo de leitura entre cada caracter. O Lock-in sempre liga em 6.
 
         Args:
-            t (int): Um inteiro de 1 a 6 em que 1 é o menor tempo.
+            t (int): Um inteiro de 0 a 6 em que 0 é o menor tempo.
         """
 
         comando = f'W{t}\r'
         self.conexao.write(comando.encode('ascii')) # Envia o comando
+        self.tempo_espera = t
+
+    def ajustar_tempo_espera(self, tentativas: int=5):
+        """
+        Procura o menor tempo de espera entre caracteres ("W") em que o Lock-in responde sem erros: com cada valor, de 0 a 6, faz "tentativas" consultas da sensibilidade e da saída e confere as respostas. A da saída ("Q") é a mais longa, a primeira a chegar cortada. Cada caractere das respostas custa n * 4 ms a menos.
+
+        Args:
+            tentativas (int, optional): Consultas que precisam dar certo com cada valor. Defaults to 5.
+
+        Returns:
+            int: O tempo de espera escolhido
+        """
+
+        def resposta_valida(sensibilidade: str, saida: str):
+            try:
+                float(saida) # A saída muda a cada leitura: só o formato é conferido
+            except ValueError:
+                return False
+            return sensibilidade == esperado
+
+        esperado = self.transacao(['W6', 'G'])[0]
+        for t in range(0, 7):
+            if all(resposta_valida(*self.transacao([f'W{t}', 'G', 'Q'])) for _ in range(tentativas)):
+                break
+        else:
+            t = 6
+
+        self.set_tempo_espera(t)
+        log.info(f'Lock-in: Tempo de espera entre caracteres ajustado para {t} ({t * 4} ms)')
+        return t
 
     def set_sensibilidade(self, valor: int):
         """
@@ -234,145 +598,1043 @@ class SR510:
 
         comando = f'G{valor}\r'
         self.conexao.write(comando.encode('ascii')) # Envia o comando
+        self.sensibilidade = valor
 #endregion
 
 
-
-#region Experimento
-class Experimento:
+#region Assíncrono
+class CanalAssincrono:
     """
-    A classe armazena todos os métodos necessários para realizar um experimento com o monocromador conectado ao Lock-in amplifier SR510.
-    
-    Ela conta com os métodos intermediários e com um método final "run()" para rodar um experimento inteiro.
+    Leitura assíncrona de uma porta Serial já aberta (pySerial). O descritor da porta é registrado no loop do asyncio ("add_reader()") e os bytes que chegam vão para um buffer, sem nenhuma thread bloqueada esperando.
 
-    A nova definição parte do presuposto que o experimento sópode ser rodado se a conexão entre os equipamentos já existir, assim é necessário conectar antes de rodar. O método "run()" não realiza a conexão.
-
-    A base de funcionamento é o módulo pySerial.
+    Onde o descritor não existe ou o loop não aceita leitores (Windows: portas "COM" e "ProactorEventLoop"), cada leitura roda a versão bloqueante em uma thread do executor padrão do loop.
     """
 
-    # Todo experimento tem isso igual. Verifiar se esse é o estilo correto
-    grade = 16 # parametro_de_grade Å / mm
-    fator_calibracao = 10.6170 # Steps por Å
-
-    def __init__(self, nome_arquivo: str, operador: str, comp_i: float, comp_f: float, tamanho_fenda: float, ppr: int=5, descricao: str=None):
+    def __init__(self, conexao: serial.Serial):
         """
-        Método construtor para a classe Experimento. Seus parâmetros são todos os necessários para rodar um experimeto. Características de um experiemnto.
+        Função construtora do canal. A porta só é registrada no loop em "abrir()".
 
         Args:
-            nome (str): O nome do arquivo .csv em que os dados serão salvos
-            comp_i (float): Comprimento de onda inicial (em )
-            comp_f (float): Comprimento de onda final (em )
-            tamanho_fenda (float): Abertura de fenda definida no monocromador (em )
-            ppr (int, optional): "Ponto Por Resolução". Define o número de pontos que será feito dentro da resolução (R) do monocromador. R = tamanho_fenda * (característica da rede de difração). Defaults to 5.
-            descricao (str, optional): Uma breve descrição do esperimento que será realizado. Defaults to None.
+            conexao (serial.Serial): A porta, já aberta
         """
 
-        # ========== Atributos iniciais do objeto ==========
-        self.nome_arquivo = nome_arquivo
-        self.operador = operador
-        self.comp_i = comp_i
-        self.comp_f = comp_f
-        self.tamanho_fenda = tamanho_fenda / 1000 # --> Micro metro para mm
-        self.ppr = ppr
-        self.descricao = descricao
+        self.conexao = conexao
+        self.buffer = bytearray()
+        self.chegada = None # asyncio.Event: avisa que chegaram bytes
+        self.loop = None
+        self.descritor = None # Descritor registrado no loop. None --> leituras no executor
 
-        # ===== Novas características que não são definidas pelo usuário
-        self.comp_atual = self.comp_i
-        self.tempo_atual = datetime.now().time() # Obtem a hora atual
-        self.hoje = date.today() # Obtém a data atual (YYYY-MM-DD)
+    def abrir(self):
+        """Registra a porta no loop em execução. Enquanto o canal está aberto, a porta não deve ser lida pelos métodos síncronos."""
 
-        # ===== Eventos
-        self.eventos = []
-        self.evento_abortar_experimento = False
+        self.loop = asyncio.get_running_loop()
+        self.chegada = asyncio.Event()
+        try:
+            descritor = self.conexao.fileno()
+            self.loop.add_reader(descritor, self.ao_receber)
+            self.descritor = descritor
+        except (AttributeError, NotImplementedError, OSError):
+            self.descritor = None # Sem descritor ou sem "add_reader()": leituras no executor
+
+    def fechar(self):
+        """Tira a porta do loop. Pode ser chamada mais de uma vez."""
 
-        # ===== Para o gráfico
-        self.buffer_x = []
-        self.buffer_y = []
+        if self.descritor is not None:
+            self.loop.remove_reader(self.descritor)
+            self.descritor = None
 
-    
-    # ========== Conexão ==========
-    def conectar(self, conexao_lock_in: dict, conexao_arduino: dict):
+    def ao_receber(self):
+        """Chamada pelo loop quando a porta tem bytes para ler. Nunca bloqueia: só lê o que já chegou."""
+
+        dados = self.conexao.read(self.conexao.in_waiting)
+        if dados:
+            self.buffer += dados
+            self.chegada.set()
+
+    def descartar(self):
+        """Descarta os bytes que chegaram e ninguém leu (respostas atrasadas)."""
+
+        self.buffer.clear()
+        if self.descritor is None and self.conexao.in_waiting:
+            self.conexao.reset_input_buffer()
+
+    async def ler(self, terminador: bytes=None, tamanho: int=None, timeout: float=None):
         """
-        Cria a conexao (abre o canal), por meio de "SR510", com o Lock-in e por meio de "Monocromador" com o Arduino.
+        Espera até o "terminador" (incluído na resposta) ou até "tamanho" bytes.
 
         Args:
-            conexao_lock_in (dict): O dicionário a porta (porta) o baudrate (baudrate) e o timeout (timeot) para a conexão.
-            conexao_arduino (dict): O dicionário a porta (porta) o baudrate (baudrate) e o timeout (timeot) para a conexão.
+            terminador (bytes, optional): O fim da resposta. Ex: b'\\r'. Defaults to None.
+            tamanho (int, optional): O número de bytes, quando não há terminador. Defaults to None.
+            timeout (float, optional): Tempo máximo (em s) sem chegar nenhum byte. None --> espera indefinida. Defaults to None.
+
+        Returns:
+            bytes: A resposta. Incompleta (ou vazia) se o timeout estourar, como no "read_until()" do pySerial.
         """
 
-        self.sr510 = SR510(**conexao_lock_in) # Cria o objeto da classe "SR510"
-        self.arduino = Monocromador(**conexao_arduino)
-        self.sr510.conectar() # Usa o método "conectar()" de "SR510" para criar a conexão computador-Lock-in
-        self.arduino.conectar()
+        if self.descritor is None:
+            return await self.loop.run_in_executor(None, self.ler_bloqueando, terminador, tamanho, timeout)
+
+        while True:
+            if terminador is not None:
+                fim = self.buffer.find(terminador)
+                fim = fim + len(terminador) if fim >= 0 else None
+            else:
+                fim = tamanho if len(self.buffer) >= tamanho else None
+
+            if fim is not None:
+                resposta = bytes(self.buffer[:fim])
+                del self.buffer[:fim]
+                return resposta
+
+            self.chegada.clear()
+            try:
+                await asyncio.wait_for(self.chegada.wait(), timeout)
+            except asyncio.TimeoutError:
+                resposta = bytes(self.buffer)
+                self.buffer.clear()
+                return resposta
+
+    def ler_bloqueando(self, terminador: bytes, tamanho: int, timeout: float):
+        """Versão bloqueante de "ler()", usada no executor. O timeout vale entre dois bytes, como no canal registrado."""
+
+        anterior = self.conexao.timeout
+        self.conexao.timeout = timeout
+        try:
+            if terminador is None:
+                return self.conexao.read(tamanho)
 
-        # ===== Coletar dados iniciais dos equipamentos
-        raw_sensibilidade = self.sr510.ler_sensibilidade()
-        self.sensibilidade_str = raw_sensibilidade[0] # A string de sensibilidade
-        self.sensibilidade_ordem = raw_sensibilidade[3] # A ordem de grandeza da sensibilidade
+            resposta = self.conexao.read_until(terminador)
+            while resposta and not resposta.endswith(terminador):
+                resto = self.conexao.read_until(terminador)
+                if not resto:
+                    break
+                resposta += resto
+            return resposta
+        finally:
+            self.conexao.timeout = anterior
 
-    def desconectar(self):
-        """Desconecta o computador do Lock-in"""
 
-        self.sr510.fechar()
-        self.arduino.desconectar()
+class SR510Assincrono:
+    """
+    As leituras do SR510 usadas durante a varredura, em versão assíncrona. Envolve um "SR510" já conectado: a conexão e as configurações continuam sendo feitas pela classe síncrona.
+    """
+
+    def __init__(self, sr510: SR510):
+        """
+        Args:
+            sr510 (SR510): O Lock-in, já conectado
+        """
 
+        self.sr510 = sr510
+        self.canal = CanalAssincrono(sr510.conexao)
+        self.timeout = sr510.conexao.timeout # Entre dois caracteres da resposta
 
-    # ========== Responsividade ==========
-    def fechamento(self, evento):
-        """Função executada caso a janela de plotagem seja fechada. Encerra o programa."""
+    @property
+    def sensibilidade(self):
+        return self.sr510.sensibilidade
 
-        # Não uso o "evnto", mas preciso desse argumeto para o Matplot não reclamar
-        if self.evento_experimento_concluido:
-            return
-        
-        print('\nAVISO: Janela fechada. Abortando experimento...')
-        self.evento_abortar_experimento = True
+    def abrir(self):
+        self.canal.abrir()
 
-    def tecla_pressionada(self, evento):
+    def fechar(self):
+        self.canal.fechar()
+
+    async def transacao(self, comandos: list):
         """
-        Função chamada quando o programa detecta a pressão em alguma tecla NA JANELA DE PLOTAGEM.
+        Versão assíncrona de "SR510.transacao()": uma única escrita e as respostas das consultas, em ordem.
 
         Args:
-            evento (_type_): O sinal do Matplotlib para a ativação da função. Carrega informações sobre o evento (qual a tecla...)
+            comandos (list): Os comandos, sem o terminador. Ex: ['Q', 'Y']
+
+        Returns:
+            list: As respostas (str) das consultas. Resposta vazia se o Lock-in não respondeu a tempo.
         """
 
-        if evento.key == 'escape' or evento.key == 'q':
-            print('\nAVISO: Tecla de parada pressionada. Encerrando...')
-            self.evento_abortar_experimento = True
+        self.canal.descartar() # Resposta atrasada de uma transação anterior: não desalinha esta
+        self.sr510.conexao.write(''.join(f'{comando}\r' for comando in comandos).encode('ascii'))
 
-    # ========== Gráfico ==========
-    def inicializar_grafico(self):
-        """Prepara a janela do gráfico antes de começar o loop, além de ativar a interatividade"""
+        respostas = []
+        for comando in comandos:
+            if comando[1:].strip():
+                continue # Definição: sem resposta
+            raw = await self.canal.ler(terminador=b'\r', timeout=self.timeout)
+            respostas.append(raw.decode('ascii', errors='replace').strip())
+        return respostas
 
-        # ========== Cria a janela e a linha ==========
-        plt.ion() # Ativa o modo interativo
-        self.fig, self.ax = plt.subplots(figsize=(8, 5))
-        self.linha_grafico, = self.ax.plot([], [], 'ro-', ms=2.5, animated=False, label='Sinal') # 'ro-' --> bola vermelha com linha
+    async def ler_valor_saida(self):
+        """Lê o valor mostrado no LCD de saida"""
 
-        # ========== Conectar eventos a funções via Matplotlib ==========
-        self.fig.canvas.mpl_connect('close_event', self.fechamento) # Detecta se a janela foi fechada
-        self.fig.canvas.mpl_connect('key_press_event', self.tecla_pressionada) # Detecta teclas pressionada
-        
-        # ========== Legendas e estilo ==========
-        self.ax.set_title(f'Espectro em Tempo Real')
+        return SR510.converter((await self.transacao(['Q']))[0])
+
+    async def ler_saida_e_estado(self):
+        """
+        Lê a saída e o byte de estado em uma única ida e volta.
+
+        Returns:
+            tuple: (saída em V ou None, byte de estado ou None). Ver "BIT_SOBRECARGA".
+        """
+
+        saida, estado = await self.transacao(['Q', 'Y'])
+        return SR510.converter(saida), SR510.converter(estado, int)
+
+    def set_sensibilidade(self, valor: int):
+        """Só escreve na porta: não precisa esperar nada (ver "SR510.set_sensibilidade()")."""
+
+        self.sr510.set_sensibilidade(valor)
+
+
+class MonocromadorAssincrono:
+    """
+    Os movimentos do monocromador em versão assíncrona. Envolve um "Monocromador" já conectado: conexão, perfil e plano continuam sendo enviados pela classe síncrona.
+    """
+
+    def __init__(self, monocromador: Monocromador):
+        """
+        Args:
+            monocromador (Monocromador): O monocromador, já conectado
+        """
+
+        self.monocromador = monocromador
+        self.canal = CanalAssincrono(monocromador.conexao)
+
+    def abrir(self):
+        self.canal.abrir()
+
+    def fechar(self):
+        self.canal.fechar()
+
+    async def ler_Serial(self, timeout: float=None):
+        """
+        Lê uma linha do Arduino.
+
+        Args:
+            timeout (float, optional): Tempo máximo (em s). None --> espera indefinida. Defaults to None.
+
+        Returns:
+            str: A linha que foi lida, sem espaços e novas linhas. Vazia se o timeout estourar.
+        """
+
+        raw = await self.canal.ler(terminador=b'\n', timeout=timeout)
+        return raw.decode('utf-8').rstrip()
+
+    async def mover_motor(self, steps: int):
+        """
+        Envia o número de steps e espera a confirmação do final da movimentação.
+
+        Args:
+            steps (int): O número de steps que o motor vai andar.
+
+        Returns:
+            str: A resposta do Arduino.
+        """
+
+        self.monocromador.escrever(steps, terminador='\n')
+        resposta = await self.ler_Serial(self.monocromador.prazo_resposta(steps))
+        log.debug(f'Arduino: Resposta [{resposta}];')
+        return resposta
+
+    async def avancar(self):
+        """
+        Anda um ponto do plano carregado e espera o byte de chegada (ver "Monocromador.avancar()").
+
+        Returns:
+            str: "A"
+
+        Raises:
+            TimeoutError: Caso o byte não chegue dentro do timeout da porta
+            RuntimeError: Caso o Arduino responda outra coisa (plano terminado, firmware antigo...)
+        """
+
+        self.monocromador.avancar() # Só o envio do ">": a chegada é lida aqui
+        byte = await self.canal.ler(tamanho=1, timeout=self.monocromador.prazo_resposta(self.monocromador.plano_steps))
+        if not byte:
+            raise TimeoutError('O Arduino não confirmou a chegada ao ponto do plano')
+        resposta = byte.decode('ascii', errors='replace')
+        if resposta != 'A':
+            raise RuntimeError(f'Resposta inesperada ao avançar no plano: {resposta!r}')
+        return resposta
+#endregion
+
+
+
+#region Arquivo
+class EscritorCSV:
+    """
+    Escritor persistente do arquivo .csv do experimento. O arquivo é aberto uma única vez por execução, em vez de ser reaberto a cada ponto.
+
+    Os dados ficam no buffer do Python e são descarregados no disco segundo uma política configurável: a cada N pontos, a cada T segundos e com "fsync" caso o experimento seja abortado. O cabeçalho e o registro de eventos são sempre descarregados na hora, garantindo um arquivo válido mesmo que o processo morra no meio da varredura.
+    """
+
+    def __init__(self, caminho: str, pontos_por_flush: int=10, intervalo_flush: float=5.0, fsync_ao_abortar: bool=True):
+        """
+        Função construtora do escritor. Abre o arquivo em modo "append".
+
+        Args:
+            caminho (str): O caminho do arquivo .csv
+            pontos_por_flush (int, optional): Número de pontos acumulados antes de descarregar no disco. Defaults to 10.
+            intervalo_flush (float, optional): Tempo máximo (em s) que um ponto pode ficar só no buffer. Defaults to 5.0.
+            fsync_ao_abortar (bool, optional): Força a escrita física ("fsync") quando o experimento é abortado. Defaults to True.
+        """
+
+        self.caminho = caminho
+        self.pontos_por_flush = pontos_por_flush
+        self.intervalo_flush = intervalo_flush
+        self.fsync_ao_abortar = fsync_ao_abortar
+
+        self.arquivo = open(caminho, 'a', newline='', encoding='utf-8')
+        self.escritor = csv.writer(self.arquivo)
+        self.pontos_pendentes = 0
+        self.ultimo_flush = perf_counter()
+
+    def escrever_cabecalho(self, metadados: list):
+        """
+        Escreve os metadados e a linha divisória no início do arquivo. Vai direto para o disco.
+
+        Args:
+            metadados (list): As linhas de metadados (já começando com "#")
+        """
+
+        for linha in metadados: # Escreve os metadados
+            self.arquivo.write(linha + '\n')
+        self.arquivo.write('#' + '-'*25 + '\n') # Uma linha divisória para ficar bonito e legível
+        self.descarregar(fsync=True)
+
+    def escrever_linha(self, dados):
+        """
+        Escreve uma linha de dados no formato csv. Só descarrega no disco quando a política de flush manda.
+
+        Args:
+            dados (Any): O que será escrito no arquivo (uma sequência de valores)
+        """
+
+        self.escritor.writerow(dados)
+        self.pontos_pendentes += 1
+
+        if self.pontos_pendentes >= self.pontos_por_flush or perf_counter() - self.ultimo_flush >= self.intervalo_flush:
+            self.descarregar()
+
+    def escrever_eventos(self, eventos: list):
+        """
+        Escreve a linha divisória e os eventos que ocorreram durante a execução. Vai direto para o disco.
+
+        Args:
+            eventos (list): As linhas de eventos
+        """
+
+        self.arquivo.write('#' + '-'*25 + '\n') # Uma linha divisória para ficar bonito
+        for linha in eventos: # Escreve os eventos
+            self.arquivo.write(linha + '\n')
+        self.descarregar()
+
+    def descarregar(self, fsync: bool=False):
+        """
+        Esvazia o buffer do Python no sistema operacional e, opcionalmente, força a escrita física no disco.
+
+        Args:
+            fsync (bool, optional): Chama "os.fsync" após o "flush". Defaults to False.
+        """
+
+        self.arquivo.flush()
+        if fsync:
+            os.fsync(self.arquivo.fileno())
+        self.pontos_pendentes = 0
+        self.ultimo_flush = perf_counter()
+
+    def fechar(self, abortado: bool=False):
+        """
+        Descarrega o que falta e fecha o arquivo. Pode ser chamada mais de uma vez.
+
+        Args:
+            abortado (bool, optional): Indica que o experimento foi interrompido. Defaults to False.
+        """
+
+        if self.arquivo.closed:
+            return
+
+        self.descarregar(fsync=abortado and self.fsync_ao_abortar)
+        self.arquivo.close()
+#endregion
+
+
+
+#region Buffer
+class BufferAquisicao:
+    """
+    Buffer dos pontos adquiridos em arrays NumPy (float64) pré-alocados, com um índice de preenchimento.
+
+    A memória é fixa e contígua durante a varredura (a capacidade vem de "calcula_passo()") e os dados são expostos como vistas, sem cópia, para o gráfico, para o escritor e para o pós-processamento vetorizado. Se a capacidade acabar, os arrays dobram de tamanho.
+    """
+
+    def __init__(self, capacidade: int=256):
+        """
+        Função construtora do buffer.
+
+        Args:
+            capacidade (int, optional): Número de pontos pré-alocados. Defaults to 256.
+        """
+
+        self._x = np.empty(capacidade, dtype=np.float64)
+        self._y = np.empty(capacidade, dtype=np.float64)
+        self.n = 0 # Quantos pontos já foram preenchidos
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def capacidade(self):
+        return len(self._x)
+
+    @property
+    def x(self):
+        """Vista (sem cópia) dos comprimentos de onda preenchidos."""
+
+        return self._x[:self.n]
+
+    @property
+    def y(self):
+        """Vista (sem cópia) dos sinais preenchidos."""
+
+        return self._y[:self.n]
+
+    def reservar(self, capacidade: int):
+        """
+        Garante espaço para "capacidade" pontos, mantendo os que já foram preenchidos.
+
+        Args:
+            capacidade (int): O número total de pontos
+        """
+
+        if capacidade <= self.capacidade:
+            return
+
+        for nome in ('_x', '_y'):
+            novo = np.empty(capacidade, dtype=np.float64)
+            novo[:self.n] = getattr(self, nome)[:self.n]
+            setattr(self, nome, novo)
+
+    def adicionar(self, x: float, y: float):
+        """
+        Acrescenta um ponto no próximo índice livre.
+
+        Args:
+            x (float): Comprimento de onda
+            y (float): Sinal
+        """
+
+        if self.n == self.capacidade:
+            self.reservar(2 * self.capacidade) # Só acontece se a varredura passar do previsto
+
+        self._x[self.n] = x
+        self._y[self.n] = y
+        self.n += 1
+
+    def limpar(self):
+        """Descarta os pontos preenchidos, mantendo a memória reservada."""
+
+        self.n = 0
+
+
+class MediasPassagens:
+    """
+    Os valores de cada passagem de uma varredura com várias passagens e, para cada ponto, a média e a variância atualizadas a cada leitura (algoritmo de Welford), sem guardar somas grandes.
+    """
+
+    def __init__(self, n_passagens: int, n_pontos: int):
+        """
+        Função construtora das médias.
+
+        Args:
+            n_passagens (int): O número de passagens
+            n_pontos (int): O número de pontos de cada passagem
+        """
+
+        self.valores = np.full((n_passagens, n_pontos), np.nan) # Uma linha por passagem
+        self.contagem = np.zeros(n_pontos, dtype=np.int64)
+        self.media = np.zeros(n_pontos, dtype=np.float64)
+        self.m2 = np.zeros(n_pontos, dtype=np.float64) # Soma dos quadrados dos desvios
+
+    def adicionar(self, passagem: int, indice: int, valor: float):
+        """
+        Registra a leitura de um ponto em uma passagem.
+
+        Args:
+            passagem (int): A passagem (0, 1, ...)
+            indice (int): O ponto (0 --> comp_i)
+            valor (float): A tensão lida
+        """
+
+        self.valores[passagem, indice] = valor
+        self.contagem[indice] += 1
+        delta = valor - self.media[indice]
+        self.media[indice] += delta / self.contagem[indice]
+        self.m2[indice] += delta * (valor - self.media[indice])
+
+    @property
+    def desvio_padrao(self):
+        """Desvio padrão amostral de cada ponto (NaN com menos de duas leituras)."""
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.contagem > 1, np.sqrt(self.m2 / (self.contagem - 1)), np.nan)
+
+    @property
+    def erro(self):
+        """Erro padrão da média de cada ponto (NaN com menos de duas leituras)."""
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.desvio_padrao / np.sqrt(self.contagem)
+#endregion
+
+
+
+#region Gráfico
+class GraficoIncremental:
+    """
+    Desenha a linha do espectro ponto a ponto com custo constante por ponto, não importa o tamanho da varredura.
+
+    - Os limites de y são mantidos por mínimo/máximo correntes e o eixo só é reescalado quando o ponto novo cai fora deles.
+    - Sem reescala, só a linha é redesenhada sobre o fundo guardado ("blit"). Com reescala, a figura inteira é redesenhada.
+    - Quando há mais pontos que colunas de pixel, os pontos são agrupados em baldes e só o mínimo e o máximo de cada balde são desenhados. Picos estreitos nunca somem.
+    """
+
+    def __init__(self, ax, linha, usar_blit: bool=True, margem: float=0.1):
+        """
+        Função construtora do gráfico incremental.
+
+        Args:
+            ax (Axes): Os eixos em que a linha está
+            linha (Line2D): A linha que recebe os pontos
+            usar_blit (bool, optional): Redesenha só a linha (quando o backend permite). Se False, usa "draw_idle()". Defaults to True.
+            margem (float, optional): Margem, em fração da amplitude do sinal, acima e abaixo dos dados. Defaults to 0.1.
+        """
+
+        self.ax = ax
+        self.linha = linha
+        self.canvas = ax.figure.canvas
+        self.usar_blit = usar_blit and self.canvas.supports_blit
+        self.margem = margem
+
+        self.linha.set_animated(self.usar_blit) # Linha animada fica fora do desenho normal da figura
+        self.fundo = None
+        self.id_desenho = self.canvas.mpl_connect('draw_event', self.ao_desenhar) if self.usar_blit else None
+
+        # ===== Limites
+        self.y_min = self.y_max = None # Dos dados
+        self.lim_inf = self.lim_sup = None # Do eixo
+
+        # ===== Decimação
+        self.limite_baldes = max(int(ax.bbox.width), 100) # Um balde por coluna de pixel
+        self.tamanho_balde = 1
+        self.baldes = [] # Baldes completos: ((x, y), (x, y)) --> mínimo e máximo em ordem de aquisição
+        self.balde_atual = [] # Pontos do balde em formação
+        self.xs, self.ys = [], [] # O que é desenhado dos baldes completos
+
+    # ========== Dados ==========
+    def adicionar(self, x: float, y: float):
+        """
+        Acrescenta um ponto. Custo O(1) amortizado.
+
+        Args:
+            x (float): Comprimento de onda
+            y (float): Sinal
+
+        Returns:
+            bool: True se o eixo y precisou ser reescalado (a figura inteira deve ser redesenhada).
+        """
+
+        self.balde_atual.append((x, y))
+        if len(self.balde_atual) == self.tamanho_balde:
+            self.fecha_balde()
+
+        # ===== Limites correntes
+        if self.y_min is None:
+            self.y_min = self.y_max = y
+        else:
+            self.y_min, self.y_max = min(self.y_min, y), max(self.y_max, y)
+
+        if self.lim_inf is not None and self.lim_inf <= y <= self.lim_sup:
+            return False
+
+        margem = (self.y_max - self.y_min) * self.margem or 1.0
+        self.lim_inf, self.lim_sup = self.y_min - margem, self.y_max + margem
+        self.ax.set_ylim(self.lim_inf, self.lim_sup)
+        return True
+
+    def fecha_balde(self):
+        """Guarda o mínimo e o máximo do balde em formação e junta os baldes de dois em dois quando passam do limite."""
+
+        balde = GraficoIncremental.extremos(self.balde_atual)
+        self.balde_atual = []
+        self.baldes.append(balde)
+        self.estende_desenho(balde)
+
+        if len(self.baldes) > self.limite_baldes:
+            self.baldes = [GraficoIncremental.extremos(self.baldes[i] + self.baldes[i+1]) if i + 1 < len(self.baldes) else self.baldes[i] for i in range(0, len(self.baldes), 2)]
+            self.tamanho_balde *= 2
+            self.xs, self.ys = [], []
+            for balde in self.baldes:
+                self.estende_desenho(balde)
+
+    @staticmethod
+    def extremos(pontos):
+        """
+        Escolhe o ponto de menor e o de maior y, mantendo a ordem em que foram adquiridos.
+
+        Args:
+            pontos (Sequence): Pontos (x, y) em ordem de aquisição
+
+        Returns:
+            tuple: Os dois pontos extremos (iguais quando só há um ponto)
+        """
+
+        i_min = min(range(len(pontos)), key=lambda i: pontos[i][1])
+        i_max = max(range(len(pontos)), key=lambda i: pontos[i][1])
+        return (pontos[i_min], pontos[i_max]) if i_min <= i_max else (pontos[i_max], pontos[i_min])
+
+    def estende_desenho(self, balde):
+        for x, y in dict.fromkeys(balde): # Sem repetir o ponto quando mínimo e máximo coincidem
+            self.xs.append(x)
+            self.ys.append(y)
+
+    # ========== Desenho ==========
+    def ao_desenhar(self, evento):
+        """Depois de cada desenho completo (reescala, redimensionamento...) guarda o fundo e recoloca a linha."""
+
+        self.fundo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.linha)
+        self.canvas.blit(self.ax.bbox)
+
+    def desenhar(self, reescalou: bool=False):
+        """
+        Atualiza a tela. Com blit e sem reescala, só a linha é redesenhada.
+
+        Args:
+            reescalou (bool, optional): O retorno do último "adicionar()". Defaults to False.
+        """
+
+        self.linha.set_data(self.xs + [x for x, _ in self.balde_atual], self.ys + [y for _, y in self.balde_atual])
+
+        if not self.usar_blit:
+            self.canvas.draw_idle()
+        elif reescalou or self.fundo is None:
+            self.canvas.draw() # Dispara "ao_desenhar()"
+        else:
+            self.canvas.restore_region(self.fundo)
+            self.ax.draw_artist(self.linha)
+            self.canvas.blit(self.ax.bbox)
+
+    def finalizar(self, x, y):
+        """
+        Troca os pontos decimados por todos os pontos e devolve a linha ao desenho normal, para a figura poder ser salva.
+
+        Args:
+            x (Sequence): Todos os comprimentos de onda
+            y (Sequence): Todos os sinais
+        """
+
+        self.linha.set_data(x, y)
+        self.encerrar()
+
+    def encerrar(self):
+        """Devolve a linha ao desenho normal e desliga o blit. O gráfico para de reagir aos desenhos da figura (que pode receber outro gráfico depois)."""
+
+        if self.id_desenho is not None:
+            self.canvas.mpl_disconnect(self.id_desenho)
+            self.id_desenho = None
+        self.linha.set_animated(False)
+        self.usar_blit = False
+        self.canvas.draw_idle()
+#endregion
+
+
+
+#region Métricas
+class MetricasCiclo:
+    """
+    Registrador, em memória, do tempo gasto em cada fase de cada ciclo do "run()". Cada fase é só uma lista de floats, para que medir custe o mínimo possível dentro do loop.
+
+    Fornece o resumo (p50/p95/máximo) para o registro de eventos, um arquivo auxiliar com todos os ciclos e uma estimativa suavizada do tempo restante.
+    """
+
+    fases = ('lock_in', 'motor', 'arquivo', 'grafico', 'ciclo')
+
+    def __init__(self, suavizacao: float=0.2):
+        """
+        Função construtora do registrador.
+
+        Args:
+            suavizacao (float, optional): Peso do último ciclo na média móvel exponencial usada no tempo restante. Defaults to 0.2.
+        """
+
+        self.suavizacao = suavizacao
+        self.tempos = {fase: [] for fase in MetricasCiclo.fases}
+        self.media_ciclo = None # Média móvel exponencial do tempo de ciclo (s)
+
+    def registrar(self, lock_in: float, motor: float, arquivo: float, grafico: float, ciclo: float):
+        """Guarda os tempos (em s) de um ciclo e atualiza a média móvel do tempo de ciclo."""
+
+        self.tempos['lock_in'].append(lock_in)
+        self.tempos['motor'].append(motor)
+        self.tempos['arquivo'].append(arquivo)
+        self.tempos['grafico'].append(grafico)
+        self.tempos['ciclo'].append(ciclo)
+
+        if self.media_ciclo is None:
+            self.media_ciclo = ciclo
+        else:
+            self.media_ciclo += self.suavizacao * (ciclo - self.media_ciclo)
+
+    def tempo_restante(self, ciclos_restantes: int):
+        """
+        Estima o tempo que falta a partir da média móvel do tempo de ciclo.
+
+        Args:
+            ciclos_restantes (int): Quantos ciclos ainda faltam
+
+        Returns:
+            float: O tempo estimado em s (0 antes do primeiro ciclo).
+        """
+
+        return (self.media_ciclo or 0.0) * ciclos_restantes
+
+    def resumo(self):
+        """
+        Calcula p50, p95 e o máximo de cada fase.
+
+        Returns:
+            dict: fase --> (p50, p95, máximo), em s. Fases sem ciclos ficam de fora.
+        """
+
+        def percentil(ordenados: list, p: float):
+            return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+        resumo = {}
+        for fase, tempos in self.tempos.items():
+            if tempos:
+                ordenados = sorted(tempos)
+                resumo[fase] = (percentil(ordenados, 0.50), percentil(ordenados, 0.95), ordenados[-1])
+        return resumo
+
+    def linhas_resumo(self):
+        """
+        Formata o resumo como linhas do registro de eventos do arquivo .csv.
+
+        Returns:
+            list: As linhas, começando com "#".
+        """
+
+        linhas = [f'# Métricas ({len(self.tempos["ciclo"])} ciclos, ms): fase p50 / p95 / max']
+        for fase, (p50, p95, maximo) in self.resumo().items():
+            linhas.append(f'# {fase}: {p50*1000:.2f} / {p95*1000:.2f} / {maximo*1000:.2f}')
+        return linhas
+
+    def salvar(self, caminho: str):
+        """
+        Grava todos os ciclos em um arquivo .csv auxiliar (uma linha por ciclo, uma coluna por fase, em s).
+
+        Args:
+            caminho (str): O caminho do arquivo
+        """
+
+        with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(MetricasCiclo.fases)
+            escritor.writerows(zip(*(self.tempos[fase] for fase in MetricasCiclo.fases)))
+#endregion
+
+
+
+#region Experimento
+MODOS = { # Tipo de varredura --> método do "Experimento" (ver "controlador.py" e "fila.py")
+    'run': 'run',
+    'adaptativo': 'run_adaptativo',
+    'passagens': 'run_passagens',
+    'async': 'run_async',
+}
+
+
+class Experimento:
+    """
+    A classe armazena todos os métodos necessários para realizar um experimento com o monocromador conectado ao Lock-in amplifier SR510.
+    
+    Ela conta com os métodos intermediários e com um método final "run()" para rodar um experimento inteiro.
+
+    A nova definição parte do presuposto que o experimento sópode ser rodado se a conexão entre os equipamentos já existir, assim é necessário conectar antes de rodar. O método "run()" não realiza a conexão.
+
+    A base de funcionamento é o módulo pySerial.
+    """
+
+    # Todo experimento tem isso igual. Verifiar se esse é o estilo correto
+    grade = 16 # parametro_de_grade Å / mm
+    fator_calibracao = 10.6170 # Steps por Å
+
+    def __init__(self, nome_arquivo: str, operador: str, comp_i: float, comp_f: float, tamanho_fenda: float, ppr: int=5, descricao: str=None):
+        """
+        Método construtor para a classe Experimento. Seus parâmetros são todos os necessários para rodar um experimeto. Características de um experiemnto.
+
+        Args:
+            nome (str): O nome do arquivo .csv em que os dados serão salvos
+            comp_i (float): Comprimento de onda inicial (em )
+            comp_f (float): Comprimento de onda final (em )
+            tamanho_fenda (float): Abertura de fenda definida no monocromador (em )
+            ppr (int, optional): "Ponto Por Resolução". Define o número de pontos que será feito dentro da resolução (R) do monocromador. R = tamanho_fenda * (característica da rede de difração). Defaults to 5.
+            descricao (str, optional): Uma breve descrição do esperimento que será realizado. Defaults to None.
+        """
+
+        # ========== Atributos iniciais do objeto ==========
+        self.nome_arquivo = nome_arquivo
+        self.operador = operador
+        self.comp_i = comp_i
+        self.comp_f = comp_f
+        self.tamanho_fenda = tamanho_fenda / 1000 # --> Micro metro para mm
+        self.ppr = ppr
+        self.descricao = descricao
+
+        # ===== Novas características que não são definidas pelo usuário
+        self.comp_atual = self.comp_i
+        self.posicao_steps = 0 # Posição da grade em steps, a partir de "comp_i"
+        self.tempo_atual = datetime.now().time() # Obtem a hora atual
+        self.hoje = date.today() # Obtém a data atual (YYYY-MM-DD)
+
+        # ===== Eventos
+        self.eventos = []
+        self.evento_abortar_experimento = False
+        self.tarefa = None # Tarefa do "run_async()" em andamento (ver "abortar()")
+        self.observadores = [] # Funções avisadas do andamento da varredura (ver "inscrever()")
+
+        # ===== Para o gráfico (e pós-processamento). Ver "buffer_x" e "buffer_y"
+        self.buffer = BufferAquisicao()
+        self.fig = None
+        self.ax = None
+        self.linha_grafico = None # None --> sem gráfico ao vivo
+        self.grafico = None # GraficoIncremental
+
+        # ===== Política de escrita dos arquivos (ver "EscritorCSV")
+        self.politica_escrita = {
+            'pontos_por_flush': 10,
+            'intervalo_flush': 5.0, # s
+            'fsync_ao_abortar': True
+        }
+        self.formatos_saida = ('csv',) # Acrescente 'bin' para gravar também o formato binário (ver "formato_binario.py")
+        self.escritores = [] # Um escritor aberto por formato durante o "run()"
+        self.pasta_saida = 'Gráficos'
+        self.catalogo = None # Índice dos experimentos da pasta (ver "catalogo.py"). Aberto em "cria_arquivo_csv()"
+
+        # ===== Varredura adaptativa (ver "run_adaptativo()")
+        self.limiar_gradiente = 0.02 # Fração do fundo de escala entre dois pontos da grade grossa
+        self.limiar_curvatura = 0.02
+        self.folga = 0 # Folga mecânica (steps) recolhida sempre que a grade volta
+        self.usar_plano = True # O "run()" envia o plano da varredura inteira ao Arduino (ver "Monocromador.carregar_plano()")
+        self.perfil = None # PerfilMovimento enviado ao Arduino no "conectar()". None --> velocidade do potenciômetro
+
+        # ===== Troca automática da sensibilidade do Lock-in (ver "ler_lock_in()")
+        self.auto_escala = True
+        self.limite_sobrecarga = 1.0 # Fração do fundo de escala
+        self.limite_subescala = 0.05
+        self.escala_minima = 1 # Código mais sensível permitido (ex: para não descer até o ruído)
+        self.descida_maxima = 3 # Códigos que a escala desce de uma vez (3 --> uma década: uma leitura em subescala nunca vira sobrecarga)
+        self.espera_escala = 0.5 # s depois de cada troca
+        self.ajustar_espera = True # Ajusta o "W" do Lock-in no "conectar()" (ver "SR510.ajustar_tempo_espera()")
+        self.voltar_ao_final = False # Leva a grade de volta a "comp_i" ao final da varredura (ver "voltar_ao_inicio()")
+        self.manter_conexao = False # Não desconecta ao final: as conexões seguem para o próximo experimento (ver "herdar_conexao()")
+        self.grafico_ao_vivo = True # Janela com o espectro durante a varredura. False --> sem janela (nem import do Matplotlib)
+        self.figura_final = True # Salva o gráfico final em .jpg (ver "mostrar_resultado()")
+        self.mostrar_janela = True # Deixa o gráfico final na tela (o "plt.show()" bloqueia). False --> só salva o .jpg
+        self.resultado = None # Como a última varredura terminou: "concluído", "abortado" ou "erro"
+
+        # ===== Varredura com várias passagens (ver "run_passagens()")
+        self.passagens = 1
+        self.medias = None # MediasPassagens
+        self.escritor_passagens = None # Arquivo "<nome>_passagens.csv", com as leituras de cada passagem
+
+        # ===== Métricas de tempo do "run()" (ver "MetricasCiclo")
+        self.metricas = None
+        self.salvar_metricas = False # Grava também o arquivo "<nome>_metricas.csv"
+
+        # ===== Checkpoint das varreduras interrompidas (ver "salvar_checkpoint()" e "retomar()")
+        self.checkpoint = True # O "run()" grava "<nome>_checkpoint.json" junto com o flush do .csv (ver "politica_escrita")
+        self.retomada = None # O checkpoint carregado por "retomar()". O próximo "run()" continua dele
+
+        # ===== Equipamentos (ver "conectar()" e "herdar_conexao()")
+        self.sr510 = None # SR510
+        self.arduino = None # Monocromador
+
+    
+    # ========== Conexão ==========
+    def conectar(self, conexao_lock_in: dict, conexao_arduino: dict, tempo_limite: float=10.0):
+        """
+        Cria a conexao (abre o canal), por meio de "SR510", com o Lock-in e por meio de "Monocromador" com o Arduino.
+
+        Os dois equipamentos são conectados ao mesmo tempo (uma thread para cada) e cada um só é dado como pronto quando responde. Assim, o tempo de conexão é o do equipamento mais lento.
+
+        Args:
+            conexao_lock_in (dict): O dicionário a porta (porta) o baudrate (baudrate) e o timeout (timeot) para a conexão.
+            conexao_arduino (dict): O dicionário a porta (porta) o baudrate (baudrate) e o timeout (timeot) para a conexão.
+            tempo_limite (float, optional): Tempo máximo (em s) esperando cada equipamento ficar pronto. Defaults to 10.0.
+        """
+
+        self.sr510 = SR510(**conexao_lock_in) # Cria o objeto da classe "SR510"
+        self.arduino = Monocromador(**conexao_arduino)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            conexao_sr510 = executor.submit(self.sr510.conectar, tempo_limite) # Usa o método "conectar()" de "SR510" para criar a conexão computador-Lock-in
+            conexao_arduino = executor.submit(self.arduino.conectar, tempo_limite)
+
+            erros = [futuro.exception() for futuro in (conexao_sr510, conexao_arduino)]
+
+        if any(erros):
+            # Não deixa uma porta aberta caso a outra tenha falhado
+            if erros[0] is None:
+                self.sr510.fechar()
+            if erros[1] is None:
+                self.arduino.desconectar()
+            raise next(erro for erro in erros if erro)
+
+        if self.perfil:
+            self.arduino.definir_perfil(self.perfil)
+        if self.ajustar_espera:
+            self.sr510.ajustar_tempo_espera()
+
+        self.ler_dados_iniciais()
+
+    def ler_dados_iniciais(self):
+        """Coleta os dados iniciais dos equipamentos (a sensibilidade, que define a normalização das tensões)."""
+
+        raw_sensibilidade = self.sr510.ler_sensibilidade()
+        self.sensibilidade_str = raw_sensibilidade[0] # A string de sensibilidade
+        self.sensibilidade_ordem = raw_sensibilidade[3] # A ordem de grandeza da sensibilidade
+        self.sensibilidade_fundo = raw_sensibilidade[2] / raw_sensibilidade[3] # O fundo de escala, na unidade das tensões salvas
+
+    def herdar_conexao(self, anterior):
+        """
+        Usa as conexões já abertas de outro experimento, sem reconectar (ver "fila.py"). A grade precisa já estar em "comp_i" (ver "ir_para()").
+
+        Args:
+            anterior (Experimento): O experimento que abriu (ou herdou) as conexões
+        """
+
+        self.sr510 = anterior.sr510
+        self.arduino = anterior.arduino
+        if self.perfil is not anterior.perfil:
+            self.arduino.definir_perfil(self.perfil or PerfilMovimento(0, 0)) # vmax 0 --> volta ao potenciômetro
+        self.ler_dados_iniciais() # A troca automática de escala pode ter mudado a sensibilidade
+
+    def desconectar(self):
+        """Desconecta o computador do Lock-in e do Arduino. Sem conexão (ou com uma só), fecha o que estiver aberto."""
+
+        if self.sr510 is not None:
+            self.sr510.fechar()
+        if self.arduino is not None:
+            self.arduino.desconectar()
+
+
+    # ========== Responsividade ==========
+    def fechamento(self, evento):
+        """Função executada caso a janela de plotagem seja fechada. Encerra o programa."""
+
+        # Não uso o "evnto", mas preciso desse argumeto para o Matplot não reclamar
+        if self.evento_experimento_concluido:
+            return
+        
+        log.warning('AVISO: Janela fechada. Abortando experimento...')
+        self.abortar()
+
+    def tecla_pressionada(self, evento):
+        """
+        Função chamada quando o programa detecta a pressão em alguma tecla NA JANELA DE PLOTAGEM.
+
+        Args:
+            evento (_type_): O sinal do Matplotlib para a ativação da função. Carrega informações sobre o evento (qual a tecla...)
+        """
+
+        if evento.key == 'escape' or evento.key == 'q':
+            log.warning('AVISO: Tecla de parada pressionada. Encerrando...')
+            self.abortar()
+
+    def abortar(self):
+        """Pede a parada da varredura. Durante o "run_async()" também cancela a tarefa, que para na hora em vez de esperar o fim do ciclo. Pode ser chamada de qualquer thread."""
+
+        self.evento_abortar_experimento = True
+        if self.tarefa is not None:
+            self.tarefa.get_loop().call_soon_threadsafe(self.tarefa.cancel)
+
+    def inscrever(self, observador):
+        """
+        Registra uma função chamada a cada acontecimento da varredura, como "observador(evento, dados)":
+            - "inicio": nome (arquivo, sem extensão) e pontos (previstos)
+            - "ponto": comprimento_onda, tensao, pontos (já medidos) e ciclo_medio (s)
+            - "fim": resultado e pontos
+
+        Args:
+            observador (Callable): A função. Roda na thread da varredura, então precisa ser rápida
+        """
+
+        self.observadores.append(observador)
+
+    def notificar(self, evento: str, **dados):
+        """Avisa os observadores (ver "inscrever()")."""
+
+        for observador in self.observadores:
+            observador(evento, dados)
+
+    # ========== Gráfico ==========
+    @property
+    def buffer_x(self):
+        """Vista (sem cópia) dos comprimentos de onda já medidos."""
+
+        return self.buffer.x
+
+    @property
+    def buffer_y(self):
+        """Vista (sem cópia) dos sinais já medidos."""
+
+        return self.buffer.y
+
+    def inicializar_grafico(self):
+        """Prepara a janela do gráfico antes de começar o loop, além de ativar a interatividade. Sem "grafico_ao_vivo", não faz nada."""
+
+        if not self.grafico_ao_vivo:
+            return
+
+        # ========== Cria a janela e a linha ==========
+        plt = pyplot()
+        plt.ion() # Ativa o modo interativo
+        self.fig, self.ax = plt.subplots(figsize=(8, 5))
+        self.linha_grafico, = self.ax.plot([], [], 'ro-', ms=2.5, label='Sinal') # 'ro-' --> bola vermelha com linha
+
+        # ========== Conectar eventos a funções via Matplotlib ==========
+        self.fig.canvas.mpl_connect('close_event', self.fechamento) # Detecta se a janela foi fechada
+        self.fig.canvas.mpl_connect('key_press_event', self.tecla_pressionada) # Detecta teclas pressionada
+        
+        self.estilizar_eixos('Espectro em Tempo Real')
+        plt.tight_layout()
+        plt.show()
+
+        self.grafico = GraficoIncremental(self.ax, self.linha_grafico) # Só a linha é redesenhada a cada ponto
+
+    def estilizar_eixos(self, titulo: str):
+        """Título, legendas e limites em x do gráfico do espectro."""
+
+        self.ax.set_title(titulo)
         self.ax.set_xlabel('Comprimento de Onda (Å)')
         self.ax.set_ylabel(f'Sinal ({self.sensibilidade_str})')
         self.ax.grid(True)
         self.ax.legend(loc='upper left')
         self.ax.set_xlim(min(self.comp_i, self.comp_f), max(self.comp_i, self.comp_f)) # Limites em x
-        plt.tight_layout()
-        plt.show()
 
     def atualizar_grafico(self):
-        """Atualiza constantemente o gráfico, corrigindo os limites do eixo y para que o gráfico sempre seja visível."""
+        """Atualiza constantemente o gráfico, corrigindo os limites do eixo y para que o gráfico sempre seja visível. Só o último ponto do buffer é processado."""
 
         if self.linha_grafico:
-            self.linha_grafico.set_data(self.buffer_x, self.buffer_y) # Atualiza o gráfico
-            margem = (max(self.buffer_y) - min(self.buffer_y)) * 0.1 # Margem do gráfico
-            self.ax.set_ylim(min(self.buffer_y) - margem, max(self.buffer_y) + margem) # Limites em y (escala)
-            self.fig.canvas.draw()
+            reescalou = self.grafico.adicionar(self.buffer_x[-1], self.buffer_y[-1]) # Limites em y (escala) só quando necessário
+            self.grafico.desenhar(reescalou)
             self.fig.canvas.flush_events()
 
+    def pausa_grafico(self):
+        """Deixa a janela do gráfico responder (teclas, fechamento) entre dois pontos. Sem gráfico ao vivo, segue direto para o próximo ponto."""
+
+        if self.linha_grafico:
+            pyplot().pause(0.01) # Permitir a interatividade durante a execução. É uma pausa
+
 
     # ========== Funcionalidades ==========
     def calcula_passo(self):
@@ -432,35 +1694,32 @@ class Experimento:
 
         return int(novo_total_pontos), int(step), round(novo_passo_a, 3)
     
-    def cria_arquivo_csv(self):
-        """Cria o arquivo .csv para receber os dados coletados no exeperiemento"""
-
-        def nome_excludente(nome_base: str, pasta='Gráficos'):
-            """
-            Cria o nome do arquivo .csv em que serão armazenados os dados do experiemnto. Garante que o nome é único.
-
-            Args:
-                nome_base (str): O nome original (escolhido pelo usuário) do arquivo
-                pasta (str, optional): O caminho em que o arquivo será salvo. Defaults to '.'
-
-            Returns:
-                str: Um nome de arquivo que não está no caminho expecificado
-            """
+    def metadados_estruturados(self):
+        """Os metadados do experimento como dicionário (cabeçalho do .bin e registro no catálogo)."""
+
+        return {
+            'descricao': self.descricao,
+            'data': str(self.hoje),
+            'hora': str(self.tempo_atual),
+            'operador': self.operador,
+            'comp_i': self.comp_i,
+            'comp_f': self.comp_f,
+            'tamanho_fenda': self.tamanho_fenda,
+            'ppr': self.ppr,
+            'sensibilidade': self.sensibilidade_str,
+            'passagens': self.passagens
+        }
 
-            from pathlib import Path
+    def colunas_saida(self):
+        """As colunas do arquivo principal: o espectro médio e o erro com várias passagens, ou cada leitura com a sensibilidade usada."""
 
-            pasta = Path(pasta)
-            pasta.mkdir(exist_ok=True)
-            nome_base = Path(nome_base).stem
-            arquivo = pasta / f'{nome_base}.csv'
+        if self.passagens > 1:
+            return ('comprimento_onda', 'tensao', 'erro')
+        return ('comprimento_onda', 'tensao', 'sensibilidade')
 
-            contador = 1
-            while arquivo.exists():
-                arquivo = pasta / f'{nome_base}_{contador}.csv'
-                contador += 1
+    def cria_arquivo_csv(self):
+        """Cria o arquivo .csv para receber os dados coletados no exeperiemento"""
 
-            return pasta / arquivo.stem
-        
         #region Metadados
         self.metadados = [
             f'# Experimento: {self.descricao}',
@@ -472,156 +1731,1114 @@ class Experimento:
             f'# Ponto Por Resolução (PPR): {self.ppr}',
             f'# Sensibilidade: {self.sensibilidade_str}'
         ]
+        if self.passagens > 1:
+            self.metadados.append(f'# Passagens: {self.passagens}')
+        self.metadados.append(f'# Colunas: {", ".join(self.colunas_saida())}')
         #endregion
-        self.nome_exclusivo = nome_excludente(self.nome_arquivo)
+        self.catalogo = Catalogo(self.pasta_saida)
+        self.nome_exclusivo = self.catalogo.registrar(self.nome_arquivo, self.metadados_estruturados()) # Nome único, em O(1)
         self.nome_arquivo_csv = f'{self.nome_exclusivo}.csv'
-        with open(self.nome_arquivo_csv, 'a', newline='', encoding='utf-8') as log:
 
-            for linha in self.metadados: # Escreve os metadados
-                log.write(linha + '\n')
-            
-            log.write('#' + '-'*25 + '\n') # Uma linha divisória para ficar bonito e legível
+        # Os arquivos ficam abertos durante toda a execução. Fechados em "run()"
+        escritor_csv = EscritorCSV(self.nome_arquivo_csv, **self.politica_escrita)
+        escritor_csv.escrever_cabecalho(self.metadados)
+        self.escritores = [escritor_csv]
+
+        if 'bin' in self.formatos_saida:
+            self.nome_arquivo_bin = f'{self.nome_exclusivo}.bin'
+            escritor_bin = EscritorBinario(self.nome_arquivo_bin, self.buffer.capacidade, self.colunas_saida(), **self.politica_escrita)
+            escritor_bin.escrever_cabecalho(dict(self.metadados_estruturados(), linhas=self.metadados)) # As mesmas linhas do .csv
+            self.escritores.append(escritor_bin)
 
     def escreve_eventos(self):
         """Escreve, ao final, os eventos que ocorreram durande a execução"""
-        with open(self.nome_arquivo_csv, 'a', newline='', encoding='utf-8') as log:
 
-            log.write('#' + '-'*25 + '\n') # Uma linha divisória para ficar bonito
-            for linha in self.eventos: # Escreve os eventos
-                log.write(linha + '\n')
+        for escritor in self.escritores:
+            escritor.escrever_eventos(self.eventos)
+
+    def fecha_arquivos(self):
+        """Descarrega e fecha todos os arquivos de saída."""
+
+        for escritor in self.escritores:
+            escritor.fechar(abortado=self.evento_abortar_experimento)
 
     # ========== Operação ==========
-    def coletar_dados(self):
-        """Coleta os dados do experimento e os salva no arquivo .csv e na forma de listas (buffer) do próprio objeto"""
+    def ler_lock_in(self):
+        """
+        Lê a saída do Lock-in. Com "auto_escala", uma leitura em sobrecarga (bit de sobrecarga do byte de estado ou acima de "limite_sobrecarga" do fundo de escala) sobe a sensibilidade um degrau e uma leitura muito baixa (abaixo de "limite_subescala") desce para a escala em que ela fica abaixo da metade do fundo, no máximo "descida_maxima" códigos por leitura. Depois de cada troca o programa espera "espera_escala" segundos e lê o mesmo ponto de novo.
 
-        def salvar_linha(dados):
-            """
-            Salva os dados que foram fornecidos no arquivo .csv do experimento no formato csv
+        Returns:
+            tuple: (tensão em V, código da sensibilidade da leitura)
+        """
 
-            Args:
-                dados (Any): O  que será escrito no arquivo.
-            """
+        for _ in range(len(TABELA_SENSIBILIDADE)):
+            if not self.auto_escala:
+                return self.sr510.ler_valor_saida(), self.sr510.sensibilidade # Saída do Lock-in
 
-            # Implementar a lógica de verifica se o arquivo foi criado
-            from csv import writer
-            with open(self.nome_arquivo_csv, 'a', newline='', encoding='utf-8') as log:
-                writer = writer(log)
-                writer.writerow(dados)
-        
-        raw_tensao = self.sr510.ler_valor_saida() # Saída do Lock-in
-        tensao = round((raw_tensao / self.sensibilidade_ordem), 3)
+            valor, estado = self.sr510.ler_saida_e_estado() # Saída e sobrecarga na mesma ida e volta
+            codigo = self.sr510.sensibilidade
+            novo = self.nova_escala(valor, estado, codigo)
+            if novo is None:
+                return valor, codigo
+
+            self.trocar_escala(self.sr510, codigo, novo, valor)
+            sleep(self.espera_escala) # O Lock-in precisa assentar na nova escala
+
+        return valor, codigo
+
+    async def ler_lock_in_async(self, lock_in: SR510Assincrono):
+        """Versão assíncrona de "ler_lock_in()". A espera depois de cada troca de escala libera o loop."""
+
+        for _ in range(len(TABELA_SENSIBILIDADE)):
+            if not self.auto_escala:
+                return await lock_in.ler_valor_saida(), lock_in.sensibilidade
+
+            valor, estado = await lock_in.ler_saida_e_estado()
+            codigo = lock_in.sensibilidade
+            novo = self.nova_escala(valor, estado, codigo)
+            if novo is None:
+                return valor, codigo
+
+            self.trocar_escala(lock_in, codigo, novo, valor)
+            await asyncio.sleep(self.espera_escala)
+
+        return valor, codigo
+
+    def nova_escala(self, valor: float, estado: int, codigo: int):
+        """
+        Decide a troca de sensibilidade depois de uma leitura (ver "ler_lock_in()").
+
+        Args:
+            valor (float): A saída lida (V). None se a leitura falhou
+            estado (int): O byte de estado
+            codigo (int): O código da sensibilidade da leitura
+
+        Returns:
+            int | None: O novo código, ou None se a escala está boa
+        """
+
+        if valor is None:
+            return None
+
+        fundo = TABELA_SENSIBILIDADE[codigo][2]
+        sobrecarga = abs(valor) >= self.limite_sobrecarga * fundo or bool((estado or 0) & BIT_SOBRECARGA)
+        if sobrecarga and codigo < 24:
+            return codigo + 1
+        if abs(valor) < self.limite_subescala * fundo and codigo > self.escala_minima:
+            # Uma leitura 0 (abaixo da resolução da escala) passa em qualquer teste: sem o limite, desceria direto para "escala_minima" e subiria de volta um degrau por sobrecarga
+            primeiro = max(self.escala_minima, codigo - self.descida_maxima)
+            return next(c for c in range(primeiro, codigo) if abs(valor) < 0.5 * TABELA_SENSIBILIDADE[c][2] or c == codigo - 1)
+        return None
+
+    def trocar_escala(self, lock_in, codigo: int, novo: int, valor: float):
+        """Envia a nova sensibilidade ao Lock-in ("SR510" ou "SR510Assincrono") e registra a troca nos eventos."""
+
+        lock_in.set_sensibilidade(novo)
+        self.eventos.append(f'# [{datetime.now().time()}]: Sensibilidade {TABELA_SENSIBILIDADE[codigo][0]} --> {TABELA_SENSIBILIDADE[novo][0]} em {round(self.comp_atual, 3)}Å (leitura: {valor} V)')
+        log.info(f'Lock-in: Sensibilidade {TABELA_SENSIBILIDADE[codigo][0]} --> {TABELA_SENSIBILIDADE[novo][0]}')
+
+    def medir_ponto(self):
+        """
+        Lê o Lock-in na posição atual do monocromador (com a troca automática de escala, ver "ler_lock_in()"). Não salva nada.
+
+        Returns:
+            tuple: Uma tupla (comprimento de onda em Å, tensão normalizada pela ordem de grandeza da sensibilidade inicial, código da sensibilidade da leitura).
+        """
+
+        return self.ponto_medido(*self.ler_lock_in())
+
+    async def medir_ponto_async(self, lock_in: SR510Assincrono):
+        """Versão assíncrona de "medir_ponto()"."""
+
+        return self.ponto_medido(*await self.ler_lock_in_async(lock_in))
+
+    def ponto_medido(self, raw_tensao: float, codigo: int):
+        """
+        Normaliza uma leitura do Lock-in e junta o comprimento de onda atual.
+
+        Args:
+            raw_tensao (float): A saída lida (V)
+            codigo (int): O código da sensibilidade da leitura
+
+        Returns:
+            tuple: (comprimento de onda em Å, tensão normalizada, código da sensibilidade). Ver "medir_ponto()".
+        """
+
+        # A normalização é sempre a da sensibilidade do início (a curva não "pula" quando a escala muda). As casas decimais acompanham a escala atual
+        casas = 3 + round(np.log10(self.sensibilidade_ordem / TABELA_SENSIBILIDADE[codigo][3])) if codigo in TABELA_SENSIBILIDADE else 3
+        tensao = round((raw_tensao / self.sensibilidade_ordem), max(casas, 0))
         comprimento_onda = round(self.comp_atual, 3) # Vem da movimentação do motor
-        salvar_linha((comprimento_onda, tensao)) # Salva os dados
+
+        return comprimento_onda, tensao, codigo
+
+    def salvar_ponto(self, comprimento_onda: float, tensao: float, sensibilidade: int=None):
+        """
+        Salva um ponto medido nos arquivos de saída (.csv e, se pedido, .bin) e no buffer (arrays NumPy) do próprio objeto.
+
+        Args:
+            comprimento_onda (float): O comprimento de onda (Å) em que o ponto foi medido
+            tensao (float): A tensão lida
+            sensibilidade (int, optional): O código da sensibilidade usada na leitura. Defaults to None.
+        """
+
+        for escritor in self.escritores:
+            escritor.escrever_linha((comprimento_onda, tensao, np.nan if sensibilidade is None else sensibilidade)) # Salva os dados (os arquivos já estão abertos)
 
         # ===== Alimenta o buffer para o gráfico
-        self.buffer_x.append(comprimento_onda)
-        self.buffer_y.append(tensao)
+        self.buffer.adicionar(comprimento_onda, tensao)
+        self.notificar_ponto(comprimento_onda, tensao)
+
+    def notificar_ponto(self, comprimento_onda: float, tensao: float):
+        """Avisa os observadores de um novo ponto no buffer."""
+
+        if self.observadores:
+            self.notificar('ponto', comprimento_onda=comprimento_onda, tensao=tensao, pontos=len(self.buffer), ciclo_medio=self.metricas.media_ciclo if self.metricas else None)
+
+    def coletar_dados(self):
+        """Coleta os dados do experimento e os salva no arquivo .csv e no buffer (arrays NumPy) do próprio objeto"""
+
+        self.salvar_ponto(*self.medir_ponto())
+
+    def move_motor(self, step, passo_a, esperar: bool=True, plano: bool=False, folga: int=0):
+        """
+        Movimenta o motor do monocromador com base em passos de motor (steps)
+
+        Args:
+            step (int): O número de steps que o motor vai andar
+            passo_a (float): O passo correspondente em Å
+            esperar (bool, optional): Se False, apenas envia o comando e retorna o movimento em andamento. Defaults to True.
+            plano (bool, optional): Avança um ponto do plano já carregado no Arduino (ver "Monocromador.carregar_plano()") em vez de enviar o número de steps. Defaults to False.
+            folga (int, optional): Steps extras enviados para recolher a folga mecânica. Não contam na posição da grade. Defaults to 0.
 
-    def move_motor(self, step, passo_a):
-        """Movimenta o motor do monocromador com base em passos de motor (steps)"""
+        Returns:
+            MovimentoMotor | None: O movimento em andamento quando "esperar" é False.
+        """
 
-        print(f'Motor: {step} steps -- {passo_a}Å...')
-        print(f'Posição atual: {round(self.comp_atual, 3)}Å')
+        log.debug(f'Motor: {step} steps -- {passo_a}Å (posição atual: {round(self.comp_atual, 3)}Å)')
         self.comp_atual += passo_a # Atualiza onde o programa está no espectro
-        self.arduino.mover_motor(step)
+        self.posicao_steps += step
+
+        if plano:
+            movimento = self.arduino.avancar() # Os steps já estão no plano carregado
+        else:
+            movimento = self.arduino.iniciar_movimento(step + folga)
+
+        if not esperar:
+            return movimento
+        movimento.aguardar()
+
+    def move_motor_async(self, arduino: MonocromadorAssincrono, step, passo_a, plano: bool=False):
+        """
+        Versão assíncrona de "move_motor()". A posição é atualizada na hora e o movimento roda em uma tarefa separada.
+
+        Args:
+            arduino (MonocromadorAssincrono): O monocromador
+            step (int): O número de steps que o motor vai andar
+            passo_a (float): O passo correspondente em Å
+            plano (bool, optional): Avança um ponto do plano já carregado no Arduino. Defaults to False.
+
+        Returns:
+            asyncio.Task: O movimento em andamento. Termina com a confirmação do Arduino.
+        """
+
+        log.debug(f'Motor: {step} steps -- {passo_a}Å (posição atual: {round(self.comp_atual, 3)}Å)')
+        self.comp_atual += passo_a
+        self.posicao_steps += step
+
+        return asyncio.ensure_future(arduino.avancar() if plano else arduino.mover_motor(step))
+
+    def mover_para(self, indice_atual: int, indice_destino: int, step: int, passo_a: float, esperar: bool=True):
+        """
+        Leva a grade de um ponto da grade fina (índice) a outro. Quando o destino fica para trás, a grade volta "folga" steps a mais e termina o movimento para a frente: toda medida é feita com a grade chegando pelo mesmo lado, sem o erro da folga mecânica.
+
+        Args:
+            indice_atual (int): O índice (na grade fina) em que a grade está
+            indice_destino (int): O índice de destino
+            step (int): Os steps entre dois pontos da grade fina
+            passo_a (float): O passo correspondente em Å
+            esperar (bool, optional): Se False, apenas envia o comando (movimentos para a frente) e retorna o movimento em andamento. Defaults to True.
+
+        Returns:
+            MovimentoMotor | None: O movimento em andamento quando "esperar" é False e o destino está à frente.
+        """
+
+        pontos = indice_destino - indice_atual
+        if pontos >= 0:
+            return self.move_motor(pontos * step, pontos * passo_a, esperar)
+
+        self.move_motor(pontos * step, pontos * passo_a, folga=-self.folga) # Passa do ponto...
+        if self.folga:
+            self.arduino.mover_motor(self.folga) # ...e volta para a frente, recolhendo a folga
+
+    def voltar_ao_inicio(self):
+        """
+        Leva a grade de volta a "comp_i" em um único movimento (rápido com um "perfil" trapezoidal), chegando pela frente como em "mover_para()". Substitui o retorno manual entre experimentos.
+        """
+
+        self.ir_para(self.comp_i)
+
+    def ir_para(self, comprimento_onda: float, posicao_steps: int=None):
+        """
+        Leva a grade a qualquer comprimento de onda em um único movimento, chegando pela frente como em "mover_para()". Os steps saem da posição da grade em steps, sem o erro acumulado dos passos arredondados.
+
+        Args:
+            comprimento_onda (float): O destino (Å)
+            posicao_steps (int, optional): O destino em steps a partir de "comp_i", quando ele já é conhecido (ex: um ponto da varredura, "i * step"). Defaults to None (convertido de "comprimento_onda").
+        """
+
+        if posicao_steps is None:
+            posicao_steps = round((comprimento_onda - self.comp_i) * Experimento.fator_calibracao)
+        steps = posicao_steps - self.posicao_steps
+        if not steps:
+            return
+
+        if self.perfil:
+            log.info(f'PC: Indo para {comprimento_onda}Å ({steps} steps, ~{round(self.perfil.duracao(steps), 1)} s)...')
+        self.move_motor(steps, comprimento_onda - self.comp_atual, folga=-self.folga if steps < 0 else 0)
+        if steps < 0 and self.folga:
+            self.arduino.mover_motor(self.folga)
+        self.comp_atual = comprimento_onda
+
+    # ========== Varredura ==========
+    def iniciar_varredura(self, capacidade: int, retomar: bool=False):
+        """
+        Prepara buffer, gráfico, arquivos e métricas para uma varredura.
+
+        Args:
+            capacidade (int): O número de pontos previstos
+            retomar (bool, optional): Reabre os arquivos do checkpoint carregado (ver "retomar()") em vez de criar novos. Defaults to False.
+        """
+
+        self.buffer.limpar() # Os pontos de uma varredura anterior do mesmo objeto não entram nesta (os de uma retomada voltam em "recarregar_pontos()")
+        self.buffer.reservar(capacidade) # Memória fixa durante a varredura
+        self.inicializar_grafico()
+        if retomar:
+            log.info('PC: Reabrindo o arquivo .csv...')
+            pontos = self.reabrir_arquivos()
+        else:
+            log.info('PC: Criando o arquivo .csv...')
+            self.cria_arquivo_csv()
+            pontos = []
+        log.info('PC: Iniciando o experimento...')
+        self.metricas = MetricasCiclo()
+        self.notificar('inicio', nome=str(self.nome_exclusivo), pontos=capacidade)
+        self.recarregar_pontos(pontos)
+
+    def verifica_abortar(self):
+        """
+        Verifica se ocorreu o pedido de parada (e registra o evento).
+
+        Returns:
+            bool: True se a varredura deve parar
+        """
+
+        if self.evento_abortar_experimento:
+            log.warning('Experimento interrompido pelo usuário.')
+            self.eventos.append(f'# [{self.tempo_atual}]: O experimento foi interrompido pelo usuário')
+        return self.evento_abortar_experimento
+
+    def encerrar_varredura(self, resultado: str):
+        """
+        Registra os eventos e as métricas, fecha os arquivos, atualiza o catálogo e desconecta os equipamentos. Chamada mesmo se a varredura falhar.
+
+        Args:
+            resultado (str): "concluído" ou "erro". Vira "abortado" se o usuário interrompeu a varredura.
+        """
+
+        log.info('PC: Finalizando conexões...')
+        if not self.evento_abortar_experimento:
+            log.info('PC: Experimento concluído.')
+            self.eventos.append(f'Conclusão: [{self.tempo_atual}]')
+        self.eventos.extend(self.metricas.linhas_resumo())
+        if self.salvar_metricas:
+            self.metricas.salvar(f'{self.nome_exclusivo}_metricas.csv')
+        self.escreve_eventos()
+        self.fecha_arquivos()
+        if self.evento_abortar_experimento and resultado == 'concluído':
+            resultado = 'abortado'
+        self.catalogo.atualizar_resultado(self.nome_exclusivo, resultado, len(self.buffer))
+        self.notificar('fim', resultado=resultado, pontos=len(self.buffer))
+        self.resultado = resultado
+        if self.voltar_ao_final and resultado != 'erro':
+            self.voltar_ao_inicio()
+        if not self.manter_conexao:
+            self.desconectar()
+
+    def mostrar_resultado(self, erro: np.ndarray=None):
+        """
+        Deixa o gráfico na tela (e salvo em .jpg) ao final do experimento. Sem "figura_final", não faz nada.
+
+        Sem gráfico ao vivo, a figura é montada aqui, fora do pyplot (sem janela), só para ser salva.
+
+        Args:
+            erro (np.ndarray, optional): Erro padrão de cada ponto, desenhado como uma faixa em volta do sinal (ver "run_passagens()"). Defaults to None.
+        """
+
+        if not self.figura_final:
+            return
+
+        if self.linha_grafico is None:
+            from matplotlib.figure import Figure
+            self.fig = Figure(figsize=(8, 5))
+            self.ax = self.fig.add_subplot()
+            self.ax.plot(self.buffer_x, self.buffer_y, 'ro-', ms=2.5, label='Sinal')
+            self.estilizar_eixos('Espectro')
+        else:
+            self.grafico.finalizar(self.buffer_x, self.buffer_y)
+
+        if erro is not None:
+            self.ax.fill_between(self.buffer_x, self.buffer_y - erro, self.buffer_y + erro, alpha=0.3, label='Erro padrão')
+
+        self.fig.tight_layout()
+        self.fig.savefig(f'{self.nome_exclusivo}.jpg')
+        if self.linha_grafico is None:
+            return
+
+        plt = pyplot()
+        plt.ioff()
+        if self.mostrar_janela:
+            plt.show()
+        else:
+            plt.close(self.fig)
+
+    # ========== Checkpoint ==========
+    @property
+    def caminho_checkpoint(self):
+        return f'{self.nome_exclusivo}_checkpoint.json'
+
+    def salvar_checkpoint(self, pontos: int, plano: dict, fechado: bool=False):
+        """
+        Grava o estado da varredura em "<nome>_checkpoint.json": o suficiente para "retomar()" continuar do ponto seguinte, no mesmo arquivo. A escrita é atômica (arquivo temporário + "os.replace"): um checkpoint nunca fica pela metade.
+
+        Args:
+            pontos (int): Quantos pontos já estão no disco
+            plano (dict): total_pontos, step e passo_a da varredura (ver "calcula_passo()")
+            fechado (bool, optional): Checkpoint gravado depois que a varredura parou (ver "encerrar_checkpoint()"): nenhum movimento foi enviado depois dele. Defaults to False.
+        """
+
+        estado = {
+            'parametros': {
+                'nome_arquivo': self.nome_arquivo,
+                'operador': self.operador,
+                'comp_i': self.comp_i,
+                'comp_f': self.comp_f,
+                'tamanho_fenda': self.tamanho_fenda * 1000, # mm --> micro metro, como no construtor
+                'ppr': self.ppr,
+                'descricao': self.descricao
+            },
+            'nome_exclusivo': str(self.nome_exclusivo),
+            'pasta_saida': self.pasta_saida,
+            'formatos_saida': list(self.formatos_saida),
+            'data': str(self.hoje),
+            'hora': str(self.tempo_atual),
+            'plano': plano,
+            'pontos': pontos,
+            'comp_atual': self.comp_atual,
+            'posicao_steps': self.posicao_steps, # Inclui o movimento já enviado para o próximo ponto
+            'fechado': fechado,
+            'folga': self.folga,
+            'perfil': [self.perfil.vmax, self.perfil.acel] if self.perfil else None,
+            'sensibilidade': self.sr510.sensibilidade, # Código em uso agora (troca automática de escala)
+            'sensibilidade_str': self.sensibilidade_str, # Normalização do início da varredura
+            'sensibilidade_ordem': self.sensibilidade_ordem,
+            'sensibilidade_fundo': self.sensibilidade_fundo
+        }
+
+        temporario = self.caminho_checkpoint + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False, default=float)
+        os.replace(temporario, self.caminho_checkpoint)
+
+    @classmethod
+    def retomar(cls, caminho: str):
+        """
+        Cria o experimento de uma varredura interrompida (abortada, com erro ou com o programa fechado) a partir do seu checkpoint. Depois do "conectar()", o "run()" reabre o mesmo arquivo e continua do ponto seguinte ao último salvo.
+
+        Só o "run()" grava checkpoints e só ele retoma: "run_async()", "run_adaptativo()" e "run_passagens()" recusam um experimento retomado (RuntimeError).
+
+        A posição da grade vem do checkpoint: não mexa no monocromador entre a interrupção e a retomada. Ela só é exata se a varredura parou com o programa ainda rodando (abortada, com erro ou com Ctrl+C). Se o programa morreu no meio da varredura, o último checkpoint é o do último flush do .csv e a grade pode ter andado mais alguns pontos depois dele.
+
+        Args:
+            caminho (str): O arquivo "<nome>_checkpoint.json"
+
+        Returns:
+            Experimento: O experimento, ainda desconectado
+        """
+
+        with open(caminho, encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        if not estado.get('fechado'):
+            log.warning(f'PC: O checkpoint "{caminho}" não foi fechado (o programa morreu no meio da varredura): a grade pode ter andado alguns pontos além do ponto {estado["pontos"]}. Confira a posição antes de continuar.')
+
+        experimento = cls(**estado['parametros'])
+        experimento.nome_exclusivo = estado['nome_exclusivo']
+        experimento.pasta_saida = estado['pasta_saida']
+        experimento.formatos_saida = tuple(estado['formatos_saida'])
+        inicio = datetime.fromisoformat(f'{estado["data"]}T{estado["hora"]}')
+        experimento.hoje, experimento.tempo_atual = inicio.date(), inicio.time() # Os metadados continuam os do início
+        experimento.comp_atual = estado['comp_atual']
+        experimento.posicao_steps = estado['posicao_steps']
+        experimento.folga = estado['folga']
+        experimento.perfil = PerfilMovimento(*estado['perfil']) if estado['perfil'] else None
+        experimento.retomada = estado
+        return experimento
+
+    def preparar_retomada(self, plano: dict):
+        """
+        Confere que a varredura é a mesma do checkpoint e devolve ao Lock-in a sensibilidade em uso na interrupção. As tensões continuam normalizadas pela sensibilidade do início da varredura.
+
+        Args:
+            plano (dict): total_pontos, step e passo_a calculados agora
+
+        Raises:
+            ValueError: Caso o plano não seja o do checkpoint
+        """
+
+        if plano != self.retomada['plano']:
+            raise ValueError(f'O plano da varredura ({plano}) não é o do checkpoint ({self.retomada["plano"]})')
+
+        self.sensibilidade_str = self.retomada['sensibilidade_str']
+        self.sensibilidade_ordem = self.retomada['sensibilidade_ordem']
+        self.sensibilidade_fundo = self.retomada['sensibilidade_fundo']
+        codigo = self.retomada['sensibilidade']
+        if codigo is not None and codigo != self.sr510.sensibilidade:
+            self.sr510.set_sensibilidade(codigo)
+            sleep(self.espera_escala)
+
+    def reabrir_arquivos(self):
+        """
+        Reabre os arquivos de uma varredura retomada. O .csv é cortado logo depois do último ponto do checkpoint (pontos gravados depois dele e uma linha pela metade, de um programa que caiu, são descartados) e os eventos que já estavam no final voltam para "eventos". O .bin, se pedido, é refeito com os mesmos pontos.
+
+        Returns:
+            list: Os pontos já salvos (uma lista de valores por linha)
+        """
+
+        self.catalogo = Catalogo(self.pasta_saida)
+        self.nome_arquivo_csv = f'{self.nome_exclusivo}.csv'
+        n_colunas = len(self.colunas_saida())
+
+        self.metadados, pontos, eventos = [], [], []
+        fins = [] # Posição (em bytes) do fim de cada linha de dados
+        secao = 'metadados' # metadados --> dados --> eventos
+        fim_cabecalho = posicao = 0
+        with open(self.nome_arquivo_csv, 'rb') as arquivo:
+            for linha in arquivo:
+                posicao += len(linha)
+                texto = linha.decode('utf-8').rstrip('\r\n')
+                if secao == 'metadados':
+                    if texto.startswith('#---'):
+                        secao = 'dados'
+                        fim_cabecalho = posicao
+                    else:
+                        self.metadados.append(texto)
+                elif secao == 'dados':
+                    if texto.startswith('#'):
+                        secao = 'eventos'
+                        continue
+                    try:
+                        valores = [float(valor) for valor in texto.split(',')]
+                    except ValueError:
+                        break
+                    if len(valores) != n_colunas or not linha.endswith(b'\n'):
+                        break # Linha cortada: o fim do arquivo
+                    pontos.append(valores)
+                    fins.append(posicao)
+                elif texto and not texto.startswith('#---'):
+                    eventos.append(texto)
+
+        pontos = pontos[:self.retomada['pontos']] # Pontos gravados depois do checkpoint são medidos de novo
+        with open(self.nome_arquivo_csv, 'r+b') as arquivo:
+            arquivo.truncate(fins[len(pontos) - 1] if pontos else fim_cabecalho)
+
+        self.escritores = [EscritorCSV(self.nome_arquivo_csv, **self.politica_escrita)] # Modo "append": continua depois do último ponto
+        if 'bin' in self.formatos_saida:
+            self.nome_arquivo_bin = f'{self.nome_exclusivo}.bin'
+            escritor_bin = EscritorBinario(self.nome_arquivo_bin, self.buffer.capacidade, self.colunas_saida(), **self.politica_escrita)
+            escritor_bin.escrever_cabecalho(dict(self.metadados_estruturados(), linhas=self.metadados))
+            for valores in pontos:
+                escritor_bin.escrever_linha(valores)
+            self.escritores.append(escritor_bin)
+
+        self.eventos = eventos + self.eventos
+        self.catalogo.atualizar_resultado(self.nome_exclusivo, 'em andamento', len(pontos))
+        return pontos
+
+    def recarregar_pontos(self, pontos: list):
+        """Devolve ao buffer, ao gráfico e aos observadores os pontos já salvos de uma varredura retomada."""
+
+        for comprimento_onda, tensao, *_ in pontos:
+            self.buffer.adicionar(comprimento_onda, tensao)
+            self.notificar_ponto(comprimento_onda, tensao)
+            self.atualizar_grafico()
+
+    def encerrar_checkpoint(self, plano: dict):
+        """
+        Apaga o checkpoint de uma varredura concluída. Se ela foi interrompida, grava o checkpoint final (com os arquivos já fechados e a posição de todos os movimentos enviados) e diz como retomá-la.
+
+        Args:
+            plano (dict): total_pontos, step e passo_a da varredura
+        """
+
+        if self.resultado == 'concluído':
+            if os.path.exists(self.caminho_checkpoint):
+                os.remove(self.caminho_checkpoint)
+        elif self.checkpoint:
+            self.salvar_checkpoint(len(self.buffer), plano, fechado=True)
+            log.info(f'PC: Para continuar de onde parou: python pyce.py --retomar "{self.caminho_checkpoint}" (ou "Experimento.retomar()")')
 
     def run(self):
         """
         Uma função para rodar um experimento inteiro, i.e., coletar dados, mover motores e salvar o arquivo .csv
 
+        Grava um checkpoint (ver "salvar_checkpoint()") sempre que o .csv é descarregado no disco e outro ao parar. Um experimento criado por "retomar()" continua do ponto seguinte ao último salvo.
+
         Args:
             conexao (dict): Um dicionário com as chaves porta (porta) e o bound rate (baudrate) da comunicação Serial
         """
 
         total_pontos, step, passo_a = self.calcula_passo()
-        print('PC: Criando o arquivo .csv...')
-        self.inicializar_grafico()
-        self.cria_arquivo_csv()
-        sleep(1.5)
-        print('PC: Iniciando o experimento...\n', '#'*25)
-        sleep(2.5)
-
-        for i in range(total_pontos):
-            tempo_i = perf_counter()
-
-            # Verifica se ocorreu o pedido de parada
-            if self.evento_abortar_experimento:
-                print('Experimento interrompido pelo usuário.')
-                self.eventos.append(f'# [{self.tempo_atual}]: O experimento foi interrompido pelo usuário')
-                break
+        plano = {'total_pontos': total_pontos, 'step': step, 'passo_a': passo_a}
+        if self.retomada:
+            self.preparar_retomada(plano)
+        self.iniciar_varredura(total_pontos, retomar=self.retomada is not None)
+        inicio = len(self.buffer) # Pontos já salvos antes da interrupção. 0 numa varredura nova
+
+        resultado = 'concluído'
+        movimento = None # O movimento do motor que ainda não foi confirmado pelo Arduino
+        try:
+            if self.retomada:
+                log.info(f'PC: Retomando no ponto {inicio + 1}/{total_pontos} ({round(self.comp_i + inicio * passo_a, 3)}Å)...')
+                self.eventos.append(f'# [{datetime.now().time()}]: Varredura retomada no ponto {inicio + 1} de {total_pontos}')
+                self.ir_para(self.comp_i + inicio * passo_a, inicio * step) # A grade pode estar um ponto à frente (movimento já enviado) ou atrás (pontos perdidos no buffer). Em steps: o "passo_a" arredondado sairia da grade dos pontos
+                self.retomada = None
+            if self.usar_plano:
+                self.arduino.carregar_plano(step, total_pontos - inicio) # Um movimento depois de cada ponto: cada ciclo vira um byte de ida e um de volta
+            if self.perfil:
+                log.info(f'PC: Movimento previsto: {round(1000 * self.perfil.duracao(step), 1)} ms por ponto, {round(total_pontos * self.perfil.duracao(step), 1)} s no total')
+            if self.checkpoint:
+                self.salvar_checkpoint(inicio, plano)
+
+            for i in range(inicio, total_pontos):
+                tempo_i = perf_counter()
+
+                # Verifica se ocorreu o pedido de parada
+                if self.verifica_abortar():
+                    break
+
+                # Medir --> mover (sem esperar) --> salvar e plotar enquanto a grade anda --> esperar o Arduino --> Medir...
+                if movimento:
+                    movimento.aguardar() # Só bloqueia logo antes da próxima leitura do Lock-in
+                t_espera = perf_counter()
+                ponto = self.medir_ponto()
+                t_lock_in = perf_counter()
+                movimento = self.move_motor(step, passo_a, esperar=False, plano=self.usar_plano)
+                t_motor = perf_counter()
+                self.salvar_ponto(*ponto)
+                if self.checkpoint and self.escritores[0].pontos_pendentes == 0:
+                    self.salvar_checkpoint(i + 1, plano) # O .csv acabou de ir para o disco
+                t_arquivo = perf_counter()
+                self.atualizar_grafico()
+                self.pausa_grafico()
+
+                tempo_f = perf_counter()
+                self.metricas.registrar(
+                    lock_in=t_lock_in - t_espera,
+                    motor=(t_espera - tempo_i) + (t_motor - t_lock_in), # Espera pelo Arduino + envio do comando
+                    arquivo=t_arquivo - t_motor,
+                    grafico=tempo_f - t_arquivo,
+                    ciclo=tempo_f - tempo_i
+                )
+
+                # ===== Calcula o tempo que será gasto (média móvel dos ciclos)
+                tempo_total = round(self.metricas.tempo_restante(total_pontos - i - 1), 1) # i: 0 --> total_pontos - 1
+                minutos, segundos = tempo_total // 60, tempo_total % 60
+                log.info(f"Ciclo {i+1}/{total_pontos} -- tempo restante: {minutos}' {segundos}''")
+
+            if movimento:
+                movimento.aguardar() # Não desconecta com a grade andando
+
+        except BaseException as erro:
+            # Erro ou Ctrl+C no meio da varredura: o arquivo ainda recebe os eventos e é fechado
+            self.evento_abortar_experimento = True
+            resultado = 'erro'
+            self.eventos.append(f'# [{datetime.now().time()}]: O experimento foi interrompido por um erro: {erro!r}')
+            raise
 
-            # Medir --> mover --> Medir...
-            self.coletar_dados()
-            self.atualizar_grafico()
-            plt.pause(0.01) # Permitir a interatividade durante a execução. É uma pausa
-            self.move_motor(step, passo_a)
+        finally:
+            self.encerrar_varredura(resultado)
+            self.encerrar_checkpoint(plano)
 
-            tempo_f = perf_counter()
+        if not self.evento_abortar_experimento:
+            self.mostrar_resultado()
 
-            # ===== Calcula o tempo que será gasto
-            delta_t = tempo_f - tempo_i
-            tempo_total = round(delta_t * (total_pontos - i + 1), 1) # i: 0 --> total_pontos - 1
-            minutos, segundos = tempo_total // 60, tempo_total % 60
-            print(f"Tempo restante: {minutos}' {segundos}''")
-            print(f'Ciclo {i+1}/{total_pontos}\n', '-'*25, '\n')
-        
+    async def run_async(self, intervalo_grafico: float=0.01):
+        """
+        Versão assíncrona do "run()": a mesma varredura, mas as esperas pelo Lock-in e pelo Arduino liberam o loop do asyncio, que pode cuidar de outras tarefas (interface, outros arquivos...) no meio tempo.
 
-        print('PC: Finalizando conexões...')
-        self.desconectar()
+        Para parar, cancele a tarefa (ou chame "abortar()"): a varredura para na espera em que estiver, a grade termina o movimento em andamento e o arquivo é fechado como em uma interrupção do "run()".
 
-        if self.evento_abortar_experimento:
-            self.escreve_eventos()
-            
+        Args:
+            intervalo_grafico (float, optional): Tempo (em s) cedido ao loop depois de cada ponto, no lugar do "plt.pause()". Sem gráfico ao vivo, só cede a vez. Defaults to 0.01.
 
-        else:
-            print('PC: Experimento concluído.')
-            self.eventos.append(f'Conclusão: [{self.tempo_atual}]')
-            self.escreve_eventos()
+        Raises:
+            RuntimeError: Caso haja um checkpoint carregado (só o "run()" retoma, ver "retomar()")
+        """
 
-            # Deixa o gráfico na tela ao final do experimento
-            plt.ioff()
-            plt.tight_layout()
-            plt.savefig(f'{self.nome_exclusivo}.jpg')
-            plt.show()
+        if self.retomada:
+            raise RuntimeError('Só o "run()" continua uma varredura retomada (ver "retomar()")')
+        total_pontos, step, passo_a = self.calcula_passo()
+        self.iniciar_varredura(total_pontos)
+
+        lock_in = SR510Assincrono(self.sr510)
+        arduino = MonocromadorAssincrono(self.arduino)
+        self.tarefa = asyncio.current_task()
+
+        resultado = 'concluído'
+        movimento = None # A tarefa do movimento que ainda não foi confirmado pelo Arduino
+        try:
+            if self.usar_plano:
+                self.arduino.carregar_plano(step, total_pontos) # Ainda síncrono: as portas só entram no loop depois
+            if self.perfil:
+                log.info(f'PC: Movimento previsto: {round(1000 * self.perfil.duracao(step), 1)} ms por ponto, {round(total_pontos * self.perfil.duracao(step), 1)} s no total')
+            lock_in.abrir()
+            arduino.abrir()
+
+            for i in range(total_pontos):
+                tempo_i = perf_counter()
+
+                if movimento:
+                    await asyncio.shield(movimento) # Um cancelamento aqui não interrompe o movimento (ver o "finally")
+                t_espera = perf_counter()
+                ponto = await self.medir_ponto_async(lock_in)
+                t_lock_in = perf_counter()
+                movimento = self.move_motor_async(arduino, step, passo_a, plano=self.usar_plano)
+                t_motor = perf_counter()
+                self.salvar_ponto(*ponto)
+                t_arquivo = perf_counter()
+                self.atualizar_grafico()
+                await asyncio.sleep(intervalo_grafico if self.linha_grafico else 0) # O movimento e as outras tarefas andam aqui
+
+                tempo_f = perf_counter()
+                self.metricas.registrar(
+                    lock_in=t_lock_in - t_espera,
+                    motor=(t_espera - tempo_i) + (t_motor - t_lock_in),
+                    arquivo=t_arquivo - t_motor,
+                    grafico=tempo_f - t_arquivo,
+                    ciclo=tempo_f - tempo_i
+                )
+
+                tempo_total = round(self.metricas.tempo_restante(total_pontos - i - 1), 1)
+                minutos, segundos = tempo_total // 60, tempo_total % 60
+                log.info(f"Ciclo {i+1}/{total_pontos} -- tempo restante: {minutos}' {segundos}''")
+
+            if movimento:
+                await asyncio.shield(movimento)
+
+        except asyncio.CancelledError:
+            self.evento_abortar_experimento = True
+            log.warning('Experimento interrompido pelo usuário.')
+            self.eventos.append(f'# [{datetime.now().time()}]: O experimento foi interrompido pelo usuário')
+            raise
+
+        except BaseException as erro:
+            self.evento_abortar_experimento = True
+            resultado = 'erro'
+            self.eventos.append(f'# [{datetime.now().time()}]: O experimento foi interrompido por um erro: {erro!r}')
+            raise
+
+        finally:
+            if movimento and not movimento.done():
+                await asyncio.wait([movimento]) # Não desconecta com a grade andando
+            lock_in.fechar()
+            arduino.fechar()
+            self.tarefa = None
+            self.encerrar_varredura(resultado)
+
+        if not self.evento_abortar_experimento:
+            self.mostrar_resultado()
+
+    def variacao_abrupta(self, indices: list, tensoes: list, indice: int, tensao: float, fator: int):
+        """
+        Decide se o sinal muda demais em torno de um ponto para a grade grossa. Compara o ponto com os valores (interpolados) a "fator" e "2*fator" pontos da grade fina para trás.
+
+        Args:
+            indices (list): Os índices (grade fina) dos pontos já aceitos, em ordem crescente
+            tensoes (list): As tensões desses pontos
+            indice (int): O índice do ponto novo
+            tensao (float): A tensão do ponto novo
+            fator (int): O espaçamento da grade grossa (em pontos da grade fina)
+
+        Returns:
+            bool: True se o gradiente ou a curvatura passam dos limiares
+        """
+
+        fundo = self.sensibilidade_fundo or 1.0
+        janela = slice(-(2*fator + 1), None) # Os pontos aceitos nos últimos 2*fator índices
+        anterior, anterior_2 = np.interp((indice - fator, indice - 2*fator), indices[janela], tensoes[janela])
+
+        gradiente = abs(tensao - anterior)
+        if gradiente > self.limiar_gradiente * fundo:
+            return True
+        if indice - 2*fator < indices[0]:
+            return False # Ainda sem pontos para a curvatura
+        return abs(tensao - 2*anterior + anterior_2) > self.limiar_curvatura * fundo
+
+    def run_adaptativo(self, fator_grosso: int=4):
+        """
+        Varredura adaptativa: anda em passos "fator_grosso" vezes maiores que os do "run()" e, onde o sinal muda (gradiente ou curvatura acima de "limiar_gradiente" / "limiar_curvatura", em fração do fundo de escala), volta e mede na resolução nominal (PPR).
+
+        O ponto grosso que dispara o refinamento é descartado e o intervalo anterior a ele é medido na grade fina, então os pontos salvos ficam sempre em ordem crescente de comprimento de onda. A grade volta para a grade grossa depois de "fator_grosso" pontos finos seguidos sem variação.
+
+        Args:
+            fator_grosso (int, optional): Quantos passos da grade fina cabem em um passo da grade grossa. Defaults to 4.
+
+        Raises:
+            RuntimeError: Caso haja um checkpoint carregado (só o "run()" retoma, ver "retomar()")
+        """
+
+        if self.retomada:
+            raise RuntimeError('Só o "run()" continua uma varredura retomada (ver "retomar()")')
+        total_pontos, step, passo_a = self.calcula_passo()
+        ultimo = total_pontos - 1 # Índice (grade fina) do último ponto
+        fator = max(int(fator_grosso), 1)
+        self.iniciar_varredura(total_pontos // fator + 1)
+
+        indices, tensoes = [], [] # Pontos aceitos (grade fina), para os critérios de refinamento
+        indice = 0 # Onde a grade está
+        fino = False
+        calmos = 0 # Pontos finos seguidos sem variação
+        descartados = 0
+
+        resultado = 'concluído'
+        movimento = None
+        try:
+            while True:
+                tempo_i = perf_counter()
+                if self.verifica_abortar():
+                    break
+
+                if movimento:
+                    movimento.aguardar()
+                t_espera = perf_counter()
+                comprimento_onda, tensao, sensibilidade = self.medir_ponto()
+                t_lock_in = perf_counter()
+
+                # ===== Decide o próximo ponto
+                aceito = True
+                if indices and self.variacao_abrupta(indices, tensoes, indice, tensao, fator):
+                    calmos = 0
+                    if not fino and indice - indices[-1] > 1:
+                        aceito = False # O intervalo até aqui precisa da grade fina: volta
+                        descartados += 1
+                    fino = True
+                elif fino:
+                    calmos += 1
+                    if calmos >= fator:
+                        fino = False # Sinal calmo por um passo grosso inteiro
+
+                if aceito and indice == ultimo:
+                    proximo = None
+                elif not aceito:
+                    proximo = indices[-1] + 1
+                else:
+                    proximo = min(indice + (1 if fino else fator), ultimo)
+
+                if proximo is not None:
+                    movimento = self.mover_para(indice, proximo, step, passo_a, esperar=False)
+                t_motor = perf_counter()
+
+                if aceito:
+                    indices.append(indice)
+                    tensoes.append(tensao)
+                    self.salvar_ponto(comprimento_onda, tensao, sensibilidade)
+                t_arquivo = perf_counter()
+                if aceito:
+                    self.atualizar_grafico()
+                self.pausa_grafico()
+
+                tempo_f = perf_counter()
+                self.metricas.registrar(
+                    lock_in=t_lock_in - t_espera,
+                    motor=(t_espera - tempo_i) + (t_motor - t_lock_in),
+                    arquivo=t_arquivo - t_motor,
+                    grafico=tempo_f - t_arquivo,
+                    ciclo=tempo_f - tempo_i
+                )
+
+                if proximo is None:
+                    break
+                indice = proximo
+
+                # ===== Estimativa pelo resto da faixa na grade grossa
+                tempo_total = round(self.metricas.tempo_restante(-(-(ultimo - indice) // fator)), 1)
+                minutos, segundos = tempo_total // 60, tempo_total % 60
+                log.info(f"Ponto {indice}/{ultimo} -- {'fino' if fino else 'grosso'} -- tempo restante (grade grossa): {minutos}' {segundos}''")
+
+            if movimento:
+                movimento.aguardar()
+
+        except BaseException as erro:
+            self.evento_abortar_experimento = True
+            resultado = 'erro'
+            self.eventos.append(f'# [{datetime.now().time()}]: O experimento foi interrompido por um erro: {erro!r}')
+            raise
+
+        finally:
+            self.eventos.append(f'# Varredura adaptativa: {len(indices)} de {total_pontos} pontos medidos (fator {fator}, {descartados} pontos grossos refeitos na grade fina)')
+            self.encerrar_varredura(resultado)
+
+        if not self.evento_abortar_experimento:
+            self.mostrar_resultado()
+
+    def salvar_medias(self, comprimentos: np.ndarray):
+        """
+        Escreve, nos arquivos de saída, a média e o erro de cada ponto medido ao menos uma vez e troca o conteúdo do buffer pelo espectro médio.
+
+        Args:
+            comprimentos (np.ndarray): O comprimento de onda de cada ponto
+        """
+
+        medidos = np.flatnonzero(self.medias.contagem) # Em ordem crescente de comprimento de onda
+        medias, erros = self.medias.media, self.medias.erro
+
+        self.buffer.limpar()
+        for indice in medidos:
+            for escritor in self.escritores:
+                escritor.escrever_linha((comprimentos[indice], round(medias[indice], 4), round(erros[indice], 4)))
+            self.buffer.adicionar(comprimentos[indice], medias[indice])
+
+    def run_passagens(self, n_passagens: int=2):
+        """
+        Varredura com várias passagens em serpentina: ida de "comp_i" a "comp_f", volta de "comp_f" a "comp_i", ida... sem o retorno da grade ao início e sem reconectar. N passagens custam N varreduras.
+
+        Cada leitura vai para o arquivo "<nome>_passagens.csv" (passagem, comprimento de onda, tensão) e atualiza a média e a variância do ponto (ver "MediasPassagens"). O arquivo principal recebe, ao final, o espectro médio com o erro padrão de cada ponto.
+
+        Args:
+            n_passagens (int, optional): O número de passagens. Defaults to 2.
+
+        Raises:
+            RuntimeError: Caso haja um checkpoint carregado (só o "run()" retoma, ver "retomar()")
+        """
+
+        if self.retomada:
+            raise RuntimeError('Só o "run()" continua uma varredura retomada (ver "retomar()")')
+        total_pontos, step, passo_a = self.calcula_passo()
+        self.passagens = max(int(n_passagens), 1)
+        total_ciclos = self.passagens * total_pontos
+        self.iniciar_varredura(total_ciclos) # O gráfico mostra as leituras de todas as passagens
+
+        self.escritor_passagens = EscritorCSV(f'{self.nome_exclusivo}_passagens.csv', **self.politica_escrita)
+        self.escritor_passagens.escrever_cabecalho(self.metadados[:-1] + ['# Colunas: passagem, comprimento_onda, tensao, sensibilidade'])
+        self.medias = MediasPassagens(self.passagens, total_pontos)
+        comprimentos = np.empty(total_pontos, dtype=np.float64)
+
+        resultado = 'concluído'
+        sentido_motor = 1 # Sentido do último movimento: a folga só é recolhida nas inversões
+        movimento = None
+        try:
+            for ciclo in range(total_ciclos):
+                tempo_i = perf_counter()
+                if self.verifica_abortar():
+                    break
+
+                passagem, k = divmod(ciclo, total_pontos)
+                indice = k if passagem % 2 == 0 else total_pontos - 1 - k # Passagens ímpares voltam
+
+                if movimento:
+                    movimento.aguardar()
+                t_espera = perf_counter()
+                comprimento_onda, tensao, sensibilidade = self.medir_ponto()
+                t_lock_in = perf_counter()
+
+                # ===== Próximo ponto: na virada de passagem a grade fica no lugar (o extremo é medido de novo na volta)
+                proxima_passagem, proximo_k = divmod(ciclo + 1, total_pontos)
+                if ciclo + 1 < total_ciclos and proximo_k:
+                    sentido = 1 if proxima_passagem % 2 == 0 else -1
+                    folga = sentido * self.folga if sentido != sentido_motor else 0
+                    sentido_motor = sentido
+                    movimento = self.move_motor(sentido * step, sentido * passo_a, esperar=False, folga=folga)
+                else:
+                    movimento = None
+                t_motor = perf_counter()
+
+                if passagem == 0:
+                    comprimentos[indice] = comprimento_onda
+                self.medias.adicionar(passagem, indice, tensao)
+                self.escritor_passagens.escrever_linha((passagem + 1, comprimento_onda, tensao, sensibilidade))
+                self.buffer.adicionar(comprimento_onda, tensao)
+                self.notificar_ponto(comprimento_onda, tensao)
+                t_arquivo = perf_counter()
+                self.atualizar_grafico()
+                self.pausa_grafico()
+
+                tempo_f = perf_counter()
+                self.metricas.registrar(
+                    lock_in=t_lock_in - t_espera,
+                    motor=(t_espera - tempo_i) + (t_motor - t_lock_in),
+                    arquivo=t_arquivo - t_motor,
+                    grafico=tempo_f - t_arquivo,
+                    ciclo=tempo_f - tempo_i
+                )
+
+                tempo_total = round(self.metricas.tempo_restante(total_ciclos - ciclo - 1), 1)
+                minutos, segundos = tempo_total // 60, tempo_total % 60
+                log.info(f"Passagem {passagem+1}/{self.passagens} -- Ciclo {k+1}/{total_pontos} -- tempo restante: {minutos}' {segundos}''")
+
+            if movimento:
+                movimento.aguardar()
+            if sentido_motor < 0 and self.folga:
+                self.arduino.mover_motor(self.folga) # A grade chegou por trás: recolhe a folga para a frente, como em "mover_para()", e o próximo movimento não a perde
+
+        except BaseException as erro:
+            self.evento_abortar_experimento = True
+            resultado = 'erro'
+            self.eventos.append(f'# [{datetime.now().time()}]: O experimento foi interrompido por um erro: {erro!r}')
+            raise
+
+        finally:
+            self.escritor_passagens.fechar(abortado=self.evento_abortar_experimento)
+            self.salvar_medias(comprimentos)
+            self.eventos.append(f'# Passagens: {int(self.medias.contagem.max(initial=0))} de {self.passagens} (leituras em "{os.path.basename(self.escritor_passagens.caminho)}")')
+            self.encerrar_varredura(resultado)
+            self.passagens = 1 # O próximo "run()" do mesmo objeto volta às colunas de uma leitura por linha (ver "colunas_saida()")
+
+        if not self.evento_abortar_experimento:
+            self.mostrar_resultado(erro=self.medias.erro[self.medias.contagem > 0])
 #endregion
 
 
 
 if __name__ == "__main__":
+    import argparse
 
     # ========== Sessão destinada à alteração ==========
-    NOME = 'NOME'
-    OPERADOR = ''
-    COPRIMENTO_DE_ONDA_INICIAL = 1000 # Å
-    COMPRIMENTO_DE_ONDA_FINAL = 1100 # Å
-    ABERTURA_DA_FENDA = 100 # micro metro
-    PONTOS_POR_RESOLUCAO = 3
-    TEXTO = """Conjunto de testes para verificar o correto funcionamento do programa de leitura e automação do monocromador com Python 3"""
-
-    PORTA_LOCK_IN = 'COM10'
-    PORTA_ARDUINO = 'COM13'
+    # Valores padrão da linha de comando. O arquivo "--config" (json) usa as mesmas chaves
+    PADRAO = {
+        'nome': 'NOME',
+        'operador': '',
+        'inicio': 1000, # Å
+        'fim': 1100, # Å
+        'fenda': 100, # micro metro
+        'ppr': 3,
+        'descricao': """Conjunto de testes para verificar o correto funcionamento do programa de leitura e automação do monocromador com Python 3""",
+
+        'porta_lock_in': 'COM10',
+        'porta_arduino': 'COM13',
+        'baudrate': 9600,
+
+        'modo': 'run', # "run", "adaptativo" (ver "run_adaptativo()"), "passagens" (ver "run_passagens()") ou "async" (ver "run_async()")
+        'fator': 4, # Fator da grade grossa do modo adaptativo
+        'passagens': 2, # Passagens do modo "passagens"
+        'folga': 0, # steps
+        'perfil': None, # Ex: [800, 4000] --> rampa trapezoidal (vmax em steps/s, acel em steps/s²). None --> velocidade do potenciômetro
+        'voltar': False, # Leva a grade de volta a "comp_i" ao final
+        'grafico': False, # Janela com o espectro durante a varredura
+        'figura': False, # Salva o gráfico final em .jpg
+        'bin': False, # Grava também o formato binário
+        'ajustar_espera': True, # Ajusta o "W" do Lock-in ao conectar
+        'verboso': False, # DEBUG --> também cada comando e resposta do Arduino
+        'servidor': None, # Ex: 8000 --> transmite a varredura para navegadores em http://127.0.0.1:8000 (ver "servidor.py")
+        'host': '127.0.0.1', # '0.0.0.0' --> o servidor aceita outros computadores da rede
+        'retomar': None, # Ex: "Gráficos/NOME_checkpoint.json" --> continua a varredura interrompida (a varredura e os arquivos vêm do checkpoint)
+    }
 
     # ==============================
-    # ========== Programa ==========
-    experimento = Experimento(
-        NOME,
-        OPERADOR,
-        COPRIMENTO_DE_ONDA_INICIAL,
-        COMPRIMENTO_DE_ONDA_FINAL,
-        ABERTURA_DA_FENDA,
-        PONTOS_POR_RESOLUCAO,
-        TEXTO
+    # ========== Linha de comando ==========
+    parser = argparse.ArgumentParser(
+        description='Roda uma varredura do monocromador. Sem "--grafico" nem "--figura", o Matplotlib nem é importado.',
+        argument_default=argparse.SUPPRESS # Só os argumentos passados substituem o "--config" e o PADRAO
     )
+    parser.add_argument('--config', help='Arquivo json com os parâmetros (chaves do PADRAO). Os argumentos da linha de comando têm prioridade')
+    parser.add_argument('--nome', help='Nome dos arquivos')
+    parser.add_argument('--operador')
+    parser.add_argument('--inicio', type=float, help='Comprimento de onda inicial (Å)')
+    parser.add_argument('--fim', type=float, help='Comprimento de onda final (Å)')
+    parser.add_argument('--fenda', type=float, help='Abertura da fenda (micro metro)')
+    parser.add_argument('--ppr', type=int, help='Pontos por resolução')
+    parser.add_argument('--descricao')
+    parser.add_argument('--porta-lock-in', dest='porta_lock_in')
+    parser.add_argument('--porta-arduino', dest='porta_arduino')
+    parser.add_argument('--baudrate', type=int)
+    parser.add_argument('--modo', choices=list(MODOS))
+    parser.add_argument('--fator', type=int, help='Fator da grade grossa (modo adaptativo)')
+    parser.add_argument('--passagens', type=int, help='Número de passagens (modo passagens)')
+    parser.add_argument('--folga', type=int, help='Folga mecânica (steps)')
+    parser.add_argument('--perfil', type=float, nargs=2, metavar=('VMAX', 'ACEL'), help='Rampa trapezoidal do motor (steps/s, steps/s²)')
+    parser.add_argument('--voltar', action='store_true', help='Leva a grade de volta ao início ao final')
+    parser.add_argument('--grafico', action='store_true', help='Mostra o espectro durante a varredura')
+    parser.add_argument('--figura', action='store_true', help='Salva o gráfico final em .jpg')
+    parser.add_argument('--bin', action='store_true', help='Grava também o formato binário')
+    parser.add_argument('--sem-ajuste-espera', dest='ajustar_espera', action='store_false', help='Não ajusta o tempo de espera do Lock-in ao conectar')
+    parser.add_argument('-v', '--verboso', action='store_true', help='Mostra cada comando e resposta')
+    parser.add_argument('--servidor', type=int, metavar='PORTA', help='Transmite a varredura para navegadores nesta porta')
+    parser.add_argument('--host', help='Endereço do servidor (padrão: só este computador)')
+    parser.add_argument('--retomar', metavar='CHECKPOINT', help='Continua uma varredura interrompida a partir do seu "<nome>_checkpoint.json". Só no modo "run"')
+    argumentos = vars(parser.parse_args())
+
+    parametros = dict(PADRAO)
+    if 'config' in argumentos:
+        with open(argumentos.pop('config'), encoding='utf-8') as arquivo:
+            configuracao = json.load(arquivo)
+        desconhecidas = set(configuracao) - set(PADRAO)
+        if desconhecidas:
+            parser.error(f'Chaves desconhecidas no arquivo de configuração: {sorted(desconhecidas)}')
+        parametros.update(configuracao)
+    parametros.update(argumentos)
+    if parametros['retomar'] and parametros['modo'] != 'run':
+        parser.error(f'"--retomar" só funciona no modo "run" (modo pedido: {parametros["modo"]!r})')
+
+    logging.basicConfig(level=logging.DEBUG if parametros['verboso'] else logging.INFO, format='%(message)s')
+
+    # ========== Programa ==========
+    if parametros['retomar']:
+        experimento = Experimento.retomar(parametros['retomar']) # Varredura, arquivos, folga e perfil do checkpoint
+    else:
+        experimento = Experimento(
+            parametros['nome'],
+            parametros['operador'],
+            parametros['inicio'],
+            parametros['fim'],
+            parametros['fenda'],
+            parametros['ppr'],
+            parametros['descricao']
+        )
+        experimento.folga = parametros['folga']
+        experimento.perfil = PerfilMovimento(*parametros['perfil']) if parametros['perfil'] else None
+        experimento.formatos_saida = ('csv', 'bin') if parametros['bin'] else ('csv',)
+
+    experimento.voltar_ao_final = parametros['voltar']
+    experimento.grafico_ao_vivo = parametros['grafico']
+    experimento.figura_final = parametros['figura'] or parametros['grafico']
+    experimento.mostrar_janela = parametros['grafico'] # Sem janela durante a varredura, a do final também não abre
+    experimento.ajustar_espera = parametros['ajustar_espera']
+
+    servidor = None
+    if parametros['servidor'] is not None:
+        from servidor import ServidorEspectro
+        servidor = ServidorEspectro(parametros['host'], parametros['servidor'])
+        servidor.iniciar()
+        experimento.inscrever(servidor.publicar)
 
     experimento.conectar(
         conexao_lock_in={
-            'porta': PORTA_LOCK_IN,
-            'baudrate': 9600
+            'porta': parametros['porta_lock_in'],
+            'baudrate': parametros['baudrate']
         },
         conexao_arduino={
-            'porta': PORTA_ARDUINO,
-            'baudrate': 9600,
+            'porta': parametros['porta_arduino'],
+            'baudrate': parametros['baudrate'],
             'timeout': None
         }
     )
-    experimento.run()
\ No newline at end of file
+    try:
+        if parametros['modo'] == 'adaptativo':
+            experimento.run_adaptativo(parametros['fator'])
+        elif parametros['modo'] == 'passagens':
+            experimento.run_passagens(parametros['passagens'])
+        elif parametros['modo'] == 'async':
+            asyncio.run(experimento.run_async())
+        else:
+            experimento.run()
+    finally:
+        if servidor:
+            servidor.parar()
@@ -0,0 +1,298 @@
+#region Observações
+# - Servidor HTTP local que transmite a varredura em andamento para navegadores: cada ponto e cada acontecimento ("inicio", "ponto", "fim") publicado pelo "Experimento" (ver "Experimento.inscrever()").
+# - O computador da aquisição não desenha nada: só guarda os eventos já codificados em json. Quem desenha é o navegador de cada pessoa.
+# - Rotas:
+#     /                  Página com o gráfico ao vivo
+#     /eventos?desde=N   Server-Sent Events: os eventos a partir do cursor N e, depois, cada evento novo assim que chega
+#     /pontos?desde=N    json com os eventos a partir do cursor N e o próximo cursor (para quem prefere consultar de tempos em tempos)
+# - O cursor é a posição do evento no histórico. Cada cliente só recebe o que veio depois do seu cursor. Sem cursor, começa na varredura atual.
+# - Uso rápido: python pyce.py --servidor 8000 ... e abrir http://127.0.0.1:8000 (ou, sem equipamentos: python servidor.py Gráficos/NOME.csv)
+#endregion
+
+
+# ========== Imports ==========
+import json
+import math
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+log = logging.getLogger('pyce.servidor')
+
+INTERVALO_MANTER = 15 # s sem eventos até mandar um comentário, para a conexão não cair
+
+
+PAGINA = """<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+<meta charset="utf-8">
+<title>Monocromador</title>
+<style>
+  body { font-family: sans-serif; margin: 1em; }
+  canvas { border: 1px solid #ccc; width: 100%; height: 70vh; }
+</style>
+</head>
+<body>
+<h3 id="titulo">Aguardando a varredura...</h3>
+<div id="estado"></div>
+<canvas id="grafico"></canvas>
+<script>
+const canvas = document.getElementById('grafico');
+const ctx = canvas.getContext('2d');
+let x = [], y = [], total = 0, desenhoPendente = false;
+
+function desenhar() {
+  desenhoPendente = false;
+  canvas.width = canvas.clientWidth; canvas.height = canvas.clientHeight;
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  const validos = y.filter(v => v !== null);
+  if (!validos.length) return;
+  const m = 50, w = canvas.width - 2 * m, h = canvas.height - 2 * m;
+  const xmin = Math.min(...x), xmax = Math.max(...x), ymin = Math.min(...validos), ymax = Math.max(...validos);
+  const sx = v => m + (xmax > xmin ? (v - xmin) / (xmax - xmin) : 0.5) * w;
+  const sy = v => m + h - (ymax > ymin ? (v - ymin) / (ymax - ymin) : 0.5) * h;
+  ctx.strokeStyle = '#999'; ctx.strokeRect(m, m, w, h);
+  ctx.fillStyle = '#000';
+  ctx.fillText(xmin.toFixed(2) + ' Å', m, m + h + 15); ctx.fillText(xmax.toFixed(2) + ' Å', m + w - 60, m + h + 15);
+  ctx.fillText(ymax.toPrecision(4), 2, m + 5); ctx.fillText(ymin.toPrecision(4), 2, m + h);
+  ctx.strokeStyle = 'red'; ctx.fillStyle = 'red'; ctx.beginPath();
+  let novo = true;
+  for (let i = 0; i < x.length; i++) {
+    if (y[i] === null) { novo = true; continue; }
+    if (novo) ctx.moveTo(sx(x[i]), sy(y[i])); else ctx.lineTo(sx(x[i]), sy(y[i]));
+    novo = false;
+  }
+  ctx.stroke();
+}
+
+function pedirDesenho() {
+  if (!desenhoPendente) { desenhoPendente = true; requestAnimationFrame(desenhar); }
+}
+
+const fonte = new EventSource('/eventos');
+fonte.addEventListener('inicio', e => {
+  const d = JSON.parse(e.data);
+  x = []; y = []; total = d.pontos;
+  document.getElementById('titulo').textContent = d.nome;
+  pedirDesenho();
+});
+fonte.addEventListener('ponto', e => {
+  const d = JSON.parse(e.data);
+  x.push(d.comprimento_onda); y.push(d.tensao);
+  document.getElementById('estado').textContent = d.pontos + '/' + total + ' pontos -- ' + d.comprimento_onda.toFixed(3) + ' Å: ' + d.tensao;
+  pedirDesenho();
+});
+fonte.addEventListener('fim', e => {
+  const d = JSON.parse(e.data);
+  document.getElementById('estado').textContent = d.resultado + ' (' + d.pontos + ' pontos)';
+});
+</script>
+</body>
+</html>
+"""
+
+
+class ServidorEspectro:
+    """
+    Guarda os eventos da varredura e os serve por HTTP (ver as rotas nas Observações).
+
+    Uso:
+        servidor = ServidorEspectro(porta=8000)
+        servidor.iniciar()
+        experimento.inscrever(servidor.publicar)
+    """
+
+    def __init__(self, host: str='127.0.0.1', porta: int=8000):
+        """
+        Args:
+            host (str, optional): O endereço em que o servidor escuta. '0.0.0.0' --> aceita outros computadores da rede. Defaults to '127.0.0.1'.
+            porta (int, optional): A porta. 0 --> uma porta livre qualquer (ver "endereco"). Defaults to 8000.
+        """
+
+        self.host = host
+        self.porta = porta
+        self.eventos = [] # (nome do evento, dados em json) de todas as varreduras publicadas
+        self.inicio_varredura = 0 # Cursor do "inicio" da varredura atual: onde começa quem chega sem cursor
+        self.condicao = threading.Condition()
+        self.encerrado = False
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def endereco(self):
+        """A URL da página (com a porta de verdade, mesmo quando "porta" é 0)."""
+
+        host, porta = self.httpd.server_address[:2] if self.httpd else (self.host, self.porta)
+        return f'http://{host}:{porta}/'
+
+    # ========== Thread da varredura ==========
+    def publicar(self, evento: str, dados: dict):
+        """
+        Observador do "Experimento" (ver "Experimento.inscrever()"). Só codifica o evento e acorda os clientes: nada de rede nesta thread.
+
+        Args:
+            evento (str): "inicio", "ponto" ou "fim"
+            dados (dict): Os dados do evento
+        """
+
+        dados = {chave: None if isinstance(valor, float) and math.isnan(valor) else valor for chave, valor in dados.items()} # NaN não é json válido
+        texto = json.dumps(dados, ensure_ascii=False, default=float) # default --> números do NumPy
+        with self.condicao:
+            if evento == 'inicio':
+                self.inicio_varredura = len(self.eventos)
+            self.eventos.append((evento, texto))
+            self.condicao.notify_all()
+
+    # ========== Threads dos clientes ==========
+    def eventos_desde(self, cursor: int, timeout: float=None):
+        """
+        Os eventos depois do cursor. Se ainda não há nenhum, espera chegar um (ou o tempo acabar).
+
+        Args:
+            cursor (int): Quantos eventos o cliente já tem
+            timeout (float, optional): Tempo máximo de espera (s). None --> não espera. Defaults to None.
+
+        Returns:
+            list: (cursor depois do evento, nome do evento, dados em json)
+        """
+
+        with self.condicao:
+            if timeout is not None:
+                self.condicao.wait_for(lambda: len(self.eventos) > cursor or self.encerrado, timeout)
+            novos = self.eventos[cursor:]
+        return [(cursor + i + 1, evento, texto) for i, (evento, texto) in enumerate(novos)]
+
+    # ========== Servidor ==========
+    def iniciar(self):
+        """Começa a servir em uma thread própria (daemon)."""
+
+        self.httpd = ThreadingHTTPServer((self.host, self.porta), RequisicaoEspectro)
+        self.httpd.daemon_threads = True # Clientes ainda conectados não seguram o fim do programa
+        self.httpd.espectro = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        log.info(f'Servidor: Transmitindo em {self.endereco}')
+
+    def parar(self):
+        """Encerra as transmissões abertas e o servidor."""
+
+        with self.condicao:
+            self.encerrado = True
+            self.condicao.notify_all()
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+class RequisicaoEspectro(BaseHTTPRequestHandler):
+    """Atende as rotas do "ServidorEspectro". Uma thread por cliente."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        consulta = parse_qs(url.query)
+        espectro = self.server.espectro
+
+        if url.path == '/':
+            self.responder(PAGINA.encode('utf-8'), 'text/html; charset=utf-8')
+        elif url.path in ('/eventos', '/pontos'):
+            try:
+                cursor = self.cursor(consulta, espectro)
+            except ValueError:
+                self.send_error(400, 'Cursor inválido')
+                return
+            if url.path == '/eventos':
+                self.transmitir(cursor, espectro)
+            else:
+                eventos = espectro.eventos_desde(cursor)
+                corpo = '{"cursor": %d, "eventos": [%s]}' % (
+                    eventos[-1][0] if eventos else cursor,
+                    ', '.join('{"evento": "%s", "dados": %s}' % (evento, texto) for _, evento, texto in eventos)
+                )
+                self.responder(corpo.encode('utf-8'), 'application/json; charset=utf-8')
+        else:
+            self.send_error(404)
+
+    def cursor(self, consulta: dict, espectro: ServidorEspectro):
+        """O cursor pedido: "?desde=N", o "Last-Event-ID" de uma reconexão do EventSource ou, sem nenhum dos dois, o início da varredura atual."""
+
+        if 'desde' in consulta:
+            cursor = int(consulta['desde'][0])
+        elif self.headers.get('Last-Event-ID'):
+            cursor = int(self.headers['Last-Event-ID'])
+        else:
+            return espectro.inicio_varredura
+        if cursor < 0:
+            raise ValueError(cursor)
+        return cursor
+
+    def responder(self, corpo: bytes, tipo: str):
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def transmitir(self, cursor: int, espectro: ServidorEspectro):
+        """Server-Sent Events: manda o que o cliente ainda não tem e segue mandando cada evento novo até o cliente sair ou o servidor parar."""
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close') # Sem Content-Length: a conexão termina com a transmissão
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while True:
+                eventos = espectro.eventos_desde(cursor, timeout=INTERVALO_MANTER)
+                if eventos:
+                    # O "id" é o cursor depois do evento: o navegador o devolve no "Last-Event-ID" ao reconectar
+                    self.wfile.write(''.join(f'id: {proximo}\nevent: {evento}\ndata: {texto}\n\n' for proximo, evento, texto in eventos).encode('utf-8'))
+                    cursor = eventos[-1][0]
+                elif espectro.encerrado:
+                    break # Só depois de mandar tudo, inclusive o "fim"
+                else:
+                    self.wfile.write(b': manter\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # O cliente fechou a página
+
+    def log_message(self, formato, *args):
+        log.debug(f'Servidor: {self.address_string()} {formato % args}')
+
+
+
+if __name__ == "__main__":
+    # Reproduz um espectro já salvo, ponto a ponto, para testar a página sem os equipamentos
+    import argparse
+    from time import sleep
+    from carregador import carregar_espectro
+
+    parser = argparse.ArgumentParser(description='Transmite um espectro salvo como se fosse uma varredura em andamento.')
+    parser.add_argument('arquivo', help='Espectro do pyce (.csv ou .bin)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--intervalo', type=float, default=0.1, help='Tempo entre dois pontos (s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    espectro = carregar_espectro(args.arquivo)
+    servidor = ServidorEspectro(args.host, args.porta)
+    servidor.iniciar()
+    try:
+        servidor.publicar('inicio', {'nome': args.arquivo, 'pontos': len(espectro)})
+        for i, (comprimento_onda, tensao) in enumerate(zip(espectro.comprimento_onda, espectro.tensao)):
+            sleep(args.intervalo)
+            servidor.publicar('ponto', {'comprimento_onda': float(comprimento_onda), 'tensao': float(tensao), 'pontos': i + 1, 'ciclo_medio': args.intervalo})
+        servidor.publicar('fim', {'resultado': 'concluído', 'pontos': len(espectro)})
+        input('Fim da reprodução. Enter para sair.\n')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.parar()
@@ -0,0 +1,71 @@
+"""
+Fixtures dos testes: uma bancada emulada (SR510 + Arduino em pseudo-terminais, ver "emulador.py") e experimentos já conectados a ela.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import emulador
+import pyce
+
+FOLGA = 6 # Steps perdidos a cada inversão de sentido do motor emulado
+
+
+@pytest.fixture
+def bancada(tmp_path, monkeypatch):
+    """O SR510 e o Arduino emulados. Os arquivos dos experimentos vão para uma pasta temporária."""
+
+    monkeypatch.chdir(tmp_path)
+    sr510, arduino = emulador.emular_bancada(
+        emulador.ModeloTempo(bits_por_caractere=11, semente=0),
+        emulador.ModeloTempo(atraso_step=0.0005, semente=0),
+        folga=FOLGA
+    )
+    sr510.ruido = 1e-5
+    yield sr510, arduino
+    sr510.parar()
+    arduino.parar()
+
+
+@pytest.fixture
+def conexoes(bancada):
+    """Os dicionários de conexão do "Experimento.conectar()" para a bancada emulada."""
+
+    sr510, arduino = bancada
+    return {'porta': sr510.porta, 'baudrate': 9600}, {'porta': arduino.porta, 'baudrate': 9600, 'timeout': 5}
+
+
+def preparar(experimento: pyce.Experimento):
+    """Configura um experimento para rodar sem janela e sem desconectar ao final (a posição da grade é conferida depois)."""
+
+    experimento.grafico_ao_vivo = False
+    experimento.figura_final = False
+    experimento.manter_conexao = True
+    experimento.ajustar_espera = False
+    experimento.espera_escala = 0.01 # O Lock-in emulado troca de escala na hora
+    experimento.folga = FOLGA
+    return experimento
+
+
+@pytest.fixture
+def novo_experimento(conexoes):
+    """Cria e conecta um experimento de 1000 Å a 1010 Å (fenda de 100 μm, PPR 3)."""
+
+    experimentos = []
+
+    def criar(nome: str='teste', conectar: bool=True, **atributos):
+        experimento = preparar(pyce.Experimento(nome, 'pytest', 1000, 1010, 100, 3))
+        for atributo, valor in atributos.items():
+            setattr(experimento, atributo, valor)
+        if conectar:
+            experimento.conectar(*conexoes)
+            experimentos.append(experimento)
+        return experimento
+
+    yield criar
+    for experimento in experimentos:
+        experimento.desconectar()
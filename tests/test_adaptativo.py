@@ -0,0 +1,52 @@
+"""
+Varredura adaptativa ("Experimento.run_adaptativo()") contra a bancada emulada.
+"""
+
+import numpy as np
+import pytest
+
+from carregador import carregar_espectro
+
+
+def grade_fina(experimento):
+    total_pontos, _, passo_a = experimento.calcula_passo()
+    return experimento.comp_i + passo_a * np.arange(total_pontos), passo_a
+
+
+def conferir(experimento, arduino):
+    """Confere que os pontos salvos estão na grade fina, em ordem crescente, e que a grade terminou onde o PC acha que ela está."""
+
+    assert experimento.resultado == 'concluído'
+    comprimentos, passo_a = grade_fina(experimento)
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    x = espectro.comprimento_onda
+    assert 0 < len(espectro) <= len(comprimentos)
+    assert np.all(np.diff(x) > 0) # Sempre em ordem crescente, sem repetições
+    assert np.all(np.min(np.abs(x[:, None] - comprimentos[None, :]), axis=1) < 1e-3) # Só pontos da grade fina
+    assert x[0] == pytest.approx(comprimentos[0], abs=1e-3)
+    assert arduino.posicao == experimento.posicao_steps
+    return x, passo_a
+
+
+def test_sinal_plano_fica_na_grade_grossa(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento()
+
+    experimento.run_adaptativo(fator_grosso=4)
+
+    x, passo_a = conferir(experimento, arduino)
+    np.testing.assert_allclose(np.diff(x)[:-1], 4 * passo_a, atol=2e-3) # O último ponto é o fim da faixa
+    assert x[-1] == pytest.approx(grade_fina(experimento)[0][-1], abs=1e-3)
+
+
+def test_degrau_e_refinado(bancada, novo_experimento):
+    sr510_emulado, arduino = bancada
+    sr510_emulado.sinal = lambda posicao: 2e-3 if posicao > 30 else 1e-4 # Degrau no meio da varredura
+    experimento = novo_experimento()
+
+    experimento.run_adaptativo(fator_grosso=4)
+
+    x, passo_a = conferir(experimento, arduino)
+    finos = np.isclose(np.diff(x), passo_a, atol=2e-3)
+    assert finos.any() # Passos da grade fina em volta do degrau...
+    assert not finos.all() # ...e da grossa longe dele
@@ -0,0 +1,62 @@
+"""
+Varredura assíncrona ("Experimento.run_async()") contra a bancada emulada.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from carregador import carregar_espectro
+
+
+def test_run_async(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento()
+    total_pontos, step, passo_a = experimento.calcula_passo()
+
+    asyncio.run(experimento.run_async())
+
+    assert experimento.resultado == 'concluído'
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert len(espectro) == total_pontos
+    np.testing.assert_allclose(espectro.comprimento_onda, experimento.comp_i + passo_a * np.arange(total_pontos), atol=1e-3)
+    np.testing.assert_allclose(espectro.tensao, experimento.buffer_y)
+    assert arduino.posicao == experimento.posicao_steps == total_pontos * step
+
+
+def test_loop_livre_durante_a_varredura(novo_experimento):
+    """As esperas pelos equipamentos liberam o loop: outra tarefa anda enquanto a varredura roda."""
+
+    experimento = novo_experimento()
+    voltas = []
+
+    async def relogio():
+        while True:
+            voltas.append(experimento.buffer.n)
+            await asyncio.sleep(0.005)
+
+    async def principal():
+        tarefa = asyncio.create_task(relogio())
+        await experimento.run_async()
+        tarefa.cancel()
+
+    asyncio.run(principal())
+
+    assert experimento.resultado == 'concluído'
+    assert len(set(voltas)) > experimento.calcula_passo()[0] // 2 # O relógio rodou ao longo da varredura toda
+
+
+def test_abortar_cancela_a_tarefa(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento()
+    experimento.inscrever(lambda evento, dados: evento == 'ponto' and dados['pontos'] == 5 and experimento.abortar())
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(experimento.run_async())
+
+    assert experimento.resultado == 'abortado'
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert len(espectro) == len(experimento.buffer) == 5
+    assert any('interrompido pelo usuário' in evento for evento in espectro.eventos)
+    assert arduino.posicao == experimento.posicao_steps # O movimento em andamento terminou antes de fechar
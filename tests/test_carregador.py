@@ -0,0 +1,79 @@
+"""
+Leitura dos espectros gravados pelo "pyce" ("carregador.py").
+"""
+
+import logging
+
+import numpy as np
+import pytest
+
+from carregador import carregar_espectro
+
+CABECALHO = """# Experimento: teste
+# Data: [2024-05-02] [10:20:30.000001]
+# Operador: pytest
+# Comprimento de onda inicial: 1000
+# Comprimento de onda final: 1001
+# Ponto Por Resolução (PPR): 3
+# Colunas: comprimento_onda, tensao, sensibilidade
+#-------------------------------------
+"""
+DADOS = """1000.0,0.25,18
+1000.5,nan,18
+1001.0,0.75,19
+"""
+EVENTOS = """#-------------------------------------
+Conclusão: [10:21:00]
+"""
+
+
+def escrever(pasta, texto: str):
+    caminho = pasta / 'espectro.csv'
+    caminho.write_text(texto, encoding='utf-8')
+    return caminho
+
+
+def test_arquivo_completo(tmp_path):
+    espectro = carregar_espectro(escrever(tmp_path, CABECALHO + DADOS + EVENTOS))
+
+    assert len(espectro) == 3
+    np.testing.assert_array_equal(espectro.comprimento_onda, [1000.0, 1000.5, 1001.0])
+    assert np.isnan(espectro.tensao[1]) # Sobrecarga
+    np.testing.assert_array_equal(espectro.sensibilidade, [18, 18, 19])
+    assert espectro.metadados.ppr == 3
+    assert espectro.concluido
+
+
+def test_arquivo_antigo_sem_colunas(tmp_path):
+    antigo = CABECALHO.replace('# Colunas: comprimento_onda, tensao, sensibilidade\n', '')
+    espectro = carregar_espectro(escrever(tmp_path, antigo + '1000.0,0.25\n1000.5,0.5\n'))
+
+    assert espectro.dados.shape == (2, 2)
+    assert espectro.colunas == ('comprimento_onda', 'tensao')
+
+
+@pytest.mark.parametrize('ultima', ['1001.5,0.', '1001.5,0.8', '1001.5,0.8,1'])
+def test_ultima_linha_cortada(tmp_path, caplog, ultima):
+    """Programa que caiu no meio da escrita: a última linha (sem o "\\n") é descartada com um aviso."""
+
+    with caplog.at_level(logging.WARNING):
+        espectro = carregar_espectro(escrever(tmp_path, CABECALHO + DADOS + ultima))
+
+    assert len(espectro) == 3
+    np.testing.assert_array_equal(espectro.comprimento_onda, [1000.0, 1000.5, 1001.0])
+    assert 'incompleta' in caplog.text
+    assert not espectro.concluido
+
+
+@pytest.mark.parametrize('linha', ['1000.5,0.5', '1000.5,abc,18', '1000.5,0.5,18,1'])
+def test_linha_invalida_no_meio(tmp_path, linha):
+    dados = DADOS.replace('1000.5,nan,18', linha)
+
+    with pytest.raises(ValueError, match=r'linha 10: .*' + linha):
+        carregar_espectro(escrever(tmp_path, CABECALHO + dados + EVENTOS))
+
+
+def test_sem_dados(tmp_path):
+    espectro = carregar_espectro(escrever(tmp_path, CABECALHO + EVENTOS))
+
+    assert len(espectro) == 0
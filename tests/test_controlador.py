@@ -0,0 +1,80 @@
+"""
+Várias bancadas em paralelo ("controlador.py"): a validação da configuração, o andamento e duas bancadas emuladas rodando juntas.
+"""
+
+import pytest
+
+import emulador
+from carregador import carregar_espectro
+from controlador import Bancada, Controlador, EstadoBancada
+from conftest import FOLGA
+
+ATRIBUTOS = {'figura_final': False, 'ajustar_espera': False, 'espera_escala': 0.01, 'folga': FOLGA}
+
+
+def nova_bancada(nome: str, porta_lock_in: str='COM1', porta_arduino: str='COM2', **opcoes):
+    experimento = {'nome_arquivo': f'amostra_{nome}', 'operador': 'pytest', 'comp_i': 1000, 'comp_f': 1010, 'tamanho_fenda': 100, 'ppr': 3}
+    return Bancada(nome, experimento, {'porta': porta_lock_in, 'baudrate': 9600}, {'porta': porta_arduino, 'baudrate': 9600, 'timeout': 5}, **opcoes)
+
+
+def test_modo_desconhecido():
+    with pytest.raises(ValueError, match='Modo desconhecido'):
+        nova_bancada('A', modo='rapido')
+
+
+def test_nomes_repetidos():
+    with pytest.raises(ValueError, match='nomes'):
+        Controlador([nova_bancada('A'), nova_bancada('A', 'COM3', 'COM4')])
+
+
+def test_porta_repetida():
+    with pytest.raises(ValueError, match='porta'):
+        Controlador([nova_bancada('A'), nova_bancada('B', 'COM3', 'COM2')])
+
+
+def test_receber_atualiza_o_estado():
+    controlador = Controlador([nova_bancada('A')])
+    recebidos = []
+    controlador.inscrever(lambda estado, evento, dados: recebidos.append((estado.estado, evento)))
+
+    controlador.receber('A', 'estado', {'estado': 'medindo'})
+    controlador.receber('A', 'inicio', {'nome': 'amostra_A', 'pontos': 10})
+    controlador.receber('A', 'ponto', {'pontos': 4, 'comprimento_onda': 1002.0, 'tensao': 1e-4, 'ciclo_medio': 0.5})
+
+    estado = controlador.estados['A']
+    assert (estado.arquivo, estado.pontos, estado.total) == ('amostra_A', 4, 10)
+    assert estado.tempo_restante == pytest.approx(3.0)
+    assert not estado.terminou
+    assert '4/10' in estado.linha()
+
+    controlador.receber('A', 'erro', {'erro': 'RuntimeError()'})
+    assert estado.terminou and estado.erro == 'RuntimeError()'
+    assert recebidos == [('medindo', 'estado'), ('medindo', 'inicio'), ('medindo', 'ponto'), ('erro', 'erro')]
+
+
+def test_tempo_restante_antes_do_primeiro_ponto():
+    estado = EstadoBancada('A')
+    assert estado.tempo_restante is None
+    assert estado.linha().startswith('A ')
+
+
+def test_duas_bancadas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    emuladores = [emulador.emular_bancada(emulador.ModeloTempo(bits_por_caractere=11, semente=semente), emulador.ModeloTempo(atraso_step=0.0005, semente=semente), folga=FOLGA) for semente in (0, 1)]
+    try:
+        bancadas = [
+            nova_bancada('A', emuladores[0][0].porta, emuladores[0][1].porta, atributos=ATRIBUTOS),
+            nova_bancada('B', emuladores[1][0].porta, emuladores[1][1].porta, modo='async', atributos=ATRIBUTOS),
+        ]
+        estados = Controlador(bancadas).executar(mostrar=False)
+    finally:
+        for sr510, arduino in emuladores:
+            sr510.parar()
+            arduino.parar()
+
+    for nome in ('A', 'B'):
+        estado = estados[nome]
+        assert estado.estado == 'concluído', estado.erro
+        assert estado.pontos == estado.total
+        assert len(carregar_espectro(f'{estado.arquivo}.csv')) == estado.total
+        assert (tmp_path / f'{nome}.log').exists()
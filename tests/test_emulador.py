@@ -0,0 +1,51 @@
+"""
+Os drivers do "pyce" contra os equipamentos emulados (ver "emulador.py"), pelo pySerial de verdade.
+"""
+
+import numpy as np
+
+import emulador
+import pyce
+from carregador import carregar_espectro
+from conftest import FOLGA
+
+
+def test_arduino_anda_e_recolhe_a_folga(bancada):
+    _, arduino = bancada
+    monocromador = pyce.Monocromador(arduino.porta, 9600, timeout=5)
+    monocromador.conectar()
+    try:
+        monocromador.mover_motor(100)
+        assert arduino.posicao == 100
+        monocromador.mover_motor(-40) # Inversão de sentido: os primeiros steps só recolhem a folga
+        assert arduino.posicao == 100 - (40 - FOLGA)
+    finally:
+        monocromador.desconectar()
+
+
+def test_sr510_le_a_sensibilidade_e_a_saida(bancada):
+    sr510_emulado, _ = bancada
+    sr510_emulado.ruido = 0
+    sr510 = pyce.SR510(sr510_emulado.porta, 9600)
+    sr510.conectar()
+    try:
+        assert sr510.ler_sensibilidade() == pyce.TABELA_SENSIBILIDADE[18]
+        assert sr510.ler_valor_saida() == float(f'{emulador.espectro_padrao(0):.4E}')
+    finally:
+        sr510.fechar()
+
+
+def test_run(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento()
+    total_pontos, step, passo_a = experimento.calcula_passo()
+
+    experimento.run()
+
+    assert experimento.resultado == 'concluído'
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert len(espectro) == total_pontos
+    np.testing.assert_allclose(espectro.comprimento_onda, experimento.comp_i + passo_a * np.arange(total_pontos), atol=1e-3)
+    np.testing.assert_allclose(espectro.tensao, experimento.buffer_y)
+    assert espectro.concluido
+    assert arduino.posicao == experimento.posicao_steps == total_pontos * step # Um movimento depois de cada ponto
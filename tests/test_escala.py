@@ -0,0 +1,93 @@
+"""
+Troca automática da sensibilidade do Lock-in ("Experimento.ler_lock_in()" / "nova_escala()") contra o SR510 emulado.
+"""
+
+import pytest
+
+import pyce
+from carregador import carregar_espectro
+
+
+@pytest.mark.parametrize('sinal, codigo', [
+    (8e-3, 19), # Sobrecarga em 5 mV: sobe para 10 mV
+    (3e-2, 21), # Bem acima: sobe um degrau por leitura até 50 mV
+    (1e-6, 9), # Muito baixo: desce até 5 µV, onde a leitura fica abaixo da metade do fundo
+    (1e-3, 18), # Já está boa em 5 mV
+])
+def test_ler_lock_in_acha_a_escala(bancada, novo_experimento, sinal, codigo):
+    sr510_emulado, _ = bancada
+    sr510_emulado.sinal = lambda posicao: sinal
+    sr510_emulado.ruido = 0
+    experimento = novo_experimento()
+
+    valor, lido = experimento.ler_lock_in()
+
+    assert lido == codigo == sr510_emulado.sensibilidade
+    assert valor == pytest.approx(sinal)
+    assert abs(valor) < pyce.TABELA_SENSIBILIDADE[codigo][2]
+
+
+def test_sem_auto_escala(bancada, novo_experimento):
+    sr510_emulado, _ = bancada
+    sr510_emulado.sinal = lambda posicao: 1e-6
+    experimento = novo_experimento(auto_escala=False)
+
+    assert experimento.ler_lock_in()[1] == 18
+    assert sr510_emulado.sensibilidade == 18
+
+
+def test_escala_minima(bancada, novo_experimento):
+    sr510_emulado, _ = bancada
+    sr510_emulado.sinal = lambda posicao: 1e-9
+    sr510_emulado.ruido = 0
+    experimento = novo_experimento(escala_minima=12)
+
+    assert experimento.ler_lock_in()[1] == 12
+
+
+def test_run_grava_a_sensibilidade_de_cada_ponto(bancada, novo_experimento):
+    sr510_emulado, _ = bancada
+    sr510_emulado.sinal = lambda posicao: 1e-5 if posicao < 30 else 2e-3 # A escala muda no meio da varredura
+    sr510_emulado.ruido = 0
+    experimento = novo_experimento()
+
+    experimento.run()
+
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert set(espectro.sensibilidade) == {12, 18} # 50 µV (desce) e 5 mV (sobe um degrau por sobrecarga)
+    assert any('Sensibilidade' in evento for evento in espectro.eventos)
+    normalizadas = espectro.tensao * experimento.sensibilidade_ordem # As tensões continuam na normalização do início
+    assert normalizadas[0] == pytest.approx(1e-5, rel=1e-3)
+    assert normalizadas[-1] == pytest.approx(2e-3, rel=1e-3)
+
+
+class LockInQuantizado:
+    """Um Lock-in de mentira que arredonda a saída para a resolução da escala (1/1000 do fundo), como o visor do SR510: um sinal fraco numa escala grossa é lido como 0."""
+
+    def __init__(self, sinal: float, sensibilidade: int):
+        self.sinal = sinal
+        self.sensibilidade = sensibilidade
+        self.sobrecargas = 0
+
+    def ler_saida_e_estado(self):
+        fundo = pyce.TABELA_SENSIBILIDADE[self.sensibilidade][2]
+        sobrecarga = abs(self.sinal) >= fundo
+        self.sobrecargas += sobrecarga
+        resolucao = fundo / 1000
+        return min(round(self.sinal / resolucao) * resolucao, 1.2 * fundo), pyce.BIT_SOBRECARGA if sobrecarga else 0
+
+    def set_sensibilidade(self, codigo: int):
+        self.sensibilidade = codigo
+
+
+def test_leitura_zero_nao_desce_ate_a_escala_minima():
+    experimento = pyce.Experimento('teste', 'pytest', 1000, 1010, 100, 3)
+    experimento.espera_escala = 0
+    experimento.sr510 = LockInQuantizado(1e-6, 24) # 1 µV em 500 mV: lido como 0
+
+    valor, codigo = experimento.ler_lock_in()
+
+    assert experimento.sr510.sobrecargas == 0 # Desce uma década por vez, sem passar da escala certa
+    assert codigo == 9 # 5 µV
+    assert valor == pytest.approx(1e-6)
+    assert experimento.nova_escala(0.0, 0, 24) == 21
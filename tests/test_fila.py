@@ -0,0 +1,75 @@
+"""
+Fila de varreduras de um monocromador ("fila.py"): uma conexão só, a grade indo direto de uma varredura para a próxima.
+"""
+
+import pytest
+
+import pyce
+from carregador import carregar_espectro
+from conftest import FOLGA
+from fila import FilaExperimentos
+
+ATRIBUTOS = {'grafico_ao_vivo': False, 'figura_final': False, 'ajustar_espera': False, 'espera_escala': 0.01, 'folga': FOLGA}
+
+
+def nova_fila(conexoes, **opcoes):
+    return FilaExperimentos(*conexoes, padrao={'operador': 'pytest', 'tamanho_fenda': 100, 'ppr': 3}, atributos=ATRIBUTOS, **opcoes)
+
+
+def steps_da_varredura(comp_i: float, comp_f: float):
+    total_pontos, step, _ = pyce.Experimento('', '', comp_i, comp_f, 100, 3).calcula_passo()
+    return total_pontos, total_pontos * step
+
+
+def test_duas_varreduras(bancada, conexoes, monkeypatch):
+    _, arduino = bancada
+    conexoes_abertas = []
+    conectar = pyce.Experimento.conectar
+    monkeypatch.setattr(pyce.Experimento, 'conectar', lambda self, *args, **kwargs: conexoes_abertas.append(self) or conectar(self, *args, **kwargs))
+
+    fila = nova_fila(conexoes)
+    fila.adicionar('faixa_1', 1000, 1005)
+    fila.adicionar('faixa_2', 1010, 1015, modo='async')
+    resultados = fila.executar()
+
+    assert [resultado for _, resultado in resultados] == ['concluído', 'concluído']
+    assert len(conexoes_abertas) == 1
+    for (nome, _), (comp_i, comp_f) in zip(resultados, [(1000, 1005), (1010, 1015)]):
+        total_pontos, _ = steps_da_varredura(comp_i, comp_f)
+        espectro = carregar_espectro(f'{nome}.csv')
+        assert len(espectro) == total_pontos
+        assert espectro.comprimento_onda[0] == pytest.approx(comp_i)
+
+    # Fim da primeira --> início da segunda sem voltar a 1000 Å, e a segunda inteira
+    assert arduino.posicao == round(10 * pyce.Experimento.fator_calibracao) + steps_da_varredura(1010, 1015)[1]
+
+
+def test_voltar_ao_final(bancada, conexoes):
+    _, arduino = bancada
+    fila = nova_fila(conexoes, voltar_ao_final=True)
+    fila.adicionar('faixa_1', 1000, 1005)
+    fila.adicionar('faixa_2', 1005, 1010)
+    fila.executar()
+
+    assert arduino.posicao == 0
+
+
+def test_modo_desconhecido(conexoes):
+    with pytest.raises(ValueError, match='Modo desconhecido'):
+        nova_fila(conexoes).adicionar('faixa', 1000, 1005, modo='rapido')
+
+
+def test_falha_ao_conectar_fecha_as_portas(conexoes, monkeypatch):
+    experimentos = []
+    criar_experimento = FilaExperimentos.criar_experimento
+    monkeypatch.setattr(FilaExperimentos, 'criar_experimento', lambda self, varredura: experimentos.append(criar_experimento(self, varredura)) or experimentos[-1])
+    monkeypatch.setattr(pyce.Experimento, 'ler_dados_iniciais', lambda self: 1 / 0) # As duas portas já estão abertas
+
+    fila = nova_fila(conexoes)
+    fila.adicionar('faixa_1', 1000, 1005)
+    with pytest.raises(ZeroDivisionError):
+        fila.executar()
+
+    experimento, = experimentos
+    assert not experimento.sr510.conexao.is_open
+    assert not experimento.arduino.conexao.is_open
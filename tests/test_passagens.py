@@ -0,0 +1,49 @@
+"""
+Varreduras com várias passagens em serpentina ("Experimento.run_passagens()") contra a bancada emulada.
+"""
+
+import numpy as np
+
+import pyce
+from carregador import carregar_espectro
+
+
+def test_run_passagens(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento()
+    total_pontos, _, passo_a = experimento.calcula_passo()
+    comprimentos = experimento.comp_i + passo_a * np.arange(total_pontos)
+
+    experimento.run_passagens(2)
+
+    assert experimento.resultado == 'concluído'
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert espectro.colunas == ('comprimento_onda', 'tensao', 'erro')
+    assert espectro.concluido
+    np.testing.assert_allclose(espectro.comprimento_onda, comprimentos, atol=1e-3)
+
+    leituras = np.loadtxt(f'{experimento.nome_exclusivo}_passagens.csv', delimiter=',', comments='#', ndmin=2)
+    assert len(leituras) == 2 * total_pontos
+    for passagem in (1, 2):
+        da_passagem = leituras[leituras[:, 0] == passagem]
+        np.testing.assert_allclose(np.sort(da_passagem[:, 1]), comprimentos, atol=1e-3)
+    medias = [leituras[np.abs(leituras[:, 1] - x) < 1e-3, 2].mean() for x in comprimentos]
+    np.testing.assert_allclose(espectro.tensao, medias, atol=1e-4) # O arquivo principal recebe as médias arredondadas
+
+    assert arduino.posicao == experimento.posicao_steps
+
+
+def test_run_depois_de_run_passagens(bancada, novo_experimento):
+    """O mesmo objeto roda um "run()" depois do "run_passagens()" (GUI, fila): a terceira coluna volta a ser a sensibilidade."""
+
+    _, arduino = bancada
+    experimento = novo_experimento()
+    experimento.run_passagens(2) # Termina no início, com a grade chegando por trás
+
+    experimento.run()
+
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert len(espectro) == experimento.calcula_passo()[0]
+    assert espectro.colunas == ('comprimento_onda', 'tensao', 'sensibilidade')
+    assert set(espectro.sensibilidade) <= set(pyce.TABELA_SENSIBILIDADE) # Códigos, não erros
+    assert arduino.posicao == experimento.posicao_steps # A folga da última inversão não se perde no primeiro passo do "run()"
@@ -0,0 +1,58 @@
+"""
+Perfil trapezoidal do motor ("PerfilMovimento" / "Monocromador.definir_perfil()") contra o Arduino emulado.
+"""
+
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+import emulador
+import pyce
+
+
+@pytest.mark.parametrize('steps', [1, 2, 17, 150, 1000])
+def test_duracao_igual_a_do_firmware(steps):
+    perfil = pyce.PerfilMovimento(800, 4000)
+
+    assert perfil.duracao(steps) == pytest.approx(emulador.duracao_trapezio(steps, 800, 4000))
+    assert perfil.duracao(-steps) == perfil.duracao(steps)
+
+
+def test_velocidades_sobem_e_descem():
+    velocidades = pyce.PerfilMovimento(800, 4000).velocidades(1000)
+
+    assert velocidades.max() == 800
+    np.testing.assert_allclose(velocidades, velocidades[::-1]) # Rampa de subida = rampa de descida
+    assert np.all(np.diff(velocidades[:len(velocidades) // 2]) >= 0)
+
+
+def test_movimento_com_perfil(bancada):
+    _, arduino = bancada
+    perfil = pyce.PerfilMovimento(2000, 20000)
+    monocromador = pyce.Monocromador(arduino.porta, 9600, timeout=5)
+    monocromador.conectar()
+    try:
+        monocromador.definir_perfil(perfil)
+        assert arduino.perfil == (2000, 20000)
+
+        inicio = perf_counter()
+        monocromador.mover_motor(400)
+        assert perf_counter() - inicio == pytest.approx(perfil.duracao(400), abs=0.1)
+        assert arduino.posicao == 400
+
+        monocromador.definir_perfil(pyce.PerfilMovimento(0, 0)) # De volta ao potenciômetro
+        assert arduino.perfil == (0, 0)
+    finally:
+        monocromador.desconectar()
+
+
+def test_run_com_perfil(bancada, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento(perfil=pyce.PerfilMovimento(2000, 20000), voltar_ao_final=True)
+
+    experimento.run()
+
+    assert experimento.resultado == 'concluído'
+    assert arduino.perfil == (2000, 20000) # Enviado no "conectar()"
+    assert arduino.posicao == experimento.posicao_steps == 0
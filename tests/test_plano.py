@@ -0,0 +1,58 @@
+"""
+Plano de varredura carregado no Arduino ("Monocromador.carregar_plano()" / "avancar()") contra o Arduino emulado.
+"""
+
+import numpy as np
+import pytest
+
+import pyce
+from carregador import carregar_espectro
+
+
+@pytest.fixture
+def monocromador(bancada):
+    _, arduino = bancada
+    monocromador = pyce.Monocromador(arduino.porta, 9600, timeout=5)
+    monocromador.conectar()
+    yield monocromador
+    monocromador.desconectar()
+
+
+def test_plano_anda_um_ponto_por_byte(bancada, monocromador):
+    _, arduino = bancada
+    monocromador.carregar_plano(7, 3)
+
+    for ponto in range(1, 4):
+        assert monocromador.avancar().aguardar() == 'A'
+        assert arduino.posicao == 7 * ponto
+
+    with pytest.raises(RuntimeError):
+        monocromador.avancar() # O plano acabou
+
+
+def test_plano_nao_confirmado(bancada, monocromador):
+    _, arduino = bancada
+
+    def firmware_antigo(): # Sem suporte a planos: o comando não é reconhecido
+        arduino.comando = None
+        arduino.enviar(b'?\r\n')
+
+    arduino.executar_comando = firmware_antigo
+
+    with pytest.raises(RuntimeError):
+        monocromador.carregar_plano(7, 3)
+
+
+def test_run_com_e_sem_plano(bancada, novo_experimento):
+    _, arduino = bancada
+    arquivos = []
+    for usar_plano in (True, False):
+        experimento = novo_experimento(nome=f'plano_{usar_plano}', usar_plano=usar_plano, voltar_ao_final=True)
+        experimento.run()
+        assert experimento.resultado == 'concluído'
+        assert arduino.posicao == experimento.posicao_steps == 0
+        arquivos.append(carregar_espectro(f'{experimento.nome_exclusivo}.csv'))
+
+    com_plano, sem_plano = arquivos
+    assert len(com_plano) == len(sem_plano) == experimento.calcula_passo()[0]
+    np.testing.assert_array_equal(com_plano.comprimento_onda, sem_plano.comprimento_onda)
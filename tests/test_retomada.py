@@ -0,0 +1,167 @@
+"""
+Retomada de varreduras interrompidas pelo checkpoint (ver "Experimento.retomar()"): o arquivo retomado tem de ser igual ao de uma varredura sem interrupção e a grade tem de terminar onde o PC acha que ela está.
+"""
+
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+import pyce
+from carregador import carregar_espectro
+from conftest import preparar
+
+
+def retomar(caminho: str, conexoes: tuple):
+    """Retoma o checkpoint e roda a varredura até o fim."""
+
+    experimento = preparar(pyce.Experimento.retomar(caminho))
+    experimento.conectar(*conexoes)
+    try:
+        experimento.run()
+    finally:
+        experimento.desconectar()
+    return experimento
+
+
+def conferir_retomada(experimento: pyce.Experimento, arduino):
+    """Confere o arquivo e a posição da grade de uma varredura retomada até o fim."""
+
+    total_pontos, step, passo_a = experimento.calcula_passo()
+    assert experimento.resultado == 'concluído'
+    assert not os.path.exists(experimento.caminho_checkpoint) # Apagado ao concluir
+
+    espectro = carregar_espectro(f'{experimento.nome_exclusivo}.csv')
+    assert len(espectro) == total_pontos
+    np.testing.assert_allclose(espectro.comprimento_onda, experimento.comp_i + passo_a * np.arange(total_pontos), atol=1e-3)
+    np.testing.assert_allclose(espectro.tensao, experimento.buffer_y)
+    assert espectro.concluido
+    assert arduino.posicao == experimento.posicao_steps == total_pontos * step
+
+
+def test_retomar_depois_de_abortar(bancada, conexoes, novo_experimento):
+    _, arduino = bancada
+    experimento = novo_experimento(manter_conexao=False, formatos_saida=('csv', 'bin'))
+    experimento.inscrever(lambda evento, dados: evento == 'ponto' and dados['pontos'] == 7 and experimento.abortar())
+
+    experimento.run()
+
+    assert experimento.resultado == 'abortado'
+    assert len(experimento.buffer) == 7
+    assert os.path.exists(experimento.caminho_checkpoint)
+
+    retomado = retomar(experimento.caminho_checkpoint, conexoes)
+    conferir_retomada(retomado, arduino)
+    binario = carregar_espectro(f'{retomado.nome_exclusivo}.bin')
+    np.testing.assert_allclose(binario.dados, carregar_espectro(f'{retomado.nome_exclusivo}.csv').dados)
+
+
+def test_retomar_com_pontos_alem_do_checkpoint(bancada, conexoes, novo_experimento):
+    """O .csv tem pontos gravados depois do último checkpoint: eles são cortados do arquivo e medidos de novo, sem linhas repetidas."""
+
+    _, arduino = bancada
+    experimento = novo_experimento(manter_conexao=False)
+    experimento.inscrever(lambda evento, dados: evento == 'ponto' and dados['pontos'] == 7 and experimento.abortar())
+    experimento.run()
+
+    with open(experimento.caminho_checkpoint, encoding='utf-8') as arquivo:
+        estado = json.load(arquivo)
+    estado['pontos'] = 4 # Checkpoint mais antigo que o arquivo
+    with open(experimento.caminho_checkpoint, 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo)
+
+    conferir_retomada(retomar(experimento.caminho_checkpoint, conexoes), arduino)
+
+
+def test_retomar_depois_de_interromper_com_movimento_enviado(bancada, conexoes, novo_experimento):
+    """Ctrl+C logo depois de salvar o ponto: o movimento para o ponto seguinte já foi enviado e o checkpoint final tem de contar com ele."""
+
+    _, arduino = bancada
+    experimento = novo_experimento(manter_conexao=False)
+    salvar_ponto = experimento.salvar_ponto
+
+    def salvar_e_interromper(*ponto):
+        salvar_ponto(*ponto)
+        if len(experimento.buffer) == 7:
+            raise KeyboardInterrupt
+
+    experimento.salvar_ponto = salvar_e_interromper
+    with pytest.raises(KeyboardInterrupt):
+        experimento.run()
+
+    assert experimento.resultado == 'erro'
+    with open(experimento.caminho_checkpoint, encoding='utf-8') as arquivo:
+        estado = json.load(arquivo)
+    assert estado['fechado']
+    assert estado['pontos'] == 7
+    assert estado['posicao_steps'] == 7 * experimento.calcula_passo()[1] # A grade já saiu do ponto 7
+
+    conferir_retomada(retomar(experimento.caminho_checkpoint, conexoes), arduino)
+
+
+def test_checkpoint_acompanha_o_flush(novo_experimento):
+    """Durante a varredura o checkpoint só é gravado quando o .csv vai para o disco."""
+
+    experimento = novo_experimento()
+    experimento.politica_escrita.update(pontos_por_flush=5, intervalo_flush=3600)
+    gravados = []
+    salvar_checkpoint = experimento.salvar_checkpoint
+
+    def contar(pontos, plano, fechado=False):
+        gravados.append(pontos)
+        salvar_checkpoint(pontos, plano, fechado)
+
+    experimento.salvar_checkpoint = contar
+    experimento.run()
+
+    total_pontos = experimento.calcula_passo()[0]
+    assert gravados == list(range(0, total_pontos + 1, 5)) # O inicial e um a cada 5 pontos
+    assert not os.path.exists(experimento.caminho_checkpoint)
+
+
+def test_segundo_run_do_mesmo_objeto_mede_tudo(bancada, novo_experimento):
+    """Sem checkpoint carregado, um novo "run()" começa do primeiro ponto, mesmo com o buffer cheio da varredura anterior."""
+
+    experimento = novo_experimento(voltar_ao_final=True)
+    total_pontos = experimento.calcula_passo()[0]
+    experimento.run()
+
+    experimento.run()
+
+    assert experimento.resultado == 'concluído'
+    assert len(experimento.buffer) == total_pontos
+    assert len(carregar_espectro(f'{experimento.nome_exclusivo}.csv')) == total_pontos
+
+
+def test_retomar_longe_do_inicio(bancada, conexoes, novo_experimento):
+    """Retomada depois de muitos pontos com um passo pequeno: o destino em Å, com o "passo_a" arredondado, cairia fora da grade dos steps."""
+
+    _, arduino = bancada
+    experimento = novo_experimento(manter_conexao=False, comp_f=1042, ppr=5)
+    total_pontos, step, passo_a = experimento.calcula_passo()
+    assert step == 3 and total_pontos > 115
+    assert round(115 * passo_a * pyce.Experimento.fator_calibracao) != 115 * step # O caso que o destino em Å erra
+    experimento.inscrever(lambda evento, dados: evento == 'ponto' and dados['pontos'] == 115 and experimento.abortar())
+    experimento.run()
+    assert len(experimento.buffer) == 115
+
+    conferir_retomada(retomar(experimento.caminho_checkpoint, conexoes), arduino)
+
+
+@pytest.mark.parametrize('modo', ['run_adaptativo', 'run_passagens', 'run_async'])
+def test_so_o_run_retoma(novo_experimento, conexoes, modo):
+    experimento = novo_experimento(manter_conexao=False)
+    experimento.inscrever(lambda evento, dados: evento == 'ponto' and dados['pontos'] == 3 and experimento.abortar())
+    experimento.run()
+
+    retomado = preparar(pyce.Experimento.retomar(experimento.caminho_checkpoint))
+    retomado.conectar(*conexoes)
+    try:
+        varredura = getattr(retomado, modo)
+        with pytest.raises(RuntimeError, match='retomada'):
+            asyncio.run(varredura()) if modo == 'run_async' else varredura()
+    finally:
+        retomado.desconectar()
+    assert len(carregar_espectro(f'{experimento.nome_exclusivo}.csv')) == 3 # O arquivo do checkpoint ficou como estava
@@ -0,0 +1,95 @@
+"""
+Transmissão da varredura para navegadores ("servidor.py"), em uma porta livre qualquer.
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from servidor import ServidorEspectro
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorEspectro(porta=0)
+    servidor.iniciar()
+    yield servidor
+    servidor.parar()
+
+
+def consultar(servidor: ServidorEspectro, caminho: str):
+    with urllib.request.urlopen(servidor.endereco + caminho, timeout=5) as resposta:
+        return json.load(resposta)
+
+
+def test_pontos(servidor):
+    servidor.publicar('inicio', {'nome': 'teste', 'pontos': 2})
+    servidor.publicar('ponto', {'comprimento_onda': np.float64(1000.0), 'tensao': 0.5, 'pontos': 1})
+    servidor.publicar('ponto', {'comprimento_onda': 1001.0, 'tensao': float('nan'), 'pontos': 2}) # Sobrecarga
+
+    resposta = consultar(servidor, 'pontos?desde=0')
+    assert resposta['cursor'] == 3
+    assert [evento['evento'] for evento in resposta['eventos']] == ['inicio', 'ponto', 'ponto']
+    assert resposta['eventos'][1]['dados']['comprimento_onda'] == 1000.0
+    assert resposta['eventos'][2]['dados']['tensao'] is None
+
+    assert consultar(servidor, 'pontos?desde=3') == {'cursor': 3, 'eventos': []}
+
+
+def test_sem_cursor_comeca_na_varredura_atual(servidor):
+    for nome in ('primeira', 'segunda'):
+        servidor.publicar('inicio', {'nome': nome, 'pontos': 0})
+        servidor.publicar('fim', {'resultado': 'concluído', 'pontos': 0})
+
+    resposta = consultar(servidor, 'pontos')
+    assert resposta['cursor'] == 4
+    assert resposta['eventos'][0]['dados']['nome'] == 'segunda'
+
+
+@pytest.mark.parametrize('cursor', ['-1', 'abc'])
+def test_cursor_invalido(servidor, cursor):
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        consultar(servidor, f'pontos?desde={cursor}')
+    assert erro.value.code == 400
+
+
+def test_rota_desconhecida(servidor):
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        consultar(servidor, 'nada')
+    assert erro.value.code == 404
+
+
+def test_eventos(servidor):
+    servidor.publicar('inicio', {'nome': 'teste', 'pontos': 1})
+    transmissao = urllib.request.urlopen(servidor.endereco + 'eventos?desde=0', timeout=5)
+    assert transmissao.headers['Content-Type'].startswith('text/event-stream')
+
+    def proximo_evento():
+        linhas = []
+        while (linha := transmissao.readline().decode('utf-8').rstrip('\n')):
+            linhas.append(linha)
+        return linhas
+
+    assert proximo_evento() == ['id: 1', 'event: inicio', 'data: {"nome": "teste", "pontos": 1}']
+
+    servidor.publicar('fim', {'resultado': 'concluído', 'pontos': 1}) # Chega com a transmissão já aberta
+    assert proximo_evento() == ['id: 2', 'event: fim', 'data: {"resultado": "concluído", "pontos": 1}']
+
+    servidor.parar()
+    assert transmissao.read() == b'' # O servidor encerra a transmissão
+    transmissao.close()
+
+
+def test_varredura(servidor, novo_experimento):
+    experimento = novo_experimento()
+    experimento.inscrever(servidor.publicar)
+    experimento.run()
+
+    eventos = consultar(servidor, 'pontos')['eventos']
+    pontos = [evento['dados'] for evento in eventos if evento['evento'] == 'ponto']
+    assert eventos[0]['evento'] == 'inicio' and eventos[-1]['evento'] == 'fim'
+    assert eventos[-1]['dados']['resultado'] == 'concluído'
+    np.testing.assert_allclose([ponto['comprimento_onda'] for ponto in pontos], experimento.buffer_x)
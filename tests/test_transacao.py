@@ -0,0 +1,53 @@
+"""
+Transações do SR510 (várias consultas numa única escrita, ver "SR510.transacao()") e o ajuste do "W" contra o SR510 emulado.
+"""
+
+import pytest
+
+import emulador
+import pyce
+
+
+@pytest.fixture
+def sr510(bancada):
+    sr510_emulado, _ = bancada
+    sr510 = pyce.SR510(sr510_emulado.porta, 9600)
+    sr510.conectar()
+    yield sr510
+    sr510.fechar()
+
+
+def test_respostas_em_ordem(bancada, sr510):
+    bancada[0].ruido = 0
+
+    sensibilidade, espera, saida, estado = sr510.transacao(['G', 'W', 'Q', 'Y'])
+
+    assert (sensibilidade, espera, estado) == ('18', '6', '0')
+    assert float(saida) == pytest.approx(emulador.espectro_padrao(0), rel=1e-3)
+
+
+def test_definicoes_nao_respondem(bancada, sr510):
+    assert sr510.transacao(['G12', 'W2', 'G', 'W']) == ['12', '2']
+    assert bancada[0].sensibilidade == 12
+
+
+def test_ajuste_escolhe_w0(bancada, sr510):
+    assert sr510.ajustar_tempo_espera() == 0
+    assert bancada[0].tempo_espera == sr510.tempo_espera == 0
+
+
+def test_ajuste_confere_a_saida(bancada, sr510):
+    """Com W abaixo de 2, a resposta do "Q" chega cortada: o ajuste fica no primeiro W em que ela chega inteira."""
+
+    sr510_emulado, _ = bancada
+    enviar = sr510_emulado.enviar
+
+    def enviar_cortado(dados, **kwargs):
+        if sr510_emulado.tempo_espera < 2 and b'E' in dados:
+            dados = dados[-5:] # Só o fim do número ("E-04\r")
+        enviar(dados, **kwargs)
+
+    sr510_emulado.enviar = enviar_cortado
+
+    assert sr510.ajustar_tempo_espera() == 2
+    assert sr510_emulado.tempo_espera == 2